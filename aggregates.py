@@ -0,0 +1,148 @@
+import os
+
+import pandas as pd
+
+from storage import read_table, table_path, write_table
+
+# weekly forecast columns summarised per snapshot and city
+AGGREGATE_COLUMNS = ['Precipitation', 'Snow', 'High_Temp', 'Low_Temp', 'Avg_Temp']
+# daily measurements summarised per snapshot and city
+DAILY_AGGREGATE_COLUMNS = [
+    'Temperature', 'Humidity', 'Wind Speed (km/h)', 'Pressure (mb)', 'Dew Point', 'Visibility (km)'
+]
+# how every statistic is combined when snapshots, cities or regions are merged
+STATS = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max', 'sumsq': 'sum'}
+SNAPSHOT_KEYS = ['Scraped Date', 'Region', 'City']
+
+AGGREGATES_DIR = "outputs/processed"
+AGGREGATES_NAME = "weekly-aggregates"
+DAILY_AGGREGATES_NAME = "daily-aggregates"
+
+def aggregates_path(storage_format=None, directory=AGGREGATES_DIR, name=AGGREGATES_NAME):
+    return table_path(directory, name, storage_format)
+
+def _stat_columns(stats):
+    # '<column>_<stat>' -> how it is combined, for every statistic column of stats
+    return {
+        col: STATS[col.rsplit('_', 1)[1]]
+        for col in stats.columns if '_' in col and col.rsplit('_', 1)[1] in STATS
+    }
+
+def snapshot_stats(df, columns=AGGREGATE_COLUMNS):
+    """
+    Sum, count, min, max and sum of squares of every one of columns per scrape
+    snapshot and city: one row per (Scraped Date, Region, City) with
+    '<column>_<stat>' columns. Key columns df lacks are left out.
+    """
+    keys = [key for key in SNAPSHOT_KEYS if key in df.columns]
+    columns = [col for col in columns if col in df.columns]
+    squares = df[columns].astype(float).pow(2).add_suffix('_sumsq')
+    df = pd.concat([df[keys], df[columns], squares], axis=1)
+    if 'Scraped Date' in keys:
+        df['Scraped Date'] = pd.to_datetime(df['Scraped Date'])
+    grouped = df.groupby(keys, observed=True, dropna=False)
+    stats = grouped[columns].agg(['sum', 'count', 'min', 'max'])
+    stats.columns = [f"{col}_{stat}" for col, stat in stats.columns]
+    stats = stats.join(grouped[list(squares.columns)].sum())
+    return stats[[f"{col}_{stat}" for col in columns for stat in STATS]].reset_index()
+
+def rollup(stats, by):
+    """
+    Merges the statistics of the rows sharing the `by` columns, e.g. every
+    snapshot of a city, or every city of a region. Merged statistics are exact:
+    sums and counts add up, minima and maxima carry over.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    combined = _stat_columns(stats)
+    grouped = stats.groupby(by, observed=True, dropna=False)
+    # one reduction per combine function rather than one per column
+    parts = [
+        getattr(grouped[[col for col, how in combined.items() if how == combine]], combine)()
+        for combine in dict.fromkeys(combined.values())
+    ]
+    return pd.concat(parts, axis=1)[list(combined)].reset_index()
+
+def window(stats, snapshots=None, days=None):
+    """
+    The statistics of the latest `snapshots` scrapes, or of the scrapes in the
+    last `days` days before the latest one; all of them when neither is given.
+    """
+    if 'Scraped Date' not in stats.columns or stats.empty:
+        return stats
+    scraped = stats['Scraped Date']
+    keep = pd.Series(True, index=stats.index)
+    if snapshots is not None:
+        keep &= scraped.isin(scraped.drop_duplicates().nlargest(snapshots))
+    if days is not None:
+        keep &= scraped > scraped.max() - pd.Timedelta(days=days)
+    return stats[keep]
+
+def summary(stats, by='City'):
+    """
+    Rolls stats up by `by` and adds '<column>_mean' and '<column>_std' (population)
+    columns for every summarised column.
+    """
+    summed = rollup(stats, by)
+    # collected first and added in one go, inserting columns one by one is slow
+    derived = {}
+    for col in [name[:-len('_sum')] for name in summed.columns if name.endswith('_sum')]:
+        mean = summed[f"{col}_sum"] / summed[f"{col}_count"]
+        derived[f"{col}_mean"] = mean
+        if f"{col}_sumsq" in summed.columns:
+            variance = summed[f"{col}_sumsq"] / summed[f"{col}_count"] - mean ** 2
+            derived[f"{col}_std"] = variance.clip(lower=0) ** 0.5
+    return pd.concat([summed, pd.DataFrame(derived, index=summed.index)], axis=1)
+
+def _day_files(path):
+    # the files of the store, one per scrape day and named after it, oldest first; half-written ones start with '.'
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if not name.startswith('.')]
+
+def load_aggregates(path, columns=None):
+    """
+    The stored per-snapshot statistics, only the given columns of them,
+    or None before the first update.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        frames = [read_table(day_path, columns=columns, count=False) for day_path in _day_files(path)]
+        if not frames:
+            return None
+        stats = pd.concat(frames, ignore_index=True)
+    else:
+        # a store written before the statistics were kept per scrape day
+        stats = read_table(path, columns=columns, count=False)
+    stats['Scraped Date'] = pd.to_datetime(stats['Scraped Date'])
+    return stats
+
+def update_aggregates(new_stats, path):
+    """
+    Adds the statistics of new snapshots to the store at path, a directory with one
+    file per scrape day, and returns how many days were written. Only the days of
+    the new snapshots are read and rewritten: snapshots that are already stored are
+    replaced, so re-processing one is idempotent, and older days are not touched.
+    """
+    new_stats = new_stats.assign(**{'Scraped Date': pd.to_datetime(new_stats['Scraped Date'])})
+    extension = os.path.splitext(path)[1]
+    if os.path.isfile(path):
+        # moving a single-file store over to one file per day
+        legacy = load_aggregates(path)
+        os.remove(path)
+        replaced = legacy['Scraped Date'].isin(new_stats['Scraped Date'])
+        new_stats = pd.concat([legacy[~replaced], new_stats], ignore_index=True)
+    os.makedirs(path, exist_ok=True)
+
+    keys = [key for key in SNAPSHOT_KEYS if key in new_stats.columns]
+    days = new_stats.groupby(new_stats['Scraped Date'].dt.strftime('%Y-%m-%d'), sort=True)
+    for day, day_stats in days:
+        day_path = os.path.join(path, day + extension)
+        stored = load_aggregates(day_path)
+        if stored is not None:
+            replaced = stored['Scraped Date'].isin(day_stats['Scraped Date'])
+            day_stats = pd.concat([stored[~replaced], day_stats], ignore_index=True)
+        day_stats = day_stats.sort_values(keys, kind="stable").reset_index(drop=True)
+        # written next to the day's file and moved over it, a crash leaves the stored day intact
+        tmp_path = os.path.join(path, f".{day}{extension}")
+        write_table(day_stats, tmp_path, partitioned=False)
+        os.replace(tmp_path, day_path)
+    return days.ngroups
@@ -0,0 +1,50 @@
+"""
+Compares the memory footprint of the cleaned daily and weekly frames with and
+without the dtype schema, on synthetic data.
+
+    python -m benchmarks.memory                   # 10^5 rows
+    python -m benchmarks.memory --rows 1e7
+"""
+import argparse
+import tempfile
+
+import pandas as pd
+
+from benchmarks.run import _setup_locations
+from benchmarks.synthetic import make_raw_daily, make_raw_weekly
+
+def footprint(rows, workdir):
+    """
+    {table: memory report} for rows synthetic daily and weekly rows.
+    """
+    from daily_processor import clean_daily_frame
+    from weekly_processor import clean_weekly_frame
+    from schema import memory_report
+
+    locations = _setup_locations(workdir)
+    reports = {}
+    for kind, make_frame, clean in (
+        ("daily", make_raw_daily, clean_daily_frame),
+        ("weekly", make_raw_weekly, clean_weekly_frame),
+    ):
+        raw = make_frame(rows, locations)
+        reports[kind] = memory_report(clean(raw, schema=None), clean(raw))
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the memory footprint of the cleaned tables.")
+    parser.add_argument("--rows", type=lambda value: int(float(value)), default=100_000, help="rows per table")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        reports = footprint(args.rows, workdir)
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        for kind, report in reports.items():
+            total = report.loc["Total"]
+            print(f"{kind}: {total['bytes before'] / 2 ** 20:.1f} MB -> {total['bytes after'] / 2 ** 20:.1f} MB "
+                  f"({total['ratio']:.0%})")
+            print(report.to_string())
+            print()
+
+if __name__ == "__main__":
+    main()
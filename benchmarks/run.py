@@ -0,0 +1,347 @@
+"""
+Times the scrape, clean and plot stages on synthetic data and compares the
+results with a stored baseline.
+
+    python -m benchmarks.run                      # default sizes, compare with baseline.json
+    python -m benchmarks.run --sizes 1e3,1e7      # 10^3 and 10^7 rows
+    python -m benchmarks.run --save-baseline      # record the current machine's numbers
+
+Every benchmark is timed over --repeat runs (best of) and run once more under
+tracemalloc for its peak Python heap. A result slower or larger than its
+baseline by more than --tolerance fails the run.
+
+The startup benchmarks time `main.py <command> --dry-run` in a fresh interpreter;
+they also fail the run when a command takes longer than its STARTUP_BUDGET or imports
+a library its stages do not use.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    make_locations, make_raw_daily, make_raw_weekly, make_raw_weekly_history, serve_pages, write_raw_csv
+)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_TOLERANCE = 1.5
+NUM_CITIES = 100
+
+# timings below this many seconds are too noisy to compare on their own
+MIN_SECONDS = 0.05
+# peak memory below this many MB is not worth comparing either
+MIN_PEAK_MB = 1.0
+
+def _setup_locations(workdir):
+    # a registry with NUM_CITIES synthetic cities, so coordinates join for every row
+    path = os.path.join(workdir, "locations.csv")
+    if not os.path.exists(path):
+        make_locations(NUM_CITIES).to_csv(path, index=False)
+    os.environ["WEATHER_LOCATIONS"] = path
+    return pd.read_csv(path)
+
+def _raw_path(workdir, kind, rows):
+    path = os.path.join(workdir, f"{kind}-raw-{rows}.csv")
+    if not os.path.exists(path):
+        make_frame = {
+            "daily": make_raw_daily, "weekly": make_raw_weekly, "weekly_history": make_raw_weekly_history
+        }[kind]
+        write_raw_csv(make_frame, path, rows, _setup_locations(workdir))
+    return path
+
+def _clean_path(workdir, kind, rows):
+    from daily_processor import clean_daily_weather_data
+    from weekly_processor import clean_weekly_weather_data
+
+    path = os.path.join(workdir, f"{kind}-clean-{rows}.csv")
+    if not os.path.exists(path):
+        clean = clean_daily_weather_data if kind == "daily" else clean_weekly_weather_data
+        clean(_raw_path(workdir, kind, rows), path)
+    return path
+
+def setup_clean(workdir, rows, kind, chunksize=None):
+    from daily_processor import clean_daily_weather_data
+    from weekly_processor import clean_weekly_weather_data
+
+    clean = clean_daily_weather_data if kind == "daily" else clean_weekly_weather_data
+    raw_path = _raw_path(workdir, kind, rows)
+    output_path = os.path.join(workdir, f"{kind}-bench-{rows}.csv")
+    return partial(clean, raw_path, output_path, chunksize=chunksize)
+
+def setup_daily_plots(workdir, rows):
+    from daily_plotter import generate_plots
+
+    read_path = _clean_path(workdir, "daily", rows)
+    output_dir = os.path.join(workdir, f"daily-plots-{rows}")
+    os.makedirs(output_dir, exist_ok=True)
+    # one worker renders in this process, so tracemalloc sees the rendering
+    return partial(generate_plots, read_path, output_dir, max_workers=1, html_options={'html_mode': 'cdn'})
+
+def setup_weekly_plots(workdir, rows):
+    from weekly_plotter import visualize_weekly_weather_by_city
+
+    df = pd.read_csv(_clean_path(workdir, "weekly", rows), parse_dates=['Date'])
+    output_dir = os.path.join(workdir, f"weekly-plots-{rows}")
+    return partial(
+        visualize_weekly_weather_by_city, df, output_dir, max_workers=1, html_options={'html_mode': 'cdn'}
+    )
+
+def setup_interpolation(workdir, rows):
+    from interpolation import interpolate_field
+
+    # rows readings of NUM_CITIES cities, one grid per timestamp
+    locations = _setup_locations(workdir)
+    timestamps = max(rows // len(locations), 1)
+    df = pd.DataFrame({
+        'Latitude': np.tile(locations['Latitude'].to_numpy(), timestamps),
+        'Longitude': np.tile(locations['Longitude'].to_numpy(), timestamps),
+        'Date': np.repeat(np.arange(timestamps), len(locations)),
+        'Avg_Temp': np.random.default_rng(0).normal(10, 8, timestamps * len(locations)),
+    })
+    # the weights are computed once, every later snapshot reuses them
+    interpolate_field(df.head(len(locations)), 'Avg_Temp', time_col='Date')
+    return partial(interpolate_field, df, 'Avg_Temp', time_col='Date')
+
+def setup_validation(workdir, rows):
+    from aggregates import DAILY_AGGREGATE_COLUMNS, snapshot_stats, update_aggregates
+    from daily_processor import clean_daily_frame
+    from weekly_processor import clean_weekly_frame
+    from validation import ZSCORE_COLUMNS, load_baseline, validate_snapshot
+
+    # rows stored per-city statistics, an hourly snapshot of NUM_CITIES cities, then one new snapshot to check
+    locations = _setup_locations(workdir)
+    path = os.path.join(workdir, f"daily-aggregates-{rows}.csv")
+    if not os.path.exists(path):
+        history = clean_daily_frame(make_raw_daily(rows, locations))
+        history['Scraped Date'] = pd.Timestamp("2026-01-01") + pd.to_timedelta(
+            np.arange(len(history)) // len(locations), unit="h"
+        )
+        update_aggregates(snapshot_stats(history, DAILY_AGGREGATE_COLUMNS), path)
+    daily = clean_daily_frame(make_raw_daily(len(locations), locations, seed=1), schema=None, fill=False)
+    weekly = clean_weekly_frame(make_raw_weekly(7 * len(locations), locations, seed=1), schema=None, fill=False)
+    return lambda: validate_snapshot(daily, weekly, load_baseline(path, ZSCORE_COLUMNS['daily']))
+
+def setup_parsers(workdir, rows):
+    from benchmarks.synthetic import FIXTURES_DIR
+    from scraper import parse_daily_info, parse_weekly_weather
+
+    # one weekly page holds a week of rows, one daily page one row
+    with open(os.path.join(FIXTURES_DIR, "weekly_yerevan.html")) as f:
+        weekly_page = f.read()
+    with open(os.path.join(FIXTURES_DIR, "daily_yerevan.html")) as f:
+        daily_page = f.read()
+
+    def parse_pages():
+        for _ in range(max(rows // 7, 1)):
+            parse_weekly_weather(weekly_page)
+        for _ in range(rows):
+            parse_daily_info(daily_page, "Yerevan (Yerevan)")
+    return parse_pages
+
+def setup_scrape(workdir, rows):
+    from checkpoint import ScrapeCheckpoint
+    from scraper import _scrape_with_http
+
+    num_pages = max(rows // 7, 1)
+
+    def scrape_pages():
+        with serve_pages() as base_url:
+            weekly_items = [(f"City {i} (Region)", f"{base_url}/weekly/{i}.html") for i in range(num_pages)]
+            daily_items = [(f"City {i} (Region)", f"{base_url}/daily/{i}.html") for i in range(num_pages)]
+            _scrape_with_http(weekly_items, daily_items, 8, ScrapeCheckpoint(None), [])
+    return scrape_pages
+
+# seconds a command may take to start, plan and exit; plotting needs matplotlib and plotly
+STARTUP_BUDGET = {"scrape": 1.0, "process": 1.0, "plot": 2.5}
+# startup does not depend on the data size, it runs at this size only
+STARTUP_ROWS = 1_000
+# command -> libraries its stages never need
+STARTUP_UNUSED = {
+    "scrape": ("matplotlib", "seaborn", "plotly", "selenium"),
+    "process": ("matplotlib", "seaborn", "plotly", "selenium", "aiohttp", "lxml"),
+    "plot": ("selenium", "aiohttp", "lxml"),
+}
+
+def startup_imports(command):
+    """
+    Top-level modules loaded by parsing the command and building its stage graph.
+    """
+    script = (
+        "import sys, json, main; "
+        f"main.build_stage_graph(main.parse_args([{command!r}]), {{}}); "
+        "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def setup_startup(workdir, rows, command):
+    return partial(
+        subprocess.run, [sys.executable, "main.py", command, "--dry-run"], cwd=REPO_DIR, check=True, capture_output=True
+    )
+
+def check_startup(results):
+    """
+    Lists the startup problems: commands over their STARTUP_BUDGET and commands
+    importing libraries they do not use.
+    """
+    problems = []
+    for command, unused in STARTUP_UNUSED.items():
+        result = results.get(f"startup_{command}@{STARTUP_ROWS}")
+        if result is None:
+            continue
+        if result["seconds"] > STARTUP_BUDGET[command]:
+            problems.append(f"{command} starts in {result['seconds']}s, budget {STARTUP_BUDGET[command]}s")
+        loaded = sorted(set(startup_imports(command)) & set(unused))
+        if loaded:
+            problems.append(f"{command} imports {', '.join(loaded)} at startup")
+    return problems
+
+# name -> (setup(workdir, rows) returning the callable to time, largest row count it runs at)
+BENCHMARKS = {
+    "clean_daily": (partial(setup_clean, kind="daily"), None),
+    "clean_daily_chunked": (partial(setup_clean, kind="daily", chunksize=100_000), None),
+    "clean_weekly": (partial(setup_clean, kind="weekly"), None),
+    "clean_weekly_chunked": (partial(setup_clean, kind="weekly", chunksize=100_000), None),
+    # accumulated snapshots, each row dated from its own scrape; run with --sizes 1e6,1e7
+    "clean_weekly_history": (partial(setup_clean, kind="weekly_history", chunksize=1_000_000), None),
+    "plot_daily": (setup_daily_plots, 10_000),
+    "plot_weekly": (setup_weekly_plots, 1_000),
+    "interpolate_field": (setup_interpolation, None),
+    # one snapshot checked against rows stored statistics
+    "validate_snapshot": (setup_validation, None),
+    "parse_pages": (setup_parsers, 10_000),
+    "scrape_http": (setup_scrape, 1_000),
+    "startup_scrape": (partial(setup_startup, command="scrape"), STARTUP_ROWS),
+    "startup_process": (partial(setup_startup, command="process"), STARTUP_ROWS),
+    "startup_plot": (partial(setup_startup, command="plot"), STARTUP_ROWS),
+}
+
+def measure(func, repeat=3):
+    """
+    Best wall time over repeat runs, then the peak traced heap of one more run.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(seconds), 4), "peak_mb": round(peak / 2**20, 2)}
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, repeat=3, workdir=None):
+    """
+    Runs the selected benchmarks at every size they support and returns
+    {"<name>@<rows>": {"seconds": ..., "peak_mb": ...}}.
+    """
+    names = names or list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="weather-bench-") as tmpdir:
+        workdir = workdir or tmpdir
+        for name in names:
+            setup, max_rows = BENCHMARKS[name]
+            for rows in sizes:
+                if max_rows is not None and rows > max_rows:
+                    continue
+                results[f"{name}@{rows}"] = result = measure(setup(workdir, rows), repeat)
+                print(f"{name:<22} {rows:>10} rows  {result['seconds']:>9.3f}s  {result['peak_mb']:>9.1f} MB peak")
+    return results
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Lists (benchmark, metric, baseline value, current value) for every result
+    worse than tolerance times its baseline. Benchmarks missing from the baseline are ignored.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS), ("peak_mb", MIN_PEAK_MB)):
+            expected = baseline[key][metric]
+            if result[metric] > max(expected, floor) * tolerance:
+                regressions.append((key, metric, expected, result[metric]))
+    return regressions
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the weather pipeline stages on synthetic data.")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(float(size)) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated row counts, e.g. 1e3,1e5,1e7 (default: 1e3,1e4,1e5)"
+    )
+    parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        default=None,
+        help=f"comma-separated benchmarks to run (default: all of {', '.join(BENCHMARKS)})"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best counts (default: 3)")
+    parser.add_argument("--workdir", default=None, help="keep the generated data here between runs")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare with or save to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"allowed slowdown or memory growth factor (default: {DEFAULT_TOLERANCE})"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    unknown = set(args.only or []) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+    results = run_benchmarks(args.sizes, args.only, args.repeat, args.workdir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return
+
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+    for key, metric, expected, actual in regressions:
+        print(f"REGRESSION {key} {metric}: {actual} vs baseline {expected}")
+    startup_problems = check_startup(results)
+    for problem in startup_problems:
+        print(f"STARTUP {problem}")
+    if regressions or startup_problems:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import os
+import threading
+import http.server
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures")
+
+# rows are generated and written in blocks of this size, so 10^7-row files need bounded memory
+BLOCK_ROWS = 1_000_000
+
+def make_locations(num_cities, seed=0):
+    """
+    A synthetic location registry with num_cities cities spread over Armenia.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Region': [f"Region {i % 10}" for i in range(num_cities)],
+        'City': [f"City {i}" for i in range(num_cities)],
+        'Latitude': rng.uniform(38.9, 41.3, num_cities).round(4),
+        'Longitude': rng.uniform(43.4, 46.6, num_cities).round(4),
+    })
+
+def _missing(rng, values, rate=0.02):
+    # a few scraped cells are always missing
+    return np.where(rng.random(len(values)) < rate, None, values)
+
+def _text(values, suffix):
+    return pd.Series(values).astype(str) + suffix
+
+def make_raw_daily(num_rows, locations, seed=0):
+    """
+    Raw daily rows in the scraper's format, one row per city per snapshot.
+    """
+    rng = np.random.default_rng(seed)
+    city = np.arange(num_rows) % len(locations)
+    temperature = rng.integers(-20, 40, num_rows)
+    day_minutes = rng.integers(540, 900, num_rows)
+    moon_minutes = rng.integers(0, 900, num_rows)
+
+    def clock(minutes):
+        return pd.Series(minutes // 60).astype(str).str.zfill(2) + ":" + pd.Series(minutes % 60).astype(str).str.zfill(2)
+
+    return pd.DataFrame({
+        'Region': locations['Region'].to_numpy()[city],
+        'City': locations['City'].to_numpy()[city],
+        'Weather': _missing(rng, np.where(temperature > 0, "+", "") + _text(temperature, "°C")),
+        'Humidity': _missing(rng, _text(rng.integers(10, 100, num_rows), "%")),
+        'Wind': _missing(rng, _text(rng.integers(0, 60, num_rows), " km/h")),
+        'Pressure': _missing(rng, _text(rng.integers(990, 1040, num_rows), " mb")),
+        'UV Index': rng.integers(0, 11, num_rows),
+        'Cloud Cover': _text(rng.integers(0, 100, num_rows), "%"),
+        'Ceiling': _missing(rng, _text(rng.integers(100, 9000, num_rows), " m")),
+        'Dew Point': _missing(rng, _text(rng.integers(-25, 20, num_rows), "°C")),
+        'Visibility': _missing(rng, _text(rng.integers(1, 30, num_rows), " km")),
+        'Sunrise': "Sunrise " + clock(rng.integers(300, 480, num_rows)),
+        'Sunset': "Sunset " + clock(rng.integers(1000, 1260, num_rows)),
+        'Day Duration': "Day duration " + clock(day_minutes),
+        'Moonrise': "Moonrise " + clock(rng.integers(0, 1440, num_rows)),
+        'Moonset': "Moonset " + clock(rng.integers(0, 1440, num_rows)),
+        'Moon Duration': "Moon duration " + clock(moon_minutes),
+    })
+
+def make_raw_weekly(num_rows, locations, seed=0):
+    """
+    Raw 7-day forecast rows in the scraper's format, seven consecutive days per city.
+    """
+    rng = np.random.default_rng(seed)
+    position = np.arange(num_rows)
+    city = (position // 7) % len(locations)
+    dates = pd.Timestamp("2025-03-03") + pd.to_timedelta(position % 7, unit="D")
+    high = rng.integers(-10, 35, num_rows)
+    low = high - rng.integers(2, 15, num_rows)
+
+    return pd.DataFrame({
+        'Region': locations['Region'].to_numpy()[city],
+        'City': locations['City'].to_numpy()[city],
+        'Date': dates.strftime('%a %d.%m'),
+        'Precipitation': _missing(rng, rng.exponential(1.0, num_rows).round(1)),
+        'Snow': _missing(rng, np.where(low < 0, rng.exponential(1.0, num_rows), 0.0).round(1)),
+        'Forecast': rng.choice(["Sunny", "Cloudy", "Light rain", "Snow"], num_rows),
+        'Hi/Lo': _text(high, "°/") + _text(low, "°"),
+    })
+
+def make_raw_weekly_history(num_rows, locations, seed=0):
+    """
+    Accumulated 7-day forecast snapshots, one scrape a day from 2024-12-20 on,
+    so the forecasts cross New Year. Rows carry their own 'Scraped Date'.
+    seed is the position of the first row, so consecutive blocks continue the same history.
+    """
+    rng = np.random.default_rng(seed)
+    position = seed + np.arange(num_rows)
+    city = (position // 7) % len(locations)
+    snapshot = position // (7 * len(locations))
+    scraped_at = pd.Timestamp("2024-12-20 06:00") + pd.to_timedelta(snapshot, unit="D")
+    dates = scraped_at.normalize() + pd.to_timedelta(position % 7, unit="D")
+    high = rng.integers(-10, 35, num_rows)
+    low = high - rng.integers(2, 15, num_rows)
+
+    return pd.DataFrame({
+        'Region': locations['Region'].to_numpy()[city],
+        'City': locations['City'].to_numpy()[city],
+        'Date': dates.strftime('%a %d.%m'),
+        'Precipitation': _missing(rng, rng.exponential(1.0, num_rows).round(1)),
+        'Snow': _missing(rng, np.where(low < 0, rng.exponential(1.0, num_rows), 0.0).round(1)),
+        'Forecast': rng.choice(["Sunny", "Cloudy", "Light rain", "Snow"], num_rows),
+        'Hi/Lo': _text(high, "°/") + _text(low, "°"),
+        'Scraped Date': scraped_at.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+def write_raw_csv(make_frame, path, num_rows, locations, seed=0):
+    """
+    Writes num_rows rows from make_frame to a CSV file block by block.
+    """
+    written = 0
+    while written < num_rows:
+        block = min(BLOCK_ROWS, num_rows - written)
+        frame = make_frame(block, locations, seed + written)
+        frame.to_csv(path, mode='a' if written else 'w', header=not written, index=False)
+        written += block
+    return path
+
+@contextmanager
+def serve_pages():
+    """
+    Serves the saved forecast pages on a local HTTP server: every
+    /weekly/<n>.html and /daily/<n>.html answers with the matching fixture page.
+    Yields the server's base URL.
+    """
+    pages = {}
+    for kind in ("weekly", "daily"):
+        with open(os.path.join(FIXTURES_DIR, f"{kind}_yerevan.html"), "rb") as f:
+            pages[kind] = f.read()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path.strip("/").split("/")[0])
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import threading
+
+DEFAULT_CHECKPOINT_PATH = "outputs/raw/.scrape-checkpoint.jsonl"
+DEFAULT_MAX_AGE = 3600  # seconds after which a checkpointed forecast is too old to resume from
+
+
+class ScrapeCheckpoint:
+    """
+    Results of the pages a scrape already finished, so a run that crashed or
+    lost some locations resumes where it stopped instead of re-scraping everything.
+
+    Every result is appended to a JSON-lines file as soon as it is saved;
+    a half-written last line from a crash is ignored on load. A checkpoint
+    older than max_age seconds is discarded. With path None the results are
+    only kept in memory.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.results = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        if path is not None and os.path.exists(path):
+            self._load(max_age)
+
+    def _load(self, max_age):
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        if not entries or time.time() - entries[0].get("started_at", 0) > max_age:
+            self.clear()
+            return
+        self.started_at = entries[0]["started_at"]
+        for entry in entries[1:]:
+            self.results[(entry["kind"], entry["url"])] = entry["result"]
+
+    def __len__(self):
+        return len(self.results)
+
+    def has(self, kind, url):
+        return (kind, url) in self.results
+
+    def get(self, kind, url):
+        return self.results.get((kind, url))
+
+    def save(self, kind, url, result):
+        # called from the scraper threads, one line per finished page
+        with self._lock:
+            self.results[(kind, url)] = result
+            if self.path is None:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            new_file = not os.path.exists(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if new_file:
+                    f.write(json.dumps({"started_at": self.started_at}) + "\n")
+                f.write(json.dumps({"kind": kind, "url": url, "result": result}) + "\n")
+
+    def clear(self):
+        """
+        Forgets the checkpoint once the scrape it belongs to is complete.
+        """
+        with self._lock:
+            self.results = {}
+            self.started_at = time.time()
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,32 @@
+import pandas as pd
+
+import instrumentation
+
+def column_stats(df, columns):
+    """
+    Sums and non-null counts of the given columns, the running statistics
+    behind the mean-based missing value fill when a file is cleaned in chunks.
+    """
+    columns = [col for col in columns if col in df.columns]
+    return pd.DataFrame({'sum': df[columns].sum(), 'count': df[columns].count()})
+
+def merge_stats(total, stats):
+    if total is None:
+        return stats
+    return total.add(stats, fill_value=0)
+
+def stats_means(stats):
+    # columns without any value get NaN, the same as Series.mean()
+    return stats['sum'] / stats['count']
+
+def write_chunks(chunks, write_path):
+    """
+    Writes an iterable of frames to one CSV file, appending chunk by chunk,
+    and returns the number of rows written.
+    """
+    rows = 0
+    for chunk_index, chunk in enumerate(chunks):
+        chunk.to_csv(write_path, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0, index=False)
+        rows += len(chunk)
+    instrumentation.count(rows_out=rows, bytes_written=instrumentation.path_size(write_path))
+    return rows
@@ -0,0 +1,99 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import instrumentation
+
+def _run_stage(name, func, profiler=None, reset_rss=False):
+    # runs in a worker process; errors come back as text so they always pickle
+    start = time.perf_counter()
+    metrics = {"stage": name}
+    try:
+        with instrumentation.stage(name, profiler, reset_rss=reset_rss) as metrics:
+            func()
+        return "ok", time.perf_counter() - start, None, metrics
+    except Exception:
+        return "failed", time.perf_counter() - start, traceback.format_exc(), metrics
+
+def plan_levels(graph):
+    """
+    Groups the stages of graph ({name: (callable, [dependencies])}) into levels,
+    where every stage only depends on stages of earlier levels.
+    """
+    for name, (_, deps) in graph.items():
+        missing = [dep for dep in deps if dep not in graph]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(missing)}")
+
+    levels = []
+    placed = set()
+    while len(placed) < len(graph):
+        level = [
+            name for name, (_, deps) in graph.items()
+            if name not in placed and all(dep in placed for dep in deps)
+        ]
+        if not level:
+            raise ValueError("Stage dependencies contain a cycle")
+        levels.append(level)
+        placed.update(level)
+    return levels
+
+def format_plan(graph):
+    lines = []
+    for step, level in enumerate(plan_levels(graph), start=1):
+        stages = ", ".join(
+            f"{name} (after {', '.join(graph[name][1])})" if graph[name][1] else name
+            for name in level
+        )
+        lines.append(f"{step}. {stages}")
+    return "\n".join(lines)
+
+def run_dag(graph, max_workers=None, dry_run=False, profile=(), profiler="cprofile", reset_rss=False):
+    """
+    Runs the stages of graph on a process pool, each one as soon as all of its
+    dependencies succeeded, so independent branches run in parallel.
+
+    A failed stage only skips the stages that depend on it. Returns
+    {name: {"status": "ok" | "failed" | "skipped", "seconds": float, "error": str,
+    "metrics": dict}} with the instrumentation metrics of every stage that ran.
+    Stages named in profile are run under profiler; reset_rss is passed on to
+    instrumentation.stage for per-stage peak RSS.
+    With dry_run the plan is printed and nothing runs.
+    """
+    plan = format_plan(graph)
+    if dry_run:
+        print(plan)
+        return {}
+
+    results = {}
+    pending = dict(graph)
+    running = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, (func, deps) in list(pending.items()):
+                if any(results.get(dep, {}).get("status") in ("failed", "skipped") for dep in deps):
+                    results[name] = {"status": "skipped", "seconds": 0.0, "error": None, "metrics": {"stage": name}}
+                    print(f"[{name}] skipped, a dependency did not succeed")
+                    del pending[name]
+                elif all(results.get(dep, {}).get("status") == "ok" for dep in deps):
+                    stage_profiler = profiler if name in profile else None
+                    running[executor.submit(_run_stage, name, func, stage_profiler, reset_rss)] = name
+                    del pending[name]
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status, seconds, error, metrics = future.result()
+                except Exception as exc:
+                    # the worker process itself died
+                    status, seconds, error, metrics = "failed", 0.0, repr(exc), {"stage": name}
+                results[name] = {"status": status, "seconds": seconds, "error": error, "metrics": metrics}
+                print(f"[{name}] {status} in {seconds:.2f}s")
+                if error:
+                    print(error)
+
+    return results
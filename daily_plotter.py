@@ -1,12 +1,27 @@
 import os
-import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import plotly.express as px
 import seaborn as sns
 
-def generate_plots(read_path, output_dir):
-    df_clean = pd.read_csv(read_path)
-    
+from interpolation import interpolate_field, latitude_scale
+from html_output import shared_html_options, write_html
+from render_cache import MANIFEST_PATH
+from render_pool import render_figures
+from storage import read_table, table_path
+
+# the only columns the daily plots read
+PLOT_COLUMNS = [
+    'Region', 'City', 'Temperature', 'Humidity', 'Wind Speed (km/h)',
+    'Pressure (mb)', 'Visibility (km)', 'Latitude', 'Longitude'
+]
+
+def generate_plots(read_path, output_dir, max_workers=None, manifest_path=None, html_options=None):
+    df_clean = read_table(read_path, columns=PLOT_COLUMNS)
+    return plot_daily_weather(df_clean, output_dir, max_workers, manifest_path, html_options)
+
+def plot_temperature_by_region(df_clean, output_path):
     # Plot 1: Temperature by City Across Regions
     sns.set(style="whitegrid")
     plt.figure(figsize=(14, 8))
@@ -20,15 +35,9 @@ def generate_plots(read_path, output_dir):
         legend=False
     )
     
-    for index, row in df_clean.iterrows():
-        plt.text(
-            x=index, 
-            y=row['Temperature'] + 0.1, 
-            s=f"{row['Temperature']}℃", 
-            color='black', 
-            ha="center", 
-            fontsize=12
-        )
+    # labelling every bar with its height in one call per bar container
+    for container in bar_plot.containers:
+        bar_plot.bar_label(container, fmt='{:.1f}℃', color='black', fontsize=12, padding=2)
     
     plt.title('Temperature by City Across Regions', fontsize=18)
     plt.xlabel('Region', fontsize=14)
@@ -37,10 +46,10 @@ def generate_plots(read_path, output_dir):
     plt.yticks(fontsize=12)
     plt.tight_layout()
 
-    temp_by_region_path = os.path.join(output_dir, 'temperature_by_region.png')
-    plt.savefig(temp_by_region_path)
+    plt.savefig(output_path)
     plt.close()
-    
+
+def plot_grouped_bar_chart(df_clean, output_path):
     # Plot 2: Grouped Bar Chart for Temperature, Humidity, and Wind Speed
     sns.set(style="whitegrid")
     df_melted = df_clean.melt(
@@ -67,12 +76,11 @@ def generate_plots(read_path, output_dir):
     plt.yticks(fontsize=12)
     plt.tight_layout()
     
-    grouped_bar_path = os.path.join(output_dir, 'grouped_bar_chart.png')
-    plt.savefig(grouped_bar_path)
+    plt.savefig(output_path)
     plt.close()
 
+def plot_interactive_map(df_clean, output_path, html_mode=None, bundle_dir=None):
     # Plot 3: Interactive Temperature Map
-
     fixed_marker_size = 10
     color_scale = px.colors.cyclical.IceFire  # alternatives: 'RdYlBu', 'Spectral', ...
     
@@ -82,10 +90,10 @@ def generate_plots(read_path, output_dir):
     color_range = [-abs_max, abs_max]
     
     fig = px.scatter_mapbox(
-        df_clean,
+        df_clean.assign(Marker_Size=fixed_marker_size),
         lat='Latitude',
         lon='Longitude',
-        size=[fixed_marker_size] * len(df_clean),  # fixed size for all markers
+        size='Marker_Size',  # fixed size for all markers
         color='Temperature',
         hover_name='City',
         custom_data=['Temperature', 'Humidity', 'Wind Speed (km/h)', 'Pressure (mb)', 'Visibility (km)'],
@@ -126,11 +134,74 @@ def generate_plots(read_path, output_dir):
         )
     )
     
-    interactive_map_path = os.path.join(output_dir, 'interactive_map.html')
-    fig.write_html(interactive_map_path)
+    write_html(fig, output_path, html_mode, bundle_dir)
+
+def plot_temperature_field(df, output_path, html_mode=None, bundle_dir=None):
+    # Plot 4: Temperature Interpolated Between the Cities (Heatmap with the Cities on Top)
+    lats, lons, _, grids = interpolate_field(df, 'Temperature')
+    fig_field = px.imshow(
+        grids[0],
+        x=lons,
+        y=lats,
+        origin='lower',
+        color_continuous_scale='RdYlBu_r',
+        labels={'x': 'Longitude', 'y': 'Latitude', 'color': 'Temperature (℃)'},
+        title='Temperature Across Armenia, Interpolated Between the Cities'
+    )
+    fig_field.add_scatter(
+        x=df['Longitude'], y=df['Latitude'], text=df['City'], mode='markers+text', textposition='top center',
+        marker={'color': 'black', 'size': 6}, hoverinfo='text', showlegend=False
+    )
+    # a degree of longitude is shorter than one of latitude this far north, square cells would stretch the country
+    fig_field.update_yaxes(scaleanchor='x', scaleratio=latitude_scale(lats))
+    write_html(fig_field, output_path, html_mode, bundle_dir)
+
+def daily_figure_tasks(df_clean, output_dir, html_options=None):
+    """
+    One render task per daily figure: (render_func, input slice, output path, params).
+    Each figure only gets the columns it draws, so its cache key only changes with them;
+    html_options (html_mode, bundle_dir) go to the interactive charts.
+    """
+    html_options = html_options or {}
+    df_clean = df_clean[PLOT_COLUMNS].reset_index(drop=True)
+    return [
+        (
+            plot_temperature_by_region,
+            df_clean[['Region', 'Temperature']],
+            os.path.join(output_dir, 'temperature_by_region.png'),
+            {}
+        ),
+        (
+            plot_grouped_bar_chart,
+            df_clean[['City', 'Temperature', 'Humidity', 'Wind Speed (km/h)']],
+            os.path.join(output_dir, 'grouped_bar_chart.png'),
+            {}
+        ),
+        (
+            plot_interactive_map,
+            df_clean,
+            os.path.join(output_dir, 'interactive_map.html'),
+            html_options
+        ),
+        (
+            plot_temperature_field,
+            df_clean[['City', 'Latitude', 'Longitude', 'Temperature']],
+            os.path.join(output_dir, 'temperature_field.html'),
+            html_options
+        ),
+    ]
+
+def plot_daily_weather(df_clean, output_dir, max_workers=None, manifest_path=None, html_options=None):
+    """
+    Renders every daily figure into output_dir on a process pool and returns
+    the per-figure timings. With a manifest_path unchanged figures are skipped.
+    """
+    return render_figures(daily_figure_tasks(df_clean, output_dir, html_options), max_workers, manifest_path)
 
-def run_daily_plotter():
-    read_path = "outputs/processed/daily-weather-data-clean.csv"
+def run_daily_plotter(storage_format=None, max_workers=None, use_render_cache=True, html_mode=None):
+    read_path = table_path("outputs/processed", "daily-weather-data-clean", storage_format)
     output_dir = "outputs/visualizations/daily"
     os.makedirs(output_dir, exist_ok=True)
-    generate_plots(read_path, output_dir)
\ No newline at end of file
+    manifest_path = MANIFEST_PATH if use_render_cache else None
+    html_options = shared_html_options(html_mode)
+    generate_plots(read_path, output_dir, max_workers, manifest_path, html_options)
\ No newline at end of file
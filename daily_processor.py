@@ -1,106 +1,93 @@
 import re
 import os
 import pandas as pd
-import numpy as np
 from datetime import datetime
 
-def clean_daily_weather_data(read_path, write_path):
+from aggregates import (
+    DAILY_AGGREGATE_COLUMNS, DAILY_AGGREGATES_NAME, SNAPSHOT_KEYS, aggregates_path, rollup, snapshot_stats,
+    update_aggregates
+)
+from chunking import column_stats, merge_stats, stats_means, write_chunks
+from page_cache import is_up_to_date, mark_up_to_date
+from history_store import daily_history
+from locations import add_coordinates
+from schema import DAILY_SCHEMA, apply_schema
+from storage import format_of, is_empty_table, iter_table, read_table, table_path, write_table
+
+# a cell counts as numeric when it contains a number somewhere
+NUMBER_PATTERN = re.compile(r'[-+]?\d*\.?\d+')
+# everything except digits, dots and minus signs is stripped before conversion
+NON_NUMERIC_PATTERN = re.compile(r'[^\d\.-]')
+
+# raw column -> cleaned numeric column
+UNIT_COLUMNS = {
+    'Weather': 'Temperature',
+    'Humidity': 'Humidity',
+    'Wind': 'Wind Speed (km/h)',
+    'Pressure': 'Pressure (mb)',
+    'Ceiling': 'Ceiling (m)',
+    'Dew Point': 'Dew Point',
+    'Visibility': 'Visibility (km)',
+}
+
+TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{2})')
+# raw time of day -> cleaned minutes after midnight
+TIME_COLUMNS = {
+    'Sunrise': 'Sunrise (min)',
+    'Sunset': 'Sunset (min)',
+    'Moonrise': 'Moonrise (min)',
+    'Moonset': 'Moonset (min)',
+}
+
+DURATION_PATTERN = re.compile(r'(\d+):(\d+)')
+DURATION_COLUMNS = {
+    'Day Duration': 'Day Duration (min)',
+    'Moon Duration': 'Moon Duration (min)',
+}
+
+def parse_numeric(series):
     """
-    Cleans the raw daily weather data and saves the cleaned data to a new CSV file.
+    Vectorized float parsing of unit-suffixed text.
+    Cells without a number, or whose stripped text is not a valid float, become NaN.
     """
+    text = series.astype(str)
+    has_number = text.str.contains(NUMBER_PATTERN).fillna(False).astype(bool)
+    values = pd.to_numeric(text.str.replace(NON_NUMERIC_PATTERN, '', regex=True), errors='coerce')
+    return values.where(has_number).astype(float)
 
-    # cities and their coordinates
-    CITY_COORDINATES = {
-        'Yerevan': {'Latitude': 40.1872, 'Longitude': 44.5152},
-        'Ashtarak': {'Latitude': 40.2929, 'Longitude': 44.3505},
-        'Artashat': {'Latitude': 39.9535, 'Longitude': 44.5520},
-        'Armavir': {'Latitude': 40.1554, 'Longitude': 44.0387},
-        'Gavar': {'Latitude': 40.3513, 'Longitude': 45.1273},
-        'Hrazdan': {'Latitude': 40.5353, 'Longitude': 44.7693},
-        'Vanadzor': {'Latitude': 40.8074, 'Longitude': 44.4970},
-        'Gyumri': {'Latitude': 40.7929, 'Longitude': 43.8465},
-        'Kapan': {'Latitude': 39.2077, 'Longitude': 46.4068},
-        'Ijevan': {'Latitude': 40.8791, 'Longitude': 45.1471},
-        'Yeghegnadzor': {'Latitude': 39.7633, 'Longitude': 45.3308}
-    }
-    
-    df = pd.read_csv(read_path)
-    
-    # adding 'Scraped Date' with current timestamp
-    df['Scraped Date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    # extracting and cleaning 'Temperature' from 'Weather' column
-    df['Temperature'] = df['Weather'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Humidity' as float
-    df['Humidity'] = df['Humidity'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Wind Speed (km/h)' from 'Wind' column
-    df['Wind Speed (km/h)'] = df['Wind'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Pressure (mb)' from 'Pressure' column
-    df['Pressure (mb)'] = df['Pressure'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Ceiling (m)' from 'Ceiling' column
-    df['Ceiling (m)'] = df['Ceiling'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Dew Point' from 'Dew Point' column
-    df['Dew Point'] = df['Dew Point'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting and cleaning 'Visibility (km)' from 'Visibility' column
-    df['Visibility (km)'] = df['Visibility'].astype(str).apply(
-        lambda x: float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
-    )
-    
-    # extracting 'Sunrise' time in HH:MM format
-    df['Sunrise'] = pd.to_datetime(
-        df['Sunrise'].astype(str).str.extract(r'(\d{1,2}:\d{2})')[0],
-        format='%H:%M',
-        errors='coerce'
-    ).dt.time
-    
-    # extracting 'Sunset' time in HH:MM format
-    df['Sunset'] = pd.to_datetime(
-        df['Sunset'].astype(str).str.extract(r'(\d{1,2}:\d{2})')[0],
-        format='%H:%M',
-        errors='coerce'
-    ).dt.time
-    
-    # converting 'Day Duration' from 'HH:MM' to total minutes
-    df[['Day_Hours', 'Day_Minutes']] = df['Day Duration'].astype(str).str.extract(r'(\d+):(\d+)')
-    df['Day Duration (min)'] = df['Day_Hours'].astype(float) * 60 + df['Day_Minutes'].astype(float)
-    df.drop(['Day_Hours', 'Day_Minutes'], axis=1, inplace=True)
-    
-    # extracting 'Moonrise' time in HH:MM format
-    df['Moonrise'] = pd.to_datetime(
-        df['Moonrise'].astype(str).str.extract(r'(\d{1,2}:\d{2})')[0],
-        format='%H:%M',
-        errors='coerce'
-    ).dt.time
-    
-    # extracting 'Moonset' time in HH:MM format
-    df['Moonset'] = pd.to_datetime(
-        df['Moonset'].astype(str).str.extract(r'(\d{1,2}:\d{2})')[0],
-        format='%H:%M',
-        errors='coerce'
-    ).dt.time
-    
-    # converting 'Moon Duration' from 'HH:MM' to total minutes
-    df[['Moon_Hours', 'Moon_Minutes']] = df['Moon Duration'].astype(str).str.extract(r'(\d+):(\d+)')
-    df['Moon Duration (min)'] = df['Moon_Hours'].astype(float) * 60 + df['Moon_Minutes'].astype(float)
-    df.drop(['Moon_Hours', 'Moon_Minutes'], axis=1, inplace=True)
+# numeric columns whose missing values are filled with the column mean
+NUMERIC_COLUMNS = [
+    'Temperature', 'Humidity', 'Wind Speed (km/h)', 'Pressure (mb)',
+    'Ceiling (m)', 'Dew Point', 'Visibility (km)',
+    'Day Duration (min)', 'Moon Duration (min)'
+]
+
+def _parse_daily_frame(df, scraped_date):
+    """
+    Parses one frame of raw daily rows, leaving missing values in place.
+    Rows that already carry a 'Scraped Date', such as accumulated snapshots, keep it.
+    """
+    # adding 'Scraped Date' with the timestamp of the run
+    if 'Scraped Date' not in df.columns:
+        df['Scraped Date'] = scraped_date
+    
+    # extracting the numeric part of every unit-suffixed column ('22°C', '5 km/h', ...)
+    for raw_col, clean_col in UNIT_COLUMNS.items():
+        df[clean_col] = parse_numeric(df[raw_col])
+    # the UV index is parsed the same way when the raw table has it
+    if 'UV Index' in df.columns:
+        df['UV Index'] = parse_numeric(df['UV Index'])
+    
+    # converting 'Sunrise', 'Sunset', 'Moonrise' and 'Moonset' from HH:MM to minutes after midnight
+    for raw_col, clean_col in TIME_COLUMNS.items():
+        parts = df[raw_col].astype(str).str.extract(TIME_PATTERN).astype(float)
+        valid = (parts[0] < 24) & (parts[1] < 60)
+        df[clean_col] = (parts[0] * 60 + parts[1]).where(valid)
+    
+    # converting 'Day Duration' and 'Moon Duration' from 'HH:MM' to total minutes
+    for raw_col, clean_col in DURATION_COLUMNS.items():
+        parts = df[raw_col].astype(str).str.extract(DURATION_PATTERN).astype(float)
+        df[clean_col] = parts[0] * 60 + parts[1]
     
     # dropping original columns that are no longer needed
     columns_to_drop = [
@@ -109,41 +96,135 @@ def clean_daily_weather_data(read_path, write_path):
     ]
     df_clean = df.drop(columns=columns_to_drop, errors='ignore')
     
+    # adding Latitude and Longitude based on City from the location registry
+    return add_coordinates(df_clean)
+
+def _daily_stats(df_clean):
+    """
+    Running statistics of a parsed frame: sums and counts of the numeric columns,
+    plus what the negative 'Moon Duration (min)' fix needs.
+    """
+    stats = column_stats(df_clean, NUMERIC_COLUMNS)
+    moon_stats = pd.Series(0.0, index=['nonneg_sum', 'nonneg_count', 'missing', 'negatives'])
+    if 'Moon Duration (min)' in df_clean.columns:
+        moon = df_clean['Moon Duration (min)']
+        moon_stats['nonneg_sum'] = moon[moon >= 0].sum()
+        moon_stats['nonneg_count'] = (moon >= 0).sum()
+        moon_stats['missing'] = moon.isnull().sum()
+        moon_stats['negatives'] = (moon < 0).sum()
+    return stats, moon_stats
+
+def _merge_daily_stats(total, stats):
+    if total is None:
+        return stats
+    return merge_stats(total[0], stats[0]), total[1] + stats[1]
+
+def _daily_fill_values(stats):
+    """
+    Turns the merged statistics into the values the in-memory path would fill with:
+    the column means, and the mean used to replace negative moon durations.
+    """
+    stats, moon_stats = stats
+    means = stats_means(stats)
+    moon_mean = None
+
+    # negative durations are detected after the first fill, so a negative mean counts too
+    if 'Moon Duration (min)' in means.index:
+        first_mean = means['Moon Duration (min)']
+        filled_missing = moon_stats['missing'] > 0 and first_mean < 0
+        if moon_stats['negatives'] > 0 or filled_missing:
+            print("Negative Moon Durations found. Setting them to NaN and filling with mean value.")
+            kept_missing = moon_stats['missing'] if first_mean >= 0 else 0
+            moon_mean = (moon_stats['nonneg_sum'] + kept_missing * first_mean) / (moon_stats['nonneg_count'] + kept_missing)
+    return means, moon_mean
+
+def _fill_daily_missing(df_clean, fill_values):
+    means, moon_mean = fill_values
+
     # handling missing values by filling with column mean for numeric columns
-    numeric_cols = [
-        'Temperature', 'Humidity', 'Wind Speed (km/h)', 'Pressure (mb)',
-        'Ceiling (m)', 'Dew Point', 'Visibility (km)', 
-        'Day Duration (min)', 'Moon Duration (min)'
-    ]
-    
-    for col in numeric_cols:
+    for col in NUMERIC_COLUMNS:
         if col in df_clean.columns and df_clean[col].isnull().any():
-            mean_value = df_clean[col].mean()
-            df_clean[col].fillna(mean_value, inplace=True)
-    
-    # adding Latitude and Longitude based on City
-    df_clean['Latitude'] = df_clean['City'].map(
-        lambda x: CITY_COORDINATES.get(x, {}).get('Latitude', np.nan)
-    )
-    df_clean['Longitude'] = df_clean['City'].map(
-        lambda x: CITY_COORDINATES.get(x, {}).get('Longitude', np.nan)
-    )
-    
-    # handling negative 'Moon Duration (min)' by setting them to NaN and filling with mean
-    if 'Moon Duration (min)' in df_clean.columns:
+            df_clean[col] = df_clean[col].fillna(means[col])
+
+    # handling negative 'Moon Duration (min)' by replacing them with the mean of the rest
+    if moon_mean is not None:
         negative_durations = df_clean['Moon Duration (min)'] < 0
-        if negative_durations.any():
-            print("Negative Moon Durations found. Setting them to NaN and filling with mean value.")
-            df_clean.loc[negative_durations, 'Moon Duration (min)'] = np.nan
-            mean_moon_duration = df_clean['Moon Duration (min)'].mean()
-            df_clean['Moon Duration (min)'].fillna(mean_moon_duration, inplace=True)
+        df_clean.loc[negative_durations, 'Moon Duration (min)'] = moon_mean
+    return df_clean
+
+def iter_clean_daily_chunks(read_path, chunksize, scraped_date=None):
+    """
+    Yields cleaned chunks of the raw daily data with bounded memory.
+    The file is read twice: once for the fill statistics and once to clean it.
+    """
+    if scraped_date is None:
+        scraped_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # first pass: running statistics for the mean-based fill
+    stats = None
+    for chunk in pd.read_csv(read_path, chunksize=chunksize):
+        stats = _merge_daily_stats(stats, _daily_stats(_parse_daily_frame(chunk, scraped_date)))
+    if stats is None:
+        return
+    fill_values = _daily_fill_values(stats)
+
+    # second pass: cleaning and filling chunk by chunk
+    for chunk in pd.read_csv(read_path, chunksize=chunksize):
+        yield apply_schema(_fill_daily_missing(_parse_daily_frame(chunk, scraped_date), fill_values), DAILY_SCHEMA)
+
+def clean_daily_frame(df, scraped_date=None, schema=DAILY_SCHEMA, fill=True):
+    """
+    Cleans a raw daily frame in memory and returns the cleaned frame,
+    cast to schema unless it is None. Without fill missing values stay NaN.
+    """
+    if scraped_date is None:
+        scraped_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df_clean = _parse_daily_frame(df.copy(), scraped_date)
+    if fill:
+        df_clean = _fill_daily_missing(df_clean, _daily_fill_values(_daily_stats(df_clean)))
+    return df_clean if schema is None else apply_schema(df_clean, schema)
+
+def clean_daily_weather_data(read_path, write_path, chunksize=None):
+    """
+    Cleans the raw daily weather data and saves the cleaned data to a new file
+    (CSV, Parquet or Feather, by extension).
+    With a chunksize the CSV file is streamed in chunks instead of loaded at once.
+    """
+    if chunksize is not None:
+        if format_of(read_path) != "csv" or format_of(write_path) != "csv":
+            raise ValueError("Chunked cleaning reads and writes CSV files only")
+        write_chunks(iter_clean_daily_chunks(read_path, chunksize), write_path)
+        return
+
+    df_clean = clean_daily_frame(read_table(read_path))
     
-    # saving the cleaned data to a new CSV file
-    df_clean.to_csv(write_path, index=False)
+    # saving the cleaned data to a new file
+    write_table(df_clean, write_path)
 
-def run_daily_processor():
-    raw_csv_path = "outputs/raw/daily-weather-data.csv"
+def run_daily_processor(force=False, chunksize=None, storage_format=None):
+    raw_csv_path = table_path("outputs/raw", "daily-weather-data", storage_format)
     output_dir = "outputs/processed"
     os.makedirs(output_dir, exist_ok=True)
-    cleaned_csv_path = os.path.join(output_dir, "daily-weather-data-clean.csv")
-    clean_daily_weather_data(raw_csv_path, cleaned_csv_path)
\ No newline at end of file
+    cleaned_csv_path = table_path(output_dir, "daily-weather-data-clean", storage_format)
+    if is_empty_table(raw_csv_path):
+        raise RuntimeError(f"{raw_csv_path} has no rows, no daily page was scraped")
+    if not force and is_up_to_date(raw_csv_path, cleaned_csv_path):
+        print(f"{raw_csv_path} is unchanged, skipping cleaning")
+        return
+    clean_daily_weather_data(raw_csv_path, cleaned_csv_path, chunksize=chunksize)
+    mark_up_to_date(raw_csv_path, cleaned_csv_path)
+
+    # keeping every cleaned snapshot in the history store, and its per-city statistics in the aggregates
+    history = daily_history()
+    added = 0
+    stats = []
+    # the table written just above, not counted as input a second time
+    for chunk in iter_table(cleaned_csv_path, chunksize, count=False):
+        added += history.append(chunk)
+        stats.append(snapshot_stats(chunk, DAILY_AGGREGATE_COLUMNS))
+    print(f"Added {added} daily rows to {history.root}")
+    keys = [key for key in SNAPSHOT_KEYS if key in stats[0].columns]
+    update_aggregates(
+        rollup(pd.concat(stats, ignore_index=True), keys),
+        aggregates_path(storage_format, name=DAILY_AGGREGATES_NAME)
+    )
\ No newline at end of file
@@ -0,0 +1,193 @@
+import os
+import json
+import uuid
+from urllib.parse import quote
+
+import pandas as pd
+
+import instrumentation
+from storage import atomic_write
+
+HISTORY_DIR = "outputs/history"
+
+class HistoryStore:
+    """
+    Append-only store of cleaned snapshots.
+
+    Every append writes one Parquet file per city, rows already stored under
+    the same key are skipped. index.json keeps each city's files with the time
+    range and the scrape-time range they cover, so a query only opens the files
+    that can match and an append only the files of the same snapshots. The files
+    of a scrape day are compacted into one once the next day's snapshots arrive.
+    """
+
+    def __init__(self, root, time_col, key_cols, snapshot_col=None):
+        self.root = root
+        self.time_col = time_col
+        self.key_cols = list(key_cols)
+        # the column every row of one snapshot shares
+        self.snapshot_col = snapshot_col or time_col
+        self.index_path = os.path.join(root, "index.json")
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def _save_index(self):
+        atomic_write(self.index_path, json.dumps(self.index, indent=2, sort_keys=True))
+
+    def _range_fields(self, scraped):
+        if not scraped or self.snapshot_col == self.time_col:
+            return "start", "end"
+        return "scraped_start", "scraped_end"
+
+    def _partitions(self, city, start=None, end=None, scraped=False):
+        # the per-city index: only files whose time range, or scrape-time range, overlaps [start, end]
+        low, high = self._range_fields(scraped)
+        for partition in self.index.get(city, []):
+            # files indexed without a scrape-time range cannot be pruned by it
+            if low not in partition:
+                yield partition
+                continue
+            if start is not None and pd.Timestamp(partition[high]) < start:
+                continue
+            if end is not None and pd.Timestamp(partition[low]) > end:
+                continue
+            yield partition
+
+    def _read_partitions(self, partitions, columns=None):
+        frames = [
+            pd.read_parquet(os.path.join(self.root, partition["file"]), columns=columns)
+            for partition in partitions
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def _write_partition(self, city, df):
+        # writes the rows of one city to a new file and returns its index entry
+        start, end = df[self.time_col].min(), df[self.time_col].max()
+        city_dir = f"City={quote(str(city), safe='')}"
+        os.makedirs(os.path.join(self.root, city_dir), exist_ok=True)
+        file_name = os.path.join(city_dir, f"{end:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+        df.to_parquet(os.path.join(self.root, file_name), index=False)
+        instrumentation.count(bytes_written=instrumentation.path_size(os.path.join(self.root, file_name)))
+
+        partition = {"file": file_name, "start": start.isoformat(), "end": end.isoformat(), "rows": len(df)}
+        if self.snapshot_col != self.time_col:
+            scraped = pd.to_datetime(df[self.snapshot_col])
+            partition["scraped_start"] = scraped.min().isoformat()
+            partition["scraped_end"] = scraped.max().isoformat()
+        return partition
+
+    def cities(self):
+        return sorted(self.index)
+
+    def append(self, df):
+        """
+        Appends the rows of df whose key is not stored yet and returns how many were added.
+        """
+        df = df.copy()
+        df[self.time_col] = pd.to_datetime(df[self.time_col])
+        df[self.snapshot_col] = pd.to_datetime(df[self.snapshot_col])
+        df = df.drop_duplicates(subset=self.key_cols, keep="last")
+
+        added = 0
+        for city, city_df in df.groupby("City", sort=False):
+            scraped_start, scraped_end = city_df[self.snapshot_col].min(), city_df[self.snapshot_col].max()
+
+            # deduplicating against the stored rows of the same snapshots
+            stored = self._read_partitions(
+                self._partitions(city, scraped_start, scraped_end, scraped=True), columns=self.key_cols
+            )
+            if stored is not None:
+                stored_keys = pd.MultiIndex.from_frame(stored)
+                is_new = ~pd.MultiIndex.from_frame(city_df[self.key_cols]).isin(stored_keys)
+                city_df = city_df[is_new]
+                if city_df.empty:
+                    continue
+
+            self.index.setdefault(city, []).append(self._write_partition(city, city_df))
+            added += len(city_df)
+            self._compact_city(city, before=scraped_start.normalize())
+
+        self._save_index()
+        return added
+
+    def _scrape_day(self, partition):
+        low, _ = self._range_fields(True)
+        return pd.Timestamp(partition.get(low, partition["start"])).normalize()
+
+    def _compact_city(self, city, before=None):
+        # merges the files of every scrape day before `before` (all days without it) into one file per day
+        days = {}
+        for partition in self.index.get(city, []):
+            day = self._scrape_day(partition)
+            if before is None or day < before:
+                days.setdefault(day, []).append(partition)
+
+        removed = 0
+        for partitions in days.values():
+            if len(partitions) < 2:
+                continue
+            merged = self._read_partitions(partitions)
+            merged = merged.sort_values([self.snapshot_col, self.time_col], kind="stable").reset_index(drop=True)
+            compacted = self._write_partition(city, merged)
+            # the index points at the merged file before the old files go away
+            kept = [partition for partition in self.index[city] if partition not in partitions]
+            self.index[city] = kept + [compacted]
+            self._save_index()
+            for partition in partitions:
+                os.remove(os.path.join(self.root, partition["file"]))
+            removed += len(partitions) - 1
+        return removed
+
+    def compact(self, cities=None):
+        """
+        Merges the files of every scrape day of the given cities (all by default)
+        into one file per day and returns how many files were removed.
+        """
+        return sum(self._compact_city(city) for city in (self.cities() if cities is None else cities))
+
+    def query(self, cities=None, start=None, end=None, columns=None):
+        """
+        Returns the stored rows for the given cities (all by default) with
+        start <= time <= end, limited to the given columns and sorted by city and time.
+        """
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        if cities is None:
+            cities = self.cities()
+
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(["City", self.time_col] + list(columns)))
+
+        frames = []
+        for city in cities:
+            city_df = self._read_partitions(self._partitions(city, start, end), columns=read_columns)
+            if city_df is None:
+                continue
+            in_range = pd.Series(True, index=city_df.index)
+            if start is not None:
+                in_range &= city_df[self.time_col] >= start
+            if end is not None:
+                in_range &= city_df[self.time_col] <= end
+            frames.append(city_df[in_range])
+
+        if not frames:
+            return pd.DataFrame(columns=None if columns is None else list(columns))
+        result = pd.concat(frames, ignore_index=True)
+        result = result.sort_values(["City", self.time_col], kind="stable").reset_index(drop=True)
+        return result if columns is None else result[list(columns)]
+
+def daily_history(root=HISTORY_DIR):
+    # one reading per city and scrape
+    return HistoryStore(os.path.join(root, "daily"), time_col="Scraped Date", key_cols=["City", "Scraped Date"])
+
+def weekly_history(root=HISTORY_DIR):
+    # one forecast per city, forecast day and scrape
+    return HistoryStore(
+        os.path.join(root, "weekly"), time_col="Date", key_cols=["City", "Date", "Scraped Date"],
+        snapshot_col="Scraped Date"
+    )
@@ -0,0 +1,109 @@
+import os
+import html
+
+from storage import atomic_write
+
+# how interactive charts load plotly.js: one shared local bundle, the full bundle
+# inlined in every page (several MB each), or the public CDN
+HTML_MODES = ("shared", "inline", "cdn")
+DEFAULT_HTML_MODE = "shared"
+
+VISUALIZATIONS_DIR = "outputs/visualizations"
+
+def get_html_mode(html_mode=None):
+    """
+    Resolves the HTML mode from the argument, the PLOTLY_HTML_MODE environment
+    variable or DEFAULT_HTML_MODE, in that order.
+    """
+    if html_mode is None:
+        html_mode = os.environ.get("PLOTLY_HTML_MODE", DEFAULT_HTML_MODE)
+    if html_mode not in HTML_MODES:
+        raise ValueError(f"Unknown HTML mode: {html_mode}")
+    return html_mode
+
+def ensure_plotly_bundle(bundle_dir):
+    """
+    Writes plotly.js into bundle_dir once per plotly.js version and returns its path.
+    """
+    import plotly.offline
+
+    bundle_path = os.path.join(bundle_dir, f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js")
+    if not os.path.exists(bundle_path):
+        # several processes may render at once, so the bundle appears atomically
+        atomic_write(bundle_path, plotly.offline.get_plotlyjs())
+    return bundle_path
+
+def shared_html_options(html_mode=None, bundle_dir=VISUALIZATIONS_DIR):
+    """
+    Render params for the interactive charts, with the daily and weekly pages
+    sharing one plotly.js bundle in bundle_dir. The bundle is written up front so
+    it exists even when every chart is skipped by the render cache.
+    """
+    html_mode = get_html_mode(html_mode)
+    if html_mode == "shared":
+        ensure_plotly_bundle(bundle_dir)
+    return {'html_mode': html_mode, 'bundle_dir': bundle_dir}
+
+def write_html(fig, output_path, html_mode=None, bundle_dir=None):
+    """
+    Writes a Plotly figure to output_path. In shared mode the page references the
+    plotly.js bundle in bundle_dir (the page's own directory by default).
+    """
+    html_mode = get_html_mode(html_mode)
+    if html_mode == "inline":
+        fig.write_html(output_path, include_plotlyjs=True)
+    elif html_mode == "cdn":
+        fig.write_html(output_path, include_plotlyjs="cdn")
+    else:
+        bundle_path = ensure_plotly_bundle(bundle_dir or os.path.dirname(os.path.abspath(output_path)))
+        src = os.path.relpath(bundle_path, os.path.dirname(os.path.abspath(output_path)))
+        fig.write_html(output_path, include_plotlyjs=src.replace(os.sep, "/"))
+
+def write_dashboard(html_paths, output_path, title="Weather Data Analysis"):
+    """
+    Writes one page that embeds every given chart page, so the whole report
+    loads plotly.js once from the browser cache.
+    """
+    base_dir = os.path.dirname(os.path.abspath(output_path))
+    sections = []
+    for html_path in html_paths:
+        src = os.path.relpath(os.path.abspath(html_path), base_dir).replace(os.sep, "/")
+        name = os.path.splitext(os.path.basename(html_path))[0].replace("_", " ").capitalize()
+        sections.append(
+            f'<section><h2>{html.escape(name)}</h2>'
+            f'<iframe src="{html.escape(src)}" loading="lazy"></iframe></section>'
+        )
+
+    page = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+iframe {{ width: 100%; height: 720px; border: 1px solid #ddd; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+{chr(10).join(sections)}
+</body>
+</html>
+"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(page)
+
+def build_dashboard(visualizations_dir=VISUALIZATIONS_DIR):
+    """
+    Collects the chart pages under visualizations_dir into index.html.
+    """
+    html_paths = sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(visualizations_dir)
+        for name in names
+        if name.endswith(".html") and os.path.abspath(root) != os.path.abspath(visualizations_dir)
+    )
+    output_path = os.path.join(visualizations_dir, "index.html")
+    write_dashboard(html_paths, output_path)
+    print(f"Saved dashboard to {output_path}")
+    return output_path
@@ -0,0 +1,97 @@
+import time
+import asyncio
+import aiohttp
+
+import instrumentation
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+
+# statuses worth retrying, any other status from 400 up fails immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) weather-data-analysis",
+    "Accept": "text/html,application/xhtml+xml",
+}
+
+
+class FetchError(Exception):
+    """
+    Raised when a page could not be fetched after all retries.
+    """
+
+
+async def fetch_page(session, semaphore, url, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, cache=None):
+    """
+    Fetches a single page, retrying connection errors and retryable statuses
+    with exponential backoff.
+    With a PageCache, pages within their TTL are served from disk and stale
+    ones are revalidated with a conditional request.
+    """
+    start = time.perf_counter()
+    if cache is not None and cache.is_fresh(url):
+        instrumentation.record_url(url, time.perf_counter() - start, "cached", attempts=0)
+        return cache.read(url)
+    headers = cache.conditional_headers(url) if cache is not None else {}
+
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and headers:
+                        cache.touch(url)
+                        instrumentation.record_url(url, time.perf_counter() - start, "not_modified", 0, attempt + 1)
+                        return cache.read(url)
+                    if response.status < 400:
+                        text = await response.text()
+                        if cache is not None:
+                            cache.store(
+                                url, text, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                            )
+                        instrumentation.record_url(
+                            url, time.perf_counter() - start, "fetched", len(text.encode("utf-8")), attempt + 1
+                        )
+                        return text
+                    error = FetchError(f"{url} returned HTTP {response.status}")
+                    retryable = response.status in RETRY_STATUSES
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            error = FetchError(f"Failed to fetch {url}: {exc!r}")
+            retryable = True
+
+        if not retryable or attempt == retries:
+            instrumentation.record_url(url, time.perf_counter() - start, "failed", 0, attempt + 1)
+            raise error
+        await asyncio.sleep(backoff * 2 ** attempt)
+
+
+async def fetch_pages_async(urls, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+                            backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, cache=None, return_exceptions=False):
+    """
+    Fetches all urls over one pooled keep-alive session with at most
+    `concurrency` requests in flight, each request given `timeout` seconds.
+    Pages are returned in the order of urls. With return_exceptions a failed
+    page comes back as its exception instead of failing the whole batch.
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=60)
+    semaphore = asyncio.Semaphore(concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=HEADERS) as session:
+        try:
+            return await asyncio.gather(
+                *(fetch_page(session, semaphore, url, retries, backoff, cache) for url in urls),
+                return_exceptions=return_exceptions
+            )
+        finally:
+            if cache is not None:
+                cache.save()
+
+
+def fetch_pages(urls, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+                backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, cache=None, return_exceptions=False):
+    """
+    Synchronous wrapper around fetch_pages_async.
+    """
+    return asyncio.run(fetch_pages_async(urls, concurrency, retries, backoff, timeout, cache, return_exceptions))
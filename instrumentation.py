@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import resource
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILERS = ("cprofile", "pyinstrument")
+PROFILE_DIR = "outputs/profiles"
+REPORT_PATH = "outputs/run-report.json"
+
+# metrics of the stage running in this process, None outside a stage
+_current = None
+
+def path_size(path):
+    """
+    Size in bytes of a file, or of every file under a directory.
+    """
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path)
+            for name in names
+        )
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def _cpu_seconds():
+    # user and system time of this process and of the worker processes it waited for
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def _memory_kib(field):
+    # VmRSS (current) or VmHWM (peak since the last reset) of this process in KiB, None without /proc
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+def _reset_peak_rss():
+    # writing 5 to clear_refs resets VmHWM to the current RSS (Linux only)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _children_maxrss_kib():
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+def _start_rss(reset_rss):
+    # the memory state at the start of a stage, the high-water mark of an enclosing stage is kept on it
+    if not reset_rss:
+        return None
+    if _current is not None and "_peak_kib" in _current:
+        _current["_peak_kib"] = max(_current["_peak_kib"], _memory_kib("VmHWM") or 0)
+    rss = _memory_kib("VmRSS")
+    if rss is not None and _reset_peak_rss():
+        return {"rss": rss, "children": _children_maxrss_kib()}
+    return None
+
+def _stage_rss(start, peak_before=0):
+    """
+    Peak RSS of the stage and how far it rose above the RSS the stage started at,
+    both in MiB. Worker processes count when their high-water mark rose during the stage.
+    peak_before is what the stage reached before a nested stage reset the mark.
+    Without /proc/self/clear_refs only the high-water mark of the whole process is known.
+    """
+    if start is None:
+        # ru_maxrss is in KiB on Linux; it is the high-water mark of the whole process
+        usage = max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        )
+        return round(usage / 1024, 1), None
+    peak = max(peak_before, _memory_kib("VmHWM") or 0)
+    children = _children_maxrss_kib()
+    if children > start["children"]:
+        peak = max(peak, children)
+    return round(peak / 1024, 1), round((peak - start["rss"]) / 1024, 1)
+
+def count(rows_in=0, rows_out=0, bytes_written=0):
+    """
+    Adds to the counters of the current stage; a no-op outside a stage.
+    """
+    if _current is None:
+        return
+    _current["rows_in"] += rows_in
+    _current["rows_out"] += rows_out
+    _current["bytes_written"] += bytes_written
+
+def record_url(url, seconds, status, bytes_read=0, attempts=1):
+    """
+    Records one scraped page of the current stage; a no-op outside a stage.
+    """
+    if _current is None:
+        return
+    _current["urls"].append({
+        "url": url,
+        "status": status,
+        "seconds": round(seconds, 4),
+        "bytes": bytes_read,
+        "attempts": attempts,
+    })
+
+def record_failure(failure):
+    """
+    Records a location the current stage failed to scrape; a no-op outside a stage.
+    """
+    if _current is None:
+        return
+    _current["failures"].append(failure)
+
+def _start_profiler(profiler):
+    if profiler == "cprofile":
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("The pyinstrument profiler needs the pyinstrument package installed")
+        profile = Profiler()
+        profile.start()
+        return profile
+    raise ValueError(f"Unknown profiler: {profiler}")
+
+def _stop_profiler(profiler, profile, name, profile_dir):
+    os.makedirs(profile_dir, exist_ok=True)
+    if profiler == "cprofile":
+        profile.disable()
+        output_path = os.path.join(profile_dir, f"{name}.prof")
+        profile.dump_stats(output_path)
+    else:
+        profile.stop()
+        output_path = os.path.join(profile_dir, f"{name}.html")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(profile.output_html())
+    return output_path
+
+@contextmanager
+def stage(name, profiler=None, profile_dir=PROFILE_DIR, reset_rss=False):
+    """
+    Measures the block as stage name and yields its metrics dict, which is
+    complete once the block exits: wall and CPU seconds, peak RSS, rows read
+    and written, bytes written, the scraped URLs and the locations that failed.
+    With a profiler ('cprofile' or 'pyinstrument') the block is also profiled
+    into profile_dir/<name>.prof or .html.
+
+    The peak RSS is the high-water mark of the whole process unless reset_rss is
+    set. Then, on Linux, the mark is reset through /proc/self/clear_refs when the
+    block starts, so the peak is the block's own and its rise above the RSS at the
+    start is reported too. The reset is process-wide: VmHWM and ru_maxrss read by
+    anything else in the process start over as well.
+    """
+    global _current
+    metrics = {
+        "stage": name,
+        "rows_in": 0,
+        "rows_out": 0,
+        "bytes_written": 0,
+        "urls": [],
+        "failures": [],
+    }
+    rss_start = _start_rss(reset_rss)
+    outer, _current = _current, metrics
+    if rss_start is not None:
+        metrics["_peak_kib"] = rss_start["rss"]
+    profile = _start_profiler(profiler) if profiler else None
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    try:
+        yield metrics
+    finally:
+        metrics["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+        metrics["cpu_seconds"] = round(_cpu_seconds() - cpu_start, 4)
+        # a nested stage resets the high-water mark, what this stage had reached before is kept on its metrics
+        peak_before = metrics.pop("_peak_kib", 0)
+        metrics["peak_rss_mb"], rss_delta = _stage_rss(rss_start, peak_before)
+        if rss_delta is not None:
+            metrics["rss_delta_mb"] = rss_delta
+        if profile is not None:
+            metrics["profile"] = _stop_profiler(profiler, profile, name, profile_dir)
+        _current = outer
+
+def build_report(stages, started_at, status="ok"):
+    """
+    The run report: when the run started, how long it took, its status and the
+    metrics of every stage.
+    """
+    return {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_seconds": round((datetime.now() - started_at).total_seconds(), 4),
+        "status": status,
+        "stages": stages,
+    }
+
+def write_report(report, output_path=REPORT_PATH):
+    # storage counts its reads and writes here, so it is imported late
+    from storage import atomic_write
+
+    atomic_write(output_path, json.dumps(report, indent=2))
+    print(f"Saved run report to {output_path}")
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+# (metric name, help text, stage metrics key)
+STAGE_GAUGES = [
+    ("weather_stage_wall_seconds", "Wall-clock time of the stage.", "wall_seconds"),
+    ("weather_stage_cpu_seconds", "CPU time of the stage, worker processes included.", "cpu_seconds"),
+    ("weather_stage_peak_rss_megabytes", "Peak resident set size during the stage.", "peak_rss_mb"),
+    ("weather_stage_rss_delta_megabytes", "Rise of the resident set size above its value at the stage start.",
+     "rss_delta_mb"),
+    ("weather_stage_rows_in", "Rows the stage read.", "rows_in"),
+    ("weather_stage_rows_out", "Rows the stage wrote.", "rows_out"),
+    ("weather_stage_bytes_written", "Bytes the stage wrote.", "bytes_written"),
+]
+
+def format_prometheus(report):
+    """
+    The report in the Prometheus text exposition format, e.g. for the node
+    exporter's textfile collector.
+    """
+    lines = [
+        "# HELP weather_run_timestamp_seconds Unix time the run finished.",
+        "# TYPE weather_run_timestamp_seconds gauge",
+        f"weather_run_timestamp_seconds {datetime.fromisoformat(report['finished_at']).timestamp():.0f}",
+        "# HELP weather_run_success Whether every stage of the run succeeded.",
+        "# TYPE weather_run_success gauge",
+        f"weather_run_success {int(report['status'] == 'ok')}",
+        "# HELP weather_stage_success Whether the stage succeeded.",
+        "# TYPE weather_stage_success gauge",
+    ]
+    for metrics in report["stages"]:
+        success = int(metrics.get("status", "ok") == "ok")
+        lines.append(f"weather_stage_success{{stage=\"{_label(metrics['stage'])}\"}} {success}")
+    for metric, help_text, key in STAGE_GAUGES:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for metrics in report["stages"]:
+            if key in metrics:
+                lines.append(f"{metric}{{stage=\"{_label(metrics['stage'])}\"}} {metrics[key]}")
+
+    lines += [
+        "# HELP weather_stage_failed_locations Pages the stage failed to scrape.",
+        "# TYPE weather_stage_failed_locations gauge",
+    ]
+    for metrics in report["stages"]:
+        if "failures" in metrics:
+            lines.append(
+                f"weather_stage_failed_locations{{stage=\"{_label(metrics['stage'])}\"}} {len(metrics['failures'])}"
+            )
+
+    lines += [
+        "# HELP weather_url_fetch_seconds Time to fetch one page.",
+        "# TYPE weather_url_fetch_seconds gauge",
+    ]
+    for metrics in report["stages"]:
+        for url in metrics.get("urls", []):
+            lines.append(
+                f"weather_url_fetch_seconds{{stage=\"{_label(metrics['stage'])}\",url=\"{_label(url['url'])}\","
+                f"status=\"{_label(url['status'])}\"}} {url['seconds']}"
+            )
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(report, output_path):
+    from storage import atomic_write
+
+    atomic_write(output_path, format_prometheus(report))
+    print(f"Saved Prometheus metrics to {output_path}")
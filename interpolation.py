@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+import numpy as np
+
+# bounding box of Armenia with a small margin: (min lat, max lat, min lon, max lon)
+ARMENIA_BOUNDS = (38.8, 41.35, 43.4, 46.7)
+DEFAULT_RESOLUTION = 0.05  # degrees between grid points, about 5 km
+DEFAULT_POWER = 2
+EARTH_RADIUS_KM = 6371.0
+
+def grid_axes(bounds=ARMENIA_BOUNDS, resolution=DEFAULT_RESOLUTION):
+    """
+    Latitudes and longitudes of the regular grid over bounds.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounds
+    lats = np.round(np.arange(min_lat, max_lat + resolution / 2, resolution), 6)
+    lons = np.round(np.arange(min_lon, max_lon + resolution / 2, resolution), 6)
+    return lats, lons
+
+def _to_km(lats, lons, ref_lat):
+    # equirectangular projection around ref_lat, well under 1% off across a country this size
+    x = np.radians(lons) * np.cos(np.radians(ref_lat)) * EARTH_RADIUS_KM
+    y = np.radians(lats) * EARTH_RADIUS_KM
+    return np.column_stack([x, y])
+
+def _nearest(station_xy, grid_xy, k):
+    # the k nearest stations of every cell, through scipy's KD-tree when it is installed
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        distances = np.linalg.norm(grid_xy[:, None, :] - station_xy[None, :, :], axis=2)
+        indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(distances, indices, axis=1), indices
+    distances, indices = cKDTree(station_xy).query(grid_xy, k=k)
+    return distances.reshape(len(grid_xy), k), indices.reshape(len(grid_xy), k)
+
+@lru_cache(maxsize=32)
+def idw_weights(stations, bounds=ARMENIA_BOUNDS, resolution=DEFAULT_RESOLUTION, power=DEFAULT_POWER, k=None):
+    """
+    Inverse-distance weights of every grid cell, a read-only (cells, stations)
+    matrix. stations is a tuple of (lat, lon) pairs, so the matrix is computed
+    once and reused for every snapshot and forecast day with the same stations.
+    With k only the k nearest stations of a cell weigh in. A cell on top of a
+    station takes that station's value.
+    """
+    station_lat, station_lon = np.array(stations, dtype=float).T
+    lats, lons = grid_axes(bounds, resolution)
+    grid_lat, grid_lon = np.meshgrid(lats, lons, indexing='ij')
+    ref_lat = (bounds[0] + bounds[1]) / 2
+    station_xy = _to_km(station_lat, station_lon, ref_lat)
+    grid_xy = _to_km(grid_lat.ravel(), grid_lon.ravel(), ref_lat)
+
+    if k is None or k >= len(stations):
+        distances = np.linalg.norm(grid_xy[:, None, :] - station_xy[None, :, :], axis=2)
+        indices = np.broadcast_to(np.arange(len(stations)), distances.shape)
+    else:
+        distances, indices = _nearest(station_xy, grid_xy, k)
+
+    exact = distances < 1e-9
+    with np.errstate(divide='ignore'):
+        weights = np.where(exact.any(axis=1, keepdims=True), exact, 1.0 / distances ** power)
+    matrix = np.zeros((len(grid_xy), len(stations)))
+    np.put_along_axis(matrix, indices, weights, axis=1)
+    matrix.setflags(write=False)
+    return matrix
+
+def interpolate(values, weights):
+    """
+    Interpolates station values, shaped (stations,) or (stations, timestamps),
+    onto the grid cells in one matrix product. Missing readings (NaN) are left
+    out of the weighting of their timestamp; a cell none of whose stations has
+    a reading stays NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    numerator = weights @ np.where(present, values, 0.0)
+    denominator = weights @ present
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return numerator / denominator
+
+def latitude_scale(lats):
+    """
+    How many times wider a degree of latitude is than a degree of longitude
+    around lats, the y/x scale ratio of an undistorted lat/lon plot.
+    """
+    return 1 / np.cos(np.radians((np.min(lats) + np.max(lats)) / 2))
+
+def interpolate_field(df, value_col, time_col=None, bounds=ARMENIA_BOUNDS, resolution=DEFAULT_RESOLUTION,
+                      power=DEFAULT_POWER, k=None):
+    """
+    Interpolates the readings of df, one per city (and per time_col value when
+    given), onto the regular lat/lon grid. Returns (lats, lons, times, grids),
+    grids shaped (times, lats, lons); times is [None] without a time_col.
+    """
+    keys = ['Latitude', 'Longitude'] + ([time_col] if time_col else [])
+    table = df.groupby(keys, observed=True)[value_col].mean()
+    if time_col:
+        table = table.unstack(time_col)
+        times = list(table.columns)
+    else:
+        table = table.to_frame()
+        times = [None]
+
+    stations = tuple((float(lat), float(lon)) for lat, lon in table.index)
+    lats, lons = grid_axes(bounds, resolution)
+    grids = interpolate(table.to_numpy(), idw_weights(stations, bounds, resolution, power, k))
+    return lats, lons, times, grids.T.reshape(len(times), len(lats), len(lons))
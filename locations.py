@@ -0,0 +1,72 @@
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+# one row per scraped location: Region, City, Latitude, Longitude
+LOCATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "locations.csv")
+
+WEEKLY_URL = "https://exanak.am/en/7-days-weather-forecast/{region}/{city}"
+DAILY_URL = "https://exanak.am/en/current-weather-forecast/{region}/{city}"
+
+def get_locations_path(path=None):
+    """
+    Resolves the registry file from the argument, the WEATHER_LOCATIONS
+    environment variable or LOCATIONS_PATH, in that order.
+    """
+    if path is None:
+        path = os.environ.get("WEATHER_LOCATIONS", LOCATIONS_PATH)
+    return path
+
+@lru_cache(maxsize=None)
+def _load(path):
+    locations = pd.read_csv(path, dtype={'Region': str, 'City': str})
+    duplicated = locations['City'].duplicated()
+    if duplicated.any():
+        raise ValueError(f"Duplicate cities in {path}: {', '.join(locations.loc[duplicated, 'City'])}")
+    return locations
+
+def load_locations(path=None):
+    """
+    Returns the location registry, read once per file.
+    """
+    return _load(get_locations_path(path)).copy()
+
+def _slug(names):
+    return names.str.lower().str.replace(r'\s+', '-', regex=True)
+
+def location_name(locations):
+    # the "City (Region)" name the daily rows are labelled with
+    return locations['City'] + " (" + locations['Region'] + ")"
+
+def weekly_items(locations):
+    """
+    (name, url) work items for the 7-day forecast pages.
+    """
+    urls = [
+        WEEKLY_URL.format(region=region, city=city)
+        for region, city in zip(_slug(locations['Region']), _slug(locations['City']))
+    ]
+    return list(zip(location_name(locations), urls))
+
+def daily_items(locations):
+    """
+    (name, url) work items for the current weather pages.
+    """
+    urls = [
+        DAILY_URL.format(region=region, city=city)
+        for region, city in zip(_slug(locations['Region']), _slug(locations['City']))
+    ]
+    return list(zip(location_name(locations), urls))
+
+@lru_cache(maxsize=None)
+def _coordinates(path):
+    return _load(path).set_index('City')[['Latitude', 'Longitude']]
+
+def add_coordinates(df, path=None):
+    """
+    Adds 'Latitude' and 'Longitude' to df by joining 'City' against the indexed
+    registry; unknown cities get NaN.
+    """
+    coordinates = _coordinates(get_locations_path(path))
+    return df.drop(columns=['Latitude', 'Longitude'], errors='ignore').join(coordinates, on='City')
@@ -1,15 +1,291 @@
-from scraper import run_scraper
-from daily_processor import run_daily_processor
-from daily_plotter import run_daily_plotter
-from weekly_processor import run_weekly_processor
-from weekly_plotter import run_weekly_plotter
-
-def main():
-    run_scraper()
-    run_daily_processor()
-    run_weekly_processor()
-    run_daily_plotter()
-    run_weekly_plotter()
+import sys
+import argparse
+from datetime import datetime
+from functools import partial
+
+import instrumentation
+from dag import run_dag
+from html_output import HTML_MODES
+from pipeline import STAGES
+from storage import FORMATS
+from scraper import BACKENDS, EXTRACTION_MODES, DEFAULT_EXTRACTION, DEFAULT_RETRIES, DEFAULT_TIMEOUT
+
+# the stage modules are imported by the stages that run, so e.g. `main.py process`
+# never loads selenium, aiohttp, matplotlib or plotly
+COMMANDS = STAGES + ("all",)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape, clean and visualize weather data from exanak.am.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=COMMANDS,
+        default="all",
+        help="stage to run, or all of them (default: all)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of browsers or concurrent requests the scraper uses (default: $SCRAPER_WORKERS or 4)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=None,
+        help="fetch pages over plain HTTP or through headless Chrome (default: $SCRAPER_BACKEND or http)"
+    )
+    parser.add_argument(
+        "--extraction",
+        choices=EXTRACTION_MODES,
+        default=DEFAULT_EXTRACTION,
+        help="how the selenium backend reads a page: one script call per page or one lookup per cell (default: script)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="re-download every page instead of reusing the on-disk page cache"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=None,
+        help="seconds a cached page is reused without revalidating it (default: $PAGE_CACHE_TTL or 300)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="seconds a page may take to load and show its data before it is retried (default: 30)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help="times a failed page is retried with exponential backoff (default: 3)"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="scrape every page again instead of resuming from the checkpoint of an unfinished run"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-clean the raw data even if it has not changed since the last run"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="clean the raw CSVs in chunks of this many rows instead of loading them at once"
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default=None,
+        help="table format for the raw and processed data (default: $WEATHER_STORAGE_FORMAT or csv)"
+    )
+    parser.add_argument(
+        "--stages",
+        type=lambda value: [stage.strip() for stage in value.split(",") if stage.strip()],
+        default=None,
+        help="with the all command, comma-separated stages to run, e.g. process,plot to start from the raw data "
+             "on disk (default: all)"
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="pass DataFrames between stages instead of re-reading each stage's files"
+    )
+    parser.add_argument(
+        "--no-persist",
+        action="store_true",
+        help="with --in-memory, only write the charts and skip the raw and processed tables"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes running independent stages at the same time (default: CPU count)"
+    )
+    parser.add_argument(
+        "--plot-workers",
+        type=int,
+        default=None,
+        help="number of processes rendering figures in parallel (default: $PLOT_WORKERS or CPU count)"
+    )
+    parser.add_argument(
+        "--rerender",
+        action="store_true",
+        help="forget the render cache so every figure is rendered again"
+    )
+    parser.add_argument(
+        "--html-mode",
+        choices=HTML_MODES,
+        default=None,
+        help="how chart pages load plotly.js: one shared local bundle, inlined in every page, or from the CDN "
+             "(default: $PLOTLY_HTML_MODE or shared)"
+    )
+    parser.add_argument(
+        "--report",
+        default=instrumentation.REPORT_PATH,
+        help=f"where to write the JSON run report with per-stage metrics (default: {instrumentation.REPORT_PATH})"
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=None,
+        help="also write the run metrics in the Prometheus text format to this file"
+    )
+    parser.add_argument(
+        "--profile",
+        type=lambda value: [stage.strip() for stage in value.split(",") if stage.strip()],
+        default=[],
+        help="comma-separated stages to profile, e.g. daily_process,weekly_plot (in-memory also scrape and plot)"
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=instrumentation.PROFILERS,
+        default="cprofile",
+        help=f"profiler for --profile, written to {instrumentation.PROFILE_DIR} (default: cprofile)"
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="process the raw snapshot without validating it first"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the stage plan and exit"
+    )
+    args = parser.parse_args(argv)
+    if args.stages is not None and args.command != "all":
+        parser.error(f"--stages only applies to the all command, not {args.command}")
+    if args.stages is None:
+        args.stages = list(STAGES) if args.command == "all" else [args.command]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+    return args
+
+def build_stage_graph(args, scraper_options):
+    """
+    The file-based stages and their dependencies; the daily and weekly branches
+    only share the scrape.
+    """
+    graph = {}
+    if "scrape" in args.stages:
+        from scraper import run_scraper
+
+        graph["scrape"] = (partial(run_scraper, storage_format=args.format, **scraper_options), [])
+    if "process" in args.stages:
+        from daily_processor import run_daily_processor
+        from weekly_processor import run_weekly_processor
+
+        before_process = {kind: ["scrape"] if "scrape" in graph else [] for kind in ("daily", "weekly")}
+        if not args.no_validate:
+            from validation import kind_report_path, run_validation
+
+            # a table failing validation stops its own branch before cleaning and plotting, the other still runs
+            for kind in before_process:
+                graph[f"validate_{kind}"] = (
+                    partial(run_validation, storage_format=args.format, report_path=kind_report_path(kind), kind=kind),
+                    before_process[kind]
+                )
+                before_process[kind] = [f"validate_{kind}"]
+        graph["daily_process"] = (
+            partial(run_daily_processor, force=args.force, chunksize=args.chunksize, storage_format=args.format),
+            before_process["daily"]
+        )
+        graph["weekly_process"] = (
+            partial(run_weekly_processor, force=args.force, chunksize=args.chunksize, storage_format=args.format),
+            before_process["weekly"]
+        )
+    if "plot" in args.stages:
+        from daily_plotter import run_daily_plotter
+        from html_output import build_dashboard
+        from weekly_plotter import run_weekly_plotter
+
+        graph["daily_plot"] = (
+            partial(run_daily_plotter, storage_format=args.format, max_workers=args.plot_workers,
+                    html_mode=args.html_mode),
+            ["daily_process"] if "daily_process" in graph else []
+        )
+        graph["weekly_plot"] = (
+            partial(run_weekly_plotter, storage_format=args.format, max_workers=args.plot_workers,
+                    html_mode=args.html_mode),
+            ["weekly_process"] if "weekly_process" in graph else []
+        )
+        graph["dashboard"] = (build_dashboard, ["daily_plot", "weekly_plot"])
+    return graph
+
+def write_run_report(args, stage_metrics, started_at, status):
+    report = instrumentation.build_report(stage_metrics, started_at, status)
+    instrumentation.write_report(report, args.report)
+    if args.prometheus:
+        instrumentation.write_prometheus(report, args.prometheus)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.rerender and not args.dry_run:
+        import render_cache
+
+        render_cache.invalidate()
+
+    scraper_options = dict(
+        num_workers=args.workers,
+        extraction=args.extraction,
+        backend=args.backend,
+        use_cache=not args.no_cache,
+        cache_ttl=args.cache_ttl,
+        timeout=args.timeout,
+        retries=args.retries,
+        resume=not args.no_resume
+    )
+
+    started_at = datetime.now()
+    if args.in_memory:
+        if args.dry_run:
+            print(" -> ".join(stage for stage in STAGES if stage in args.stages))
+            return
+        from pipeline import run_pipeline
+
+        stage_metrics = []
+        try:
+            run_pipeline(
+                stages=args.stages,
+                persist=not args.no_persist,
+                storage_format=args.format,
+                scraper_options=scraper_options,
+                plot_workers=args.plot_workers,
+                html_mode=args.html_mode,
+                metrics=stage_metrics,
+                profile=args.profile,
+                profiler=args.profiler,
+                validate=not args.no_validate
+            )
+        finally:
+            failed = any(metrics["status"] != "ok" for metrics in stage_metrics)
+            write_run_report(args, stage_metrics, started_at, "failed" if failed else "ok")
+        return
+
+    results = run_dag(
+        build_stage_graph(args, scraper_options),
+        max_workers=args.jobs,
+        dry_run=args.dry_run,
+        profile=args.profile,
+        profiler=args.profiler,
+        # the run report is written, so every stage gets its own peak RSS
+        reset_rss=True
+    )
+    if args.dry_run:
+        return
+    stage_metrics = [dict(result["metrics"], status=result["status"]) for result in results.values()]
+    failed = any(result["status"] != "ok" for result in results.values())
+    write_run_report(args, stage_metrics, started_at, "failed" if failed else "ok")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
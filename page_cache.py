@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import hashlib
+
+from storage import atomic_write
+
+DEFAULT_CACHE_DIR = "outputs/cache/pages"
+DEFAULT_TTL = 300  # seconds a cached page is reused without asking the server
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def file_hash(path):
+    """
+    Hash of a file, or of every file under a directory such as a partitioned dataset.
+    """
+    path = str(path)
+    if os.path.isdir(path):
+        paths = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+    else:
+        paths = [path]
+
+    digest = hashlib.sha256()
+    for file_path in paths:
+        digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _write_json(path, data):
+    # a crash never leaves a half-written index
+    atomic_write(path, json.dumps(data, indent=2, sort_keys=True))
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+class PageCache:
+    """
+    Content-addressed cache of downloaded pages.
+
+    The index maps each URL to the hash of its last body together with the
+    ETag/Last-Modified validators and fetch time. Bodies and parsed results
+    are stored by content hash, so an unchanged page is never parsed twice.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(os.path.join(cache_dir, "pages"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "parsed"), exist_ok=True)
+        self.index = _read_json(self.index_path)
+
+    def _page_path(self, page_hash):
+        return os.path.join(self.cache_dir, "pages", f"{page_hash}.html")
+
+    def _parsed_path(self, page_hash, kind):
+        return os.path.join(self.cache_dir, "parsed", f"{page_hash}.{kind}.json")
+
+    def entry(self, url):
+        entry = self.index.get(url)
+        if entry is None or not os.path.exists(self._page_path(entry["hash"])):
+            return None
+        return entry
+
+    def is_fresh(self, url):
+        entry = self.entry(url)
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl
+
+    def conditional_headers(self, url):
+        entry = self.entry(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, url):
+        with open(self._page_path(self.index[url]["hash"]), encoding="utf-8") as f:
+            return f.read()
+
+    def store(self, url, text, etag=None, last_modified=None):
+        """
+        Stores a freshly downloaded body and returns its content hash.
+        """
+        page_hash = content_hash(text)
+        page_path = self._page_path(page_hash)
+        if not os.path.exists(page_path):
+            with open(page_path, "w", encoding="utf-8") as f:
+                f.write(text)
+        self.index[url] = {
+            "hash": page_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        return page_hash
+
+    def touch(self, url):
+        # the server confirmed (HTTP 304) that the cached body is still current
+        self.index[url]["fetched_at"] = time.time()
+
+    def load_parsed(self, url, kind):
+        entry = self.entry(url)
+        if entry is None:
+            return None
+        parsed_path = self._parsed_path(entry["hash"], kind)
+        if not os.path.exists(parsed_path):
+            return None
+        with open(parsed_path) as f:
+            return json.load(f)
+
+    def save_parsed(self, url, kind, parsed):
+        _write_json(self._parsed_path(self.index[url]["hash"], kind), parsed)
+
+    def save(self):
+        _write_json(self.index_path, self.index)
+
+# tracking which input each processed output was built from
+
+def _manifest_path(write_path):
+    return os.path.join(os.path.dirname(os.path.abspath(write_path)), ".source-hashes.json")
+
+def is_up_to_date(read_path, write_path):
+    """
+    True when write_path exists and was built from the current contents of read_path.
+    """
+    if not os.path.exists(write_path):
+        return False
+    manifest = _read_json(_manifest_path(write_path))
+    return manifest.get(os.path.basename(str(write_path))) == file_hash(read_path)
+
+def mark_up_to_date(read_path, write_path):
+    manifest_path = _manifest_path(write_path)
+    manifest = _read_json(manifest_path)
+    manifest[os.path.basename(str(write_path))] = file_hash(read_path)
+    _write_json(manifest_path, manifest)
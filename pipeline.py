@@ -0,0 +1,172 @@
+import os
+from contextlib import contextmanager
+
+import instrumentation
+from aggregates import (
+    DAILY_AGGREGATE_COLUMNS, DAILY_AGGREGATES_NAME, aggregates_path, load_aggregates, snapshot_stats, update_aggregates
+)
+from daily_processor import clean_daily_frame
+from history_store import daily_history, weekly_history
+from html_output import build_dashboard, shared_html_options
+from scraper import scrape_weather, save_raw_tables
+from storage import read_table, table_path, write_table
+from validation import KINDS, ValidationError, kind_report_path, validate_frames
+from weekly_processor import clean_weekly_frame
+
+STAGES = ("scrape", "process", "plot")
+
+RAW_DIR = "outputs/raw"
+PROCESSED_DIR = "outputs/processed"
+VISUALIZATIONS_DIR = "outputs/visualizations"
+
+def _load_raw(kind, storage_format):
+    return read_table(table_path(RAW_DIR, f"{kind}-weather-data", storage_format))
+
+def _load_processed(storage_format):
+    weekly_clean = read_table(
+        table_path(PROCESSED_DIR, "weekly-weather-data-clean", storage_format), parse_dates=['Date']
+    )
+    daily_clean = read_table(table_path(PROCESSED_DIR, "daily-weather-data-clean", storage_format))
+    return weekly_clean, daily_clean
+
+@contextmanager
+def _measured(name, metrics, profile, profiler):
+    # the stage's metrics go to the metrics list whether it succeeds or fails;
+    # the peak RSS is only reset per stage when the metrics are collected
+    status = "failed"
+    with instrumentation.stage(
+        name, profiler if name in profile else None, reset_rss=metrics is not None
+    ) as stage_metrics:
+        try:
+            yield
+            status = "ok"
+        finally:
+            stage_metrics["status"] = status
+            if metrics is not None:
+                metrics.append(stage_metrics)
+
+def _require_rows(df, kind):
+    if df.empty:
+        raise RuntimeError(f"The raw {kind} snapshot has no rows, no {kind} page was scraped")
+    return df
+
+def _process(kind, raw, persist, storage_format):
+    # cleans one kind of raw snapshot and, with persist, stores it with its history and aggregates
+    if kind == "daily":
+        clean = clean_daily_frame(_require_rows(raw, kind))
+        stats = snapshot_stats(clean, DAILY_AGGREGATE_COLUMNS)
+        history, stats_path = daily_history(), aggregates_path(storage_format, name=DAILY_AGGREGATES_NAME)
+    else:
+        clean = clean_weekly_frame(_require_rows(raw, kind))
+        stats = snapshot_stats(clean)
+        history, stats_path = weekly_history(), aggregates_path(storage_format)
+    if persist:
+        os.makedirs(PROCESSED_DIR, exist_ok=True)
+        write_table(clean, table_path(PROCESSED_DIR, f"{kind}-weather-data-clean", storage_format))
+        history.append(clean)
+        update_aggregates(stats, stats_path)
+    else:
+        instrumentation.count(rows_out=len(clean))
+    return clean
+
+def _rows(*frames):
+    return sum(len(df) for df in frames if df is not None)
+
+def run_pipeline(stages=STAGES, persist=True, storage_format=None, scraper_options=None, plot_workers=None,
+                 use_render_cache=True, html_mode=None, metrics=None, profile=(), profiler="cprofile", validate=True):
+    """
+    Runs the given stages in one process, handing DataFrames from one stage to the next.
+
+    A run that skips 'scrape' starts from the raw snapshot on disk, one that also skips
+    'process' from the processed tables. With persist, the output of every stage that ran
+    is also written to disk (and cleaned snapshots go to the history store).
+    Figures whose input did not change are not re-rendered unless use_render_cache is False,
+    and the chart pages are collected into one dashboard page.
+    The daily and weekly tables are validated (with validate) and processed in
+    stages of their own. A table failing either is not plotted, the other one still
+    is, and its error is raised once the run is over; when both fail the run stops.
+
+    Every stage is measured with instrumentation.stage and, given a metrics list,
+    its metrics are appended to it; stages named in profile run under profiler.
+    Returns the frames keyed by name.
+    """
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+    frames = {}
+
+    if "scrape" in stages:
+        with _measured("scrape", metrics, profile, profiler):
+            weekly_raw, daily_raw = scrape_weather(**(scraper_options or {}))
+            if persist:
+                save_raw_tables(weekly_raw, daily_raw, storage_format, RAW_DIR)
+            else:
+                instrumentation.count(rows_out=_rows(weekly_raw, daily_raw))
+        frames["weekly_raw"], frames["daily_raw"] = weekly_raw, daily_raw
+
+    failed = {}
+    if "process" in stages and validate:
+        for kind in KINDS:
+            try:
+                with _measured(f"validate_{kind}", metrics, profile, profiler):
+                    if f"{kind}_raw" in frames:
+                        # frames handed over in memory count as read
+                        instrumentation.count(rows_in=_rows(frames[f"{kind}_raw"]))
+                    else:
+                        frames[f"{kind}_raw"] = _load_raw(kind, storage_format)
+                    validate_frames(
+                        storage_format=storage_format, report_path=kind_report_path(kind) if persist else None,
+                        **{f"{kind}_raw": frames[f"{kind}_raw"]}
+                    )
+            except ValidationError as error:
+                # a weekly failure must not block the daily outputs, and the other way round
+                failed[kind] = error
+        if len(failed) == len(KINDS):
+            raise failed["daily"]
+
+    if "process" in stages:
+        for kind in KINDS:
+            if kind in failed:
+                continue
+            try:
+                with _measured(f"{kind}_process", metrics, profile, profiler):
+                    if f"{kind}_raw" in frames:
+                        # frames handed over in memory count as read
+                        instrumentation.count(rows_in=_rows(frames[f"{kind}_raw"]))
+                    else:
+                        frames[f"{kind}_raw"] = _load_raw(kind, storage_format)
+                    frames[f"{kind}_clean"] = _process(kind, frames[f"{kind}_raw"], persist, storage_format)
+            except Exception as error:
+                # as with validation, the other kind is still processed and plotted
+                failed[kind] = error
+        if len(failed) == len(KINDS):
+            raise failed["daily"]
+
+    if "plot" in stages:
+        # matplotlib, seaborn and plotly are only loaded when something is plotted
+        from daily_plotter import plot_daily_weather
+        from weekly_plotter import visualize_weekly_weather_by_city
+
+        with _measured("plot", metrics, profile, profiler):
+            aggregates = None
+            if "process" in stages:
+                instrumentation.count(rows_in=_rows(frames.get("weekly_clean"), frames.get("daily_clean")))
+            else:
+                frames["weekly_clean"], frames["daily_clean"] = _load_processed(storage_format)
+                aggregates = load_aggregates(aggregates_path(storage_format))
+            manifest_path = os.path.join(VISUALIZATIONS_DIR, "render-manifest.json") if use_render_cache else None
+            html_options = shared_html_options(html_mode, VISUALIZATIONS_DIR)
+            if "daily_clean" in frames:
+                daily_dir = os.path.join(VISUALIZATIONS_DIR, "daily")
+                os.makedirs(daily_dir, exist_ok=True)
+                plot_daily_weather(frames["daily_clean"], daily_dir, plot_workers, manifest_path, html_options)
+            if "weekly_clean" in frames:
+                visualize_weekly_weather_by_city(
+                    frames["weekly_clean"], os.path.join(VISUALIZATIONS_DIR, "weekly"), plot_workers, manifest_path,
+                    html_options, aggregates
+                )
+            build_dashboard(VISUALIZATIONS_DIR)
+
+    if failed:
+        raise next(iter(failed.values()))
+    return frames
@@ -0,0 +1,73 @@
+import os
+import json
+import fcntl
+import hashlib
+from contextlib import contextmanager
+
+import pandas as pd
+
+from storage import atomic_write
+
+MANIFEST_PATH = "outputs/visualizations/render-manifest.json"
+
+def figure_key(render_func, df, params=None):
+    """
+    Hash of everything a figure is drawn from: the render function, the rows
+    and columns of its input slice and its plot parameters.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{render_func.__module__}.{render_func.__qualname__}".encode("utf-8"))
+    digest.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    atomic_write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+def is_cached(manifest, output_path, key):
+    return manifest.get(os.path.normpath(output_path)) == key and os.path.exists(output_path)
+
+@contextmanager
+def _locked(manifest_path):
+    # the daily and weekly plotters may update the same manifest from two processes
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    with open(f"{manifest_path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def record(entries, manifest_path=MANIFEST_PATH):
+    """
+    Stores {output_path: key} for freshly rendered figures, keeping every other entry.
+    """
+    with _locked(manifest_path):
+        manifest = load_manifest(manifest_path)
+        for output_path, key in entries.items():
+            manifest[os.path.normpath(output_path)] = key
+        save_manifest(manifest, manifest_path)
+
+def invalidate(output_paths=None, manifest_path=MANIFEST_PATH):
+    """
+    Forgets the given outputs (all of them by default) so they are rendered again.
+    Returns the number of entries removed.
+    """
+    with _locked(manifest_path):
+        manifest = load_manifest(manifest_path)
+        if output_paths is None:
+            removed = len(manifest)
+            manifest = {}
+        else:
+            keys = {os.path.normpath(path) for path in output_paths}
+            removed = len(keys & set(manifest))
+            manifest = {path: key for path, key in manifest.items() if path not in keys}
+        save_manifest(manifest, manifest_path)
+    return removed
@@ -0,0 +1,105 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+import render_cache
+
+def get_plot_workers(max_workers=None):
+    """
+    Resolves the render pool size from the argument, the PLOT_WORKERS
+    environment variable or the CPU count, in that order.
+    """
+    if max_workers is None:
+        max_workers = os.environ.get("PLOT_WORKERS", os.cpu_count() or 1)
+    return max(1, int(max_workers))
+
+def _render(render_func, df, output_path, params):
+    # figures are only ever written to files, never shown
+    import matplotlib
+    matplotlib.use("Agg")
+
+    start = time.perf_counter()
+    render_func(df, output_path, **params)
+    return [time.perf_counter() - start]
+
+def _render_batch(batch_func, items):
+    import matplotlib
+    matplotlib.use("Agg")
+
+    # the batch function yields once per written figure
+    seconds = []
+    start = time.perf_counter()
+    for _ in batch_func(items):
+        now = time.perf_counter()
+        seconds.append(now - start)
+        start = now
+    return seconds
+
+def _jobs(to_render, batches, max_workers):
+    """
+    Pairs every pool job with the tasks it renders: one job per plain task, and
+    tasks with a batch function split into at most max_workers batches.
+    """
+    jobs = []
+    batched = {}
+    for task in to_render:
+        if task[0] in batches:
+            batched.setdefault(task[0], []).append(task)
+        else:
+            jobs.append((_render, task, [task]))
+    for render_func, func_tasks in batched.items():
+        num_batches = min(max_workers, len(func_tasks))
+        for i in range(num_batches):
+            chunk = func_tasks[i::num_batches]
+            jobs.append((_render_batch, (batches[render_func], [task[1:] for task in chunk]), chunk))
+    return jobs
+
+def render_figures(tasks, max_workers=None, manifest_path=None, batches=None):
+    """
+    Renders (render_func, df, output_path, params) tasks, each figure in its own
+    worker process, calling render_func(df, output_path, **params).
+
+    batches maps a render_func to a batch function that draws a list of
+    (df, output_path, params) items in one process, yielding after each figure;
+    tasks of that render_func are spread over the workers in such batches.
+
+    With a manifest_path, figures whose input slice and parameters hash to the key
+    recorded for their output are skipped. Returns {output file name: seconds} in
+    task order, with None for skipped figures, and prints it.
+    """
+    manifest = render_cache.load_manifest(manifest_path) if manifest_path else None
+    keys = {}
+    to_render = []
+    for task in tasks:
+        render_func, df, output_path, params = task
+        if manifest is not None:
+            keys[output_path] = render_cache.figure_key(render_func, df, params)
+            if render_cache.is_cached(manifest, output_path, keys[output_path]):
+                continue
+        to_render.append(task)
+
+    jobs = _jobs(to_render, batches or {}, get_plot_workers(max_workers))
+    max_workers = min(get_plot_workers(max_workers), max(len(jobs), 1))
+    if max_workers == 1:
+        seconds = [func(*args) for func, args, _ in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, *args) for func, args, _ in jobs]
+            seconds = [future.result() for future in futures]
+    rendered = {}
+    for (_, _, job_tasks), job_seconds in zip(jobs, seconds):
+        for task, elapsed in zip(job_tasks, job_seconds):
+            rendered[task[2]] = elapsed
+
+    instrumentation.count(bytes_written=sum(instrumentation.path_size(path) for path in rendered))
+
+    if manifest is not None and rendered:
+        render_cache.record({output_path: keys[output_path] for output_path in rendered}, manifest_path)
+
+    timings = {}
+    for task in tasks:
+        name, elapsed = os.path.basename(task[2]), rendered.get(task[2])
+        timings[name] = elapsed
+        print(f"Rendered {name} in {elapsed:.2f}s" if elapsed is not None else f"Skipped {name}, input unchanged")
+    return timings
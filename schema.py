@@ -0,0 +1,76 @@
+import pandas as pd
+
+# dtypes of the cleaned tables: categoricals for the repeated labels, float32 for
+# the measurements (a tenth of a degree, millibar or kilometre fits easily) and
+# minutes after midnight for the times of day. Coordinates stay float64 because
+# the maps and the interpolation grid need their full precision.
+DAILY_SCHEMA = {
+    'Region': 'category',
+    'City': 'category',
+    'Scraped Date': 'datetime64[s]',
+    'Temperature': 'float32',
+    'Humidity': 'float32',
+    'Wind Speed (km/h)': 'float32',
+    'Pressure (mb)': 'float32',
+    'Ceiling (m)': 'float32',
+    'Dew Point': 'float32',
+    'Visibility (km)': 'float32',
+    'UV Index': 'float32',
+    'Sunrise (min)': 'Int16',
+    'Sunset (min)': 'Int16',
+    'Moonrise (min)': 'Int16',
+    'Moonset (min)': 'Int16',
+    'Day Duration (min)': 'float32',
+    'Moon Duration (min)': 'float32',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+}
+
+WEEKLY_SCHEMA = {
+    'Region': 'category',
+    'City': 'category',
+    'Date': 'datetime64[s]',
+    'Scraped Date': 'datetime64[s]',
+    'Forecast': 'category',
+    'Precipitation': 'float32',
+    'Snow': 'float32',
+    'High_Temp': 'float32',
+    'Low_Temp': 'float32',
+    'Avg_Temp': 'float32',
+    'Latitude': 'float64',
+    'Longitude': 'float64',
+}
+
+def _is_numeric(dtype):
+    return dtype != 'category' and not dtype.startswith('datetime64')
+
+def apply_schema(df, schema):
+    """
+    Returns df with the columns schema lists cast to their dtypes; other columns are left alone.
+    Text in a numeric column (e.g. from a raw table stored as Parquet) is parsed,
+    cells that are not numbers become missing.
+    """
+    columns = {}
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if _is_numeric(dtype) and not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors='coerce')
+        columns[col] = values.astype(dtype)
+    return df.assign(**columns)
+
+def memory_report(untyped, typed):
+    """
+    Per-column memory footprint in bytes of the same table before and after
+    apply_schema, with a 'Total' row.
+    """
+    report = pd.DataFrame({
+        'dtype before': untyped.dtypes.astype(str),
+        'dtype after': typed.dtypes.astype(str),
+        'bytes before': untyped.memory_usage(index=False, deep=True),
+        'bytes after': typed.memory_usage(index=False, deep=True),
+    })
+    report.loc['Total'] = ['', '', report['bytes before'].sum(), report['bytes after'].sum()]
+    report['ratio'] = (report['bytes after'] / report['bytes before']).round(3)
+    return report
@@ -1,156 +1,513 @@
 import os
+import time
+import queue
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+# selenium, lxml and aiohttp are imported by the backend that uses them,
+# so importing this module (or running only a processor) stays cheap
+import instrumentation
+from checkpoint import ScrapeCheckpoint, DEFAULT_CHECKPOINT_PATH
+from locations import daily_items, load_locations, weekly_items
+from page_cache import PageCache, DEFAULT_TTL
+from storage import table_path, write_table
 
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-service = Service("/usr/bin/chromedriver")
+CHROMEDRIVER_PATH = "/usr/bin/chromedriver"
 
-def init_driver():
-    return webdriver.Chrome(service=service, options=chrome_options)
+DEFAULT_WORKERS = 4
 
-def scrape_weekly_weather(driver, region_name, region_url):
+# per page: seconds to load it and show its data, retries after a failure and the first backoff delay
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+# fetch backends: "http" downloads the server-rendered pages and parses them offline,
+# "selenium" drives headless Chrome
+BACKENDS = ("http", "selenium")
+DEFAULT_BACKEND = "http"
+
+def init_driver(timeout=DEFAULT_TIMEOUT):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=chrome_options)
+    driver.set_page_load_timeout(timeout)
+    return driver
+
+def get_backend(backend=None):
+    """
+    Resolves the fetch backend from the argument, the SCRAPER_BACKEND
+    environment variable or DEFAULT_BACKEND, in that order.
+    """
+    if backend is None:
+        backend = os.environ.get("SCRAPER_BACKEND", DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown scraper backend: {backend}")
+    return backend
+
+def get_num_workers(num_workers=None):
+    """
+    Resolves the scraper pool size from the argument, the SCRAPER_WORKERS
+    environment variable or DEFAULT_WORKERS, in that order.
+    """
+    if num_workers is None:
+        num_workers = os.environ.get("SCRAPER_WORKERS", DEFAULT_WORKERS)
+    return max(1, int(num_workers))
+
+@contextmanager
+def driver_pool(num_workers, timeout=DEFAULT_TIMEOUT):
+    """
+    Starts num_workers reusable drivers, each giving a page `timeout` seconds to
+    load, and yields them as a queue.
+    The run goes on with the drivers that started as long as one did.
+    All drivers are quit when the block exits, even on errors.
+    """
+    drivers = []
+    try:
+        # starting the browsers concurrently, since each one takes a while to boot
+        errors = []
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(init_driver, timeout) for _ in range(num_workers)]
+            for future in futures:
+                try:
+                    drivers.append(future.result())
+                except Exception as exc:
+                    errors.append(exc)
+        if not drivers:
+            raise errors[0]
+        if errors:
+            print(f"Started {len(drivers)} of {num_workers} browsers: {errors[0]!r}")
+        pool = queue.Queue()
+        for driver in drivers:
+            pool.put(driver)
+        yield pool
+    finally:
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as exc:
+                # one dead browser must not keep the others running
+                print(f"Failed to quit a browser: {exc!r}")
+
+def _failure(kind, region_name, region_url, error):
+    failure = {"kind": kind, "location": region_name, "url": region_url, "error": str(error).strip()}
+    instrumentation.record_failure(failure)
+    return failure
+
+def scrape_in_pool(pool, scrape_func, work_items, retries=0, backoff=DEFAULT_BACKOFF, failures=None, kind=None):
+    """
+    Runs scrape_func(driver, region_name, region_url) for every work item,
+    borrowing a driver from the pool for each call.
+    Results are returned in the order of work_items.
+
+    A failed call is retried up to `retries` times with exponential backoff.
+    With a failures list, an item that still fails gets None and is appended
+    to failures; otherwise its last error is raised.
+    """
+    def scrape_item(item):
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            driver = pool.get()
+            try:
+                result = scrape_func(driver, *item)
+            except Exception as exc:
+                error = exc
+            else:
+                instrumentation.record_url(item[1], time.perf_counter() - start, "fetched", attempts=attempt + 1)
+                return result
+            finally:
+                pool.put(driver)
+            if attempt < retries:
+                time.sleep(backoff * 2 ** attempt)
+
+        instrumentation.record_url(item[1], time.perf_counter() - start, "failed", attempts=retries + 1)
+        if failures is None:
+            raise error
+        failures.append(_failure(kind, *item, error))
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, pool.qsize())) as executor:
+        return list(executor.map(scrape_item, work_items))
+
+# weekly forecast table, cell paths are relative to a table row
+WEEKLY_ROWS_XPATH = '/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr'
+WEEKLY_CELL_XPATHS = {
+    "Date": 'td[2]',
+    "Precipitation": 'td[3]',
+    "Snow": 'td[4]',
+    "Forecast": 'td[5]/p',
+    "Hi/Lo": 'td[6]',
+}
+
+# current weather info panel
+DAILY_INFO_XPATHS = {
+    "Weather": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[1]/div[1]/div[1]/div[1]',
+    "Humidity": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[2]/strong',
+    "Wind": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[1]/strong',
+    "Pressure": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[3]/strong',
+    "UV Index": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[4]/strong',
+    "Cloud Cover": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[5]/strong',
+    "Ceiling": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[6]/strong',
+    "Dew Point": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[7]/strong',
+    "Visibility": '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[8]/strong',
+    "Sunrise": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[1]',
+    "Sunset": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[2]',
+    "Day Duration": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[3]',
+    "Moonrise": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[1]',
+    "Moonset": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[2]',
+    "Moon Duration": '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[3]',
+}
+
+# fields read through innerText instead of the rendered element text
+INNER_TEXT_FIELDS = {"Forecast"}
+
+# extraction modes: "script" pulls a whole table/panel in one execute_script call,
+# "element" issues one find_element call per cell
+EXTRACTION_MODES = ("script", "element")
+DEFAULT_EXTRACTION = "script"
+
+# evaluates every XPath inside the browser and returns plain strings,
+# or null for an XPath that matched nothing
+EXTRACT_TEXT_SCRIPT = """
+const xpaths = arguments[0];
+const innerTextFields = arguments[1];
+const result = {};
+for (const [field, xpath] of Object.entries(xpaths)) {
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (node === null) {
+        result[field] = null;
+    } else {
+        result[field] = innerTextFields.includes(field) ? node.innerText : node.innerText.trim();
+    }
+}
+return result;
+"""
+
+EXTRACT_ROWS_SCRIPT = """
+const rowsXPath = arguments[0];
+const cellXPaths = arguments[1];
+const innerTextFields = arguments[2];
+const rows = document.evaluate(rowsXPath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+const result = [];
+for (let i = 0; i < rows.snapshotLength; i++) {
+    const row = rows.snapshotItem(i);
+    const record = {};
+    for (const [field, xpath] of Object.entries(cellXPaths)) {
+        const node = document.evaluate(xpath, row, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node === null) {
+            record[field] = null;
+        } else {
+            record[field] = innerTextFields.includes(field) ? node.innerText : node.innerText.trim();
+        }
+    }
+    result.push(record);
+}
+return result;
+"""
+
+def _check_extracted(record, region_url):
+    # a missing element fails the same way find_element would
+    missing = [field for field, value in record.items() if value is None]
+    if missing:
+        from selenium.common.exceptions import NoSuchElementException
+
+        raise NoSuchElementException(f"No element found for {', '.join(missing)} on {region_url}")
+
+def _wait_until(driver, timeout, condition, message):
+    # polls instead of failing while the page is still rendering; raises TimeoutException after timeout
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    return WebDriverWait(driver, timeout, poll_frequency=0.25).until(condition, message)
+
+def _element_text(element, field):
+    if field in INNER_TEXT_FIELDS:
+        return element.get_attribute("innerText")
+    return element.text
+
+def scrape_weekly_weather(driver, region_name, region_url, extraction=DEFAULT_EXTRACTION, timeout=DEFAULT_TIMEOUT):
     driver.get(region_url)
+    message = f"No forecast rows on {region_url} after {timeout}s"
 
-    weather_data = []
+    if extraction == "script":
+        # the whole table in a single WebDriver round-trip, repeated until the rows have rendered
+        weather_data = _wait_until(
+            driver, timeout,
+            lambda d: d.execute_script(EXTRACT_ROWS_SCRIPT, WEEKLY_ROWS_XPATH, WEEKLY_CELL_XPATHS, list(INNER_TEXT_FIELDS)),
+            message
+        )
+        for record in weather_data:
+            _check_extracted(record, region_url)
+    elif extraction == "element":
+        from selenium.webdriver.common.by import By
+
+        weather_data = []
 
-    # finding all rows in the weekly weather table
-    rows = driver.find_elements(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr')
-    for row_index in range(1, len(rows) + 1):
-        date_xpath = f'/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr[{row_index}]/td[2]'
-        precip_xpath = f'/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr[{row_index}]/td[3]'
-        snow_xpath = f'/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr[{row_index}]/td[4]'
-        forecast_xpath = f'/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr[{row_index}]/td[5]/p'
-        hilo_xpath = f'/html/body/div/main/div/div[2]/div/div/div[1]/table/tbody/tr[{row_index}]/td[6]'
-
-        # extracting text
-        date_text = driver.find_element(By.XPATH, date_xpath).text
-        precip_text = driver.find_element(By.XPATH, precip_xpath).text
-        snow_text = driver.find_element(By.XPATH, snow_xpath).text
-        forecast_text = driver.find_element(By.XPATH, forecast_xpath).get_attribute("innerText")
-        hilo_text = driver.find_element(By.XPATH, hilo_xpath).text
-
-        weather_data.append({
-            "Date": date_text,
-            "Precipitation": precip_text,
-            "Snow": snow_text,
-            "Forecast": forecast_text,
-            "Hi/Lo": hilo_text
-        })
-
-    weather_df = pd.DataFrame(weather_data)
+        # waiting for the rows of the weekly weather table
+        rows = _wait_until(driver, timeout, lambda d: d.find_elements(By.XPATH, WEEKLY_ROWS_XPATH), message)
+        for row_index in range(1, len(rows) + 1):
+            record = {}
+            for field, cell_xpath in WEEKLY_CELL_XPATHS.items():
+                element = driver.find_element(By.XPATH, f"{WEEKLY_ROWS_XPATH}[{row_index}]/{cell_xpath}")
+                record[field] = _element_text(element, field)
+            weather_data.append(record)
+    else:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+
+    weather_df = pd.DataFrame(weather_data, columns=list(WEEKLY_CELL_XPATHS))
     return weather_df
 
-def scrape_daily_info(driver, region_name, region_url):
+def scrape_daily_info(driver, region_name, region_url, extraction=DEFAULT_EXTRACTION, timeout=DEFAULT_TIMEOUT):
     driver.get(region_url)
-    
-    # daily weather data
-    weather_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[1]/div[1]/div[1]/div[1]')
-    humidity_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[2]/strong')
-    wind_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[1]/strong')
-    pressure_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[3]/strong')
-    uv_index_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[4]/strong')
-    cloud_cover_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[5]/strong')
-    ceiling_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[6]/strong')
-    dew_point_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[7]/strong')
-    visibility_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[1]/div[2]/div/ul/li[8]/strong')
-
-    sunrise_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[1]')
-    sunset_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[2]')
-    day_duration_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[1]/ul/li[3]')
-
-    moonrise_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[1]')
-    moonset_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[2]')
-    moon_duration_element = driver.find_element(By.XPATH, '/html/body/div/main/div/div[2]/div/div/div[1]/div[2]/div[2]/ul/li[3]')
-
-    # extracting text
+    message = f"No weather panel on {region_url} after {timeout}s"
+
+    if extraction == "script":
+        # the whole info panel in a single WebDriver round-trip, repeated until the
+        # current temperature, the first thing the page renders, is there
+        def rendered_panel(d):
+            panel = d.execute_script(EXTRACT_TEXT_SCRIPT, DAILY_INFO_XPATHS, list(INNER_TEXT_FIELDS))
+            return panel if panel.get("Weather") is not None else False
+
+        panel = _wait_until(driver, timeout, rendered_panel, message)
+        _check_extracted(panel, region_url)
+    elif extraction == "element":
+        from selenium.webdriver.common.by import By
+
+        _wait_until(driver, timeout, lambda d: d.find_elements(By.XPATH, DAILY_INFO_XPATHS["Weather"]), message)
+        panel = {
+            field: _element_text(driver.find_element(By.XPATH, xpath), field)
+            for field, xpath in DAILY_INFO_XPATHS.items()
+        }
+    else:
+        raise ValueError(f"Unknown extraction mode: {extraction}")
+
+    return _build_daily_info(region_name, panel)
+
+def _build_daily_info(region_name, panel):
     daily_info = {
         "Region": region_name.split("(")[1].strip(")"),
         "City": region_name.split("(")[0].strip(),
-        "Weather": weather_element.text,
-        "Humidity": humidity_element.text,
-        "Wind": wind_element.text,
-        "Pressure": pressure_element.text,
-        "UV Index": uv_index_element.text,
-        "Cloud Cover": cloud_cover_element.text,
-        "Ceiling": ceiling_element.text,
-        "Dew Point": dew_point_element.text,
-        "Visibility": visibility_element.text,
-        "Sunrise": sunrise_element.text,
-        "Sunset": sunset_element.text,
-        "Day Duration": day_duration_element.text,
-        "Moonrise": moonrise_element.text,
-        "Moonset": moonset_element.text,
-        "Moon Duration": moon_duration_element.text,
     }
-
+    for field in DAILY_INFO_XPATHS:
+        daily_info[field] = panel[field]
     return daily_info
 
-# for weekly
-regions_and_cities = [
-    ("Yerevan", "Yerevan"),
-    ("Armavir", "Armavir"),
-    ("Gegharkunik", "Gavar"),
-    ("Kotayk", "Hrazdan"),
-    ("Lori", "Vanadzor"),
-    ("Shirak", "Gyumri"),
-    ("Syunik", "Kapan"),
-    ("Tavush", "Ijevan"),
-    ("Vayotsdzor", "Yeghegnadzor"),
-    ("Ararat", "Artashat"),
-    ("Aragatsotn", "Ashtarak"),
-]
-
-# for daily
-current_weather_urls = [
-    ("Yerevan (Yerevan)", "https://exanak.am/en/current-weather-forecast/yerevan/yerevan"),
-    ("Ashtarak (Aragatsotn)", "https://exanak.am/en/current-weather-forecast/aragatsotn/ashtarak"),
-    ("Artashat (Ararat)", "https://exanak.am/en/current-weather-forecast/ararat/artashat"),
-    ("Armavir (Armavir)", "https://exanak.am/en/current-weather-forecast/armavir/armavir"),
-    ("Gavar (Gegharkunik)", "https://exanak.am/en/current-weather-forecast/gegharkunik/gavar"),
-    ("Hrazdan (Kotayk)", "https://exanak.am/en/current-weather-forecast/kotayk/hrazdan"),
-    ("Vanadzor (Lori)", "https://exanak.am/en/current-weather-forecast/lori/vanadzor"),
-    ("Gyumri (Shirak)", "https://exanak.am/en/current-weather-forecast/shirak/gyumri"),
-    ("Kapan (Syunik)", "https://exanak.am/en/current-weather-forecast/syunik/kapan"),
-    ("Ijevan (Tavush)", "https://exanak.am/en/current-weather-forecast/tavush/ijevan"),
-    ("Yeghegnadzor (Vayotsdzor)", "https://exanak.am/en/current-weather-forecast/vayotsdzor/yeghegnadzor"),
-]
-
-def run_scraper():
-    driver = init_driver()
-    output_dir = "outputs/raw"
-    os.makedirs(output_dir, exist_ok=True)
+def _node_text(nodes):
+    # collapsing whitespace the way the browser's rendered text does
+    if not nodes:
+        return None
+    return " ".join(nodes[0].text_content().split())
+
+def parse_weekly_weather(page_html, region_url=""):
+    """
+    Parses a saved or downloaded 7-day forecast page into the same frame
+    scrape_weekly_weather returns.
+    """
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(page_html)
+
+    weather_data = []
+    for row in tree.xpath(WEEKLY_ROWS_XPATH):
+        record = {field: _node_text(row.xpath(cell_xpath)) for field, cell_xpath in WEEKLY_CELL_XPATHS.items()}
+        _check_extracted(record, region_url)
+        weather_data.append(record)
+
+    weather_df = pd.DataFrame(weather_data, columns=list(WEEKLY_CELL_XPATHS))
+    return weather_df
+
+def parse_daily_info(page_html, region_name, region_url=""):
+    """
+    Parses a saved or downloaded current weather page into the same dict
+    scrape_daily_info returns.
+    """
+    from lxml import html as lxml_html
+
+    tree = lxml_html.fromstring(page_html)
+
+    panel = {field: _node_text(tree.xpath(xpath)) for field, xpath in DAILY_INFO_XPATHS.items()}
+    _check_extracted(panel, region_url)
+    return _build_daily_info(region_name, panel)
+
+def _checkpointed(scrape_func, kind, checkpoint):
+    # saving every finished page right away, so a crash later in the run does not lose it
+    def scrape(driver, region_name, region_url):
+        result = scrape_func(driver, region_name, region_url)
+        if kind == "weekly":
+            result = result.to_dict("records")
+        checkpoint.save(kind, region_url, result)
+        return result
+    return scrape
+
+def _scrape_with_selenium(weekly_items, daily_items, num_workers, extraction, checkpoint, failures,
+                          timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    Scrapes the pages with a pool of headless browsers.
+    Finished pages go into checkpoint and failed ones into failures.
+    """
+    with driver_pool(num_workers, timeout) as pool:
+        for kind, scrape_func, work_items in (
+            ("weekly", scrape_weekly_weather, weekly_items),
+            ("daily", scrape_daily_info, daily_items),
+        ):
+            scrape_in_pool(
+                pool, _checkpointed(partial(scrape_func, extraction=extraction, timeout=timeout), kind, checkpoint),
+                work_items, retries=retries, failures=failures, kind=kind
+            )
+
+def _parse_with_cache(cache, url, kind, parse):
+    # an unchanged page body maps to the same parsed result, so it is parsed only once
+    if cache is None:
+        return parse()
+    parsed = cache.load_parsed(url, kind)
+    if parsed is None:
+        parsed = parse()
+        cache.save_parsed(url, kind, parsed)
+    return parsed
+
+def _scrape_with_http(weekly_items, daily_items, num_workers, checkpoint, failures, cache=None,
+                      timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    """
+    Downloads and parses the pages over HTTP.
+    Finished pages go into checkpoint and failed ones into failures.
+    """
+    from http_fetcher import fetch_pages
+
+    # one pooled session for every page, weekly pages first; a page that fails
+    # after all retries comes back as its exception
+    urls = [url for _, url in weekly_items] + [url for _, url in daily_items]
+    pages = fetch_pages(
+        urls, concurrency=num_workers, retries=retries, backoff=DEFAULT_BACKOFF, timeout=timeout, cache=cache,
+        return_exceptions=True
+    )
+    weekly_pages, daily_pages = pages[:len(weekly_items)], pages[len(weekly_items):]
+
+    parsers = {
+        "weekly": lambda page_html, region_name, region_url: parse_weekly_weather(page_html, region_url).to_dict("records"),
+        "daily": parse_daily_info,
+    }
+    for kind, work_items, kind_pages in (("weekly", weekly_items, weekly_pages), ("daily", daily_items, daily_pages)):
+        for (region_name, region_url), page_html in zip(work_items, kind_pages):
+            try:
+                if isinstance(page_html, Exception):
+                    raise page_html
+                parsed = _parse_with_cache(
+                    cache, region_url, kind, partial(parsers[kind], page_html, region_name, region_url)
+                )
+            except Exception as exc:
+                failures.append(_failure(kind, region_name, region_url, exc))
+                continue
+            checkpoint.save(kind, region_url, parsed)
+    if cache is not None:
+        cache.save()
+
+def report_failures(failures):
+    """
+    Prints the pages that could not be scraped, so a partial run is visible.
+    """
+    if not failures:
+        return
+    print(f"Failed to scrape {len(failures)} pages, rerun to retry them:")
+    for failure in failures:
+        print(f"  {failure['location']} ({failure['kind']}): {failure['error'].splitlines()[0]}")
+
+def scrape_weather(num_workers=None, extraction=DEFAULT_EXTRACTION, backend=None, use_cache=True, cache_ttl=None,
+                   locations_path=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, resume=True,
+                   failures=None):
+    """
+    Scrapes every location of the registry and returns the raw (weekly, daily) frames.
+    The HTTP backend keeps an on-disk page cache unless use_cache is False;
+    cache_ttl defaults to $PAGE_CACHE_TTL or DEFAULT_TTL seconds.
+
+    Each page gets `timeout` seconds and `retries` retries. Locations that still
+    fail are left out of the frames, reported and appended to failures when given.
+    With resume, finished pages are checkpointed to disk and a rerun only scrapes
+    the ones the last run did not finish; the checkpoint is dropped once every page succeeded.
+    """
+    num_workers = get_num_workers(num_workers)
+    backend = get_backend(backend)
+    failures = [] if failures is None else failures
+
+    locations = load_locations(locations_path)
+    weekly_work = weekly_items(locations)
+    daily_work = daily_items(locations)
+
+    checkpoint = ScrapeCheckpoint(DEFAULT_CHECKPOINT_PATH if resume else None)
+    weekly_todo = [item for item in weekly_work if not checkpoint.has("weekly", item[1])]
+    daily_todo = [item for item in daily_work if not checkpoint.has("daily", item[1])]
+    resumed = len(weekly_work) + len(daily_work) - len(weekly_todo) - len(daily_todo)
+    if resumed:
+        print(f"Resuming from the checkpoint, {resumed} pages were already scraped")
+
+    if (weekly_todo or daily_todo) and backend == "http":
+        cache = None
+        if use_cache:
+            if cache_ttl is None:
+                cache_ttl = float(os.environ.get("PAGE_CACHE_TTL", DEFAULT_TTL))
+            cache = PageCache(ttl=cache_ttl)
+        _scrape_with_http(weekly_todo, daily_todo, num_workers, checkpoint, failures, cache, timeout, retries)
+    elif weekly_todo or daily_todo:
+        num_workers = min(num_workers, max(len(weekly_todo), len(daily_todo), 1))
+        _scrape_with_selenium(weekly_todo, daily_todo, num_workers, extraction, checkpoint, failures, timeout, retries)
 
-    # scraping weekly weather data
     all_weather_data = []
-    for region, city in regions_and_cities:
-        region_name = f"{city.capitalize()} ({region})"
-        region_url = f"https://exanak.am/en/7-days-weather-forecast/{region.lower()}/{city.lower()}"
-        weekly_weather_data = scrape_weekly_weather(driver, region_name, region_url)
-        if weekly_weather_data is not None:
+    for region, city, (_, region_url) in zip(locations['Region'], locations['City'], weekly_work):
+        if checkpoint.has("weekly", region_url):
+            weekly_weather_data = pd.DataFrame(checkpoint.get("weekly", region_url), columns=list(WEEKLY_CELL_XPATHS))
             weekly_weather_data["Region"] = region
             weekly_weather_data["City"] = city
             all_weather_data.append(weekly_weather_data)
 
+    all_daily_info = [
+        _build_daily_info(region_name, checkpoint.get("daily", region_url))
+        for region_name, region_url in daily_work if checkpoint.has("daily", region_url)
+    ]
+
+    report_failures(failures)
+    if not all_weather_data and not all_daily_info and failures:
+        raise RuntimeError(f"Every location failed to scrape, first error: {failures[0]['error']}")
+    if not failures:
+        checkpoint.clear()
+
+    # a kind whose every page failed comes back empty but with its columns, like the other kind
+    weekly_columns = ["Region", "City"] + list(WEEKLY_CELL_XPATHS)
     if all_weather_data:
-        combined_weather_data = pd.concat(all_weather_data, ignore_index=True)
-        column_order = ["Region", "City"] + [col for col in combined_weather_data.columns if col not in ["Region", "City"]]
-        combined_weather_data = combined_weather_data[column_order]
-        combined_weather_data.to_csv(os.path.join(output_dir, "weekly-weather-data.csv"), index=False, quoting=1, sep=",")
-        print(f"Saved weekly weather data to {os.path.join(output_dir, 'weekly-weather-data.csv')}")
-
-    # scraping daily weather data
-    all_daily_info = []
-    for region_name, region_url in current_weather_urls:
-        daily_info = scrape_daily_info(driver, region_name, region_url)
-        all_daily_info.append(daily_info)
-
-    daily_info_df = pd.DataFrame(all_daily_info)
-    daily_info_df.to_csv(os.path.join(output_dir, "daily-weather-data.csv"), index=False)
-    print(f"Saved daily weather data to {os.path.join(output_dir, 'daily-weather-data.csv')}")
-
-    driver.quit()
\ No newline at end of file
+        combined_weather_data = pd.concat(all_weather_data, ignore_index=True)[weekly_columns]
+    else:
+        combined_weather_data = pd.DataFrame(columns=weekly_columns)
+
+    daily_info_df = pd.DataFrame(all_daily_info, columns=["Region", "City"] + list(DAILY_INFO_XPATHS))
+    return combined_weather_data, daily_info_df
+
+def save_raw_tables(weekly_df, daily_df, storage_format=None, output_dir="outputs/raw"):
+    """
+    Writes the raw weekly and daily tables. An empty table is written too, so the
+    stages after the scrape never pick up the rows of an earlier run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    weekly_path = table_path(output_dir, "weekly-weather-data", storage_format)
+    write_table(weekly_df, weekly_path, quoting=1, sep=",")
+    print(f"Saved weekly weather data to {weekly_path}")
+
+    daily_path = table_path(output_dir, "daily-weather-data", storage_format)
+    write_table(daily_df, daily_path)
+    print(f"Saved daily weather data to {daily_path}")
+
+    for kind, df in (("weekly", weekly_df), ("daily", daily_df)):
+        if df.empty:
+            print(f"No {kind} page was scraped, the {kind} tables and charts are not updated")
+
+def run_scraper(num_workers=None, extraction=DEFAULT_EXTRACTION, backend=None, use_cache=True, cache_ttl=None,
+                storage_format=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, resume=True):
+    """
+    Scrapes every location and writes the raw weekly and daily tables.
+    """
+    weekly_df, daily_df = scrape_weather(
+        num_workers, extraction, backend, use_cache, cache_ttl, timeout=timeout, retries=retries, resume=resume
+    )
+    save_raw_tables(weekly_df, daily_df, storage_format)
@@ -0,0 +1,177 @@
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+import instrumentation
+
+# table formats, picked by file extension
+FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+DEFAULT_FORMAT = "csv"
+
+# parquet tables are written as a dataset partitioned by scrape day and region
+PARTITION_COLUMNS = ["Scrape Day", "Region"]
+# original row position, so partitioned tables read back in the order they were written
+ROW_ORDER_COLUMN = "__row"
+
+def get_format(storage_format=None):
+    """
+    Resolves the table format from the argument, the WEATHER_STORAGE_FORMAT
+    environment variable or DEFAULT_FORMAT, in that order.
+    """
+    if storage_format is None:
+        storage_format = os.environ.get("WEATHER_STORAGE_FORMAT", DEFAULT_FORMAT)
+    if storage_format not in FORMATS:
+        raise ValueError(f"Unknown storage format: {storage_format}")
+    return storage_format
+
+def table_path(directory, name, storage_format=None):
+    return os.path.join(directory, name + FORMATS[get_format(storage_format)])
+
+def format_of(path):
+    extension = os.path.splitext(str(path))[1].lower()
+    for storage_format, format_extension in FORMATS.items():
+        if extension == format_extension:
+            return storage_format
+    if extension == ".arrow":
+        return "feather"
+    raise ValueError(f"Cannot tell the storage format of {path}")
+
+def atomic_write(path, text):
+    """
+    Writes text to path through a temp file moved over it, so readers, other
+    processes included, never see a half-written file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    # partition values are always read back as plain strings
+    schema = pa.schema([(col, pa.string()) for col in PARTITION_COLUMNS])
+    return ds.partitioning(schema, flavor="hive")
+
+def write_table(df, path, partitioned=True, **csv_options):
+    """
+    Writes df to path in the format given by its extension.
+    Parquet tables are partitioned by scrape day and region, replacing today's
+    partition on a re-run; csv_options are passed on to DataFrame.to_csv.
+    """
+    storage_format = format_of(path)
+    written_path = path
+    if storage_format == "csv":
+        df.to_csv(path, index=False, **csv_options)
+    elif storage_format == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    elif partitioned and "Region" in df.columns:
+        scrape_day = datetime.now().strftime("%Y-%m-%d")
+        # earlier days stay in the dataset but were not written now
+        written_path = os.path.join(path, f"{PARTITION_COLUMNS[0]}={scrape_day}")
+        # a re-run replaces the whole day, so regions it lacks do not keep the rows of an earlier run
+        shutil.rmtree(written_path, ignore_errors=True)
+        df = df.assign(**{
+            PARTITION_COLUMNS[0]: scrape_day,
+            ROW_ORDER_COLUMN: range(len(df)),
+        })
+        if df.empty:
+            # an empty table still claims the day, so reads do not fall back to an earlier one
+            os.makedirs(written_path, exist_ok=True)
+            empty = df.drop(columns=PARTITION_COLUMNS)
+            empty = empty.astype({col: str for col in empty.columns if empty[col].dtype == object})
+            empty.to_parquet(os.path.join(written_path, "part-0.parquet"), index=False)
+            instrumentation.count(bytes_written=instrumentation.path_size(written_path))
+            return
+        df.to_parquet(
+            path,
+            index=False,
+            partition_cols=PARTITION_COLUMNS,
+            existing_data_behavior="overwrite_or_ignore",
+            # fixed file names, so rewriting the same rows leaves the dataset byte for byte the same
+            basename_template="part-{i}.parquet",
+        )
+    else:
+        df.to_parquet(path, index=False)
+    instrumentation.count(rows_out=len(df), bytes_written=instrumentation.path_size(written_path))
+
+def is_empty_table(path):
+    """
+    True when the table at path has no rows, e.g. after a scrape in which every page of its kind failed.
+    """
+    if format_of(path) == "csv":
+        try:
+            return pd.read_csv(path, nrows=1).empty
+        except pd.errors.EmptyDataError:
+            return True
+    return _read_table(path, None, None, False).empty
+
+def iter_table(path, chunksize=None, count=True):
+    """
+    Yields a table in chunks of chunksize rows (CSV only), or whole.
+    """
+    if chunksize is not None and format_of(path) == "csv":
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            if count:
+                instrumentation.count(rows_in=len(chunk))
+            yield chunk
+    else:
+        yield read_table(path, count=count)
+
+def read_table(path, columns=None, parse_dates=None, all_days=False, count=True):
+    """
+    Reads a table written by write_table, loading only the given columns.
+    For partitioned parquet only the latest scrape day is read unless all_days is set.
+    The rows count as input of the current stage unless count is False, as for
+    the aggregates, which are bookkeeping rather than the data the stage works on.
+    """
+    df = _read_table(path, columns, parse_dates, all_days)
+    if count:
+        instrumentation.count(rows_in=len(df))
+    return df
+
+def _read_table(path, columns, parse_dates, all_days):
+    storage_format = format_of(path)
+    if storage_format == "csv":
+        df = pd.read_csv(path, usecols=columns, parse_dates=parse_dates)
+        return df if columns is None else df[columns]
+    if storage_format == "feather":
+        return pd.read_feather(path, columns=columns)
+    if not os.path.isdir(path):
+        return pd.read_parquet(path, columns=columns)
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning())
+    row_filter = None
+    if not all_days:
+        days = [
+            entry.split("=", 1)[1] for entry in os.listdir(path)
+            if entry.startswith(f"{PARTITION_COLUMNS[0]}=")
+        ]
+        if days:
+            row_filter = ds.field(PARTITION_COLUMNS[0]) == max(days)
+    read_columns = None
+    if columns is not None:
+        read_columns = columns + [ROW_ORDER_COLUMN]
+        if all_days and PARTITION_COLUMNS[0] not in columns:
+            read_columns.append(PARTITION_COLUMNS[0])
+    df = dataset.to_table(columns=read_columns, filter=row_filter).to_pandas()
+    sort_columns = [PARTITION_COLUMNS[0], ROW_ORDER_COLUMN] if all_days else [ROW_ORDER_COLUMN]
+    df = df.sort_values(sort_columns, kind="stable").drop(columns=[ROW_ORDER_COLUMN]).reset_index(drop=True)
+
+    if columns is not None:
+        return df[columns]
+    # partition columns come back last, moving 'Region' back to the front where it was written
+    if not all_days:
+        df = df.drop(columns=[PARTITION_COLUMNS[0]])
+    front = [col for col in PARTITION_COLUMNS[1:] if col in df.columns]
+    return df[front + [col for col in df.columns if col not in front]]
@@ -0,0 +1,41 @@
+import os
+import threading
+import http.server
+import pytest
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+# Serving the saved pages from a local HTTP server, so no network is needed.
+# Paths under /flaky/ answer 503 once before serving the page.
+@pytest.fixture
+def fixture_server():
+    failures = {"/flaky/weekly_yerevan.html": 1}
+    requests_log = []
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=FIXTURES_DIR, **kwargs)
+
+        def do_GET(self):
+            if failures.get(self.path, 0) > 0:
+                failures[self.path] -= 1
+                self.send_error(503)
+                return
+            self.path = self.path.replace("/flaky", "")
+            super().do_GET()
+
+        def log_request(self, code="-", size="-"):
+            requests_log.append((self.path, int(code)))
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests_log = requests_log
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,76 @@
+import os
+import pandas as pd
+from aggregates import load_aggregates, rollup, snapshot_stats, summary, update_aggregates, window
+from weekly_plotter import weekly_figure_tasks
+
+
+def weekly_snapshot(scraped_date, precipitation):
+    return pd.DataFrame({
+        "Scraped Date": scraped_date,
+        "Region": ["Yerevan", "Yerevan", "Shirak", "Shirak"],
+        "City": ["Yerevan", "Yerevan", "Gyumri", "Gyumri"],
+        "Date": pd.to_datetime(["2026-01-12", "2026-01-13"] * 2),
+        "Precipitation": precipitation,
+        "Snow": [0.0, 0.0, 2.5, 1.0],
+        "High_Temp": [5.0, 7.0, -2.0, 0.0],
+        "Low_Temp": [-1.0, 2.0, -6.0, -5.0],
+        "Avg_Temp": [2.0, 4.5, -4.0, -2.5],
+    })
+
+
+# Testing that snapshots are added incrementally and roll up to the same numbers as the full history
+def test_update_aggregates_matches_full_history(tmpdir):
+    path = str(tmpdir.join("weekly-aggregates.csv"))
+    first = weekly_snapshot("2026-01-11 09:00:00", [0.0, 1.2, 0.4, 0.0])
+    second = weekly_snapshot("2026-01-12 09:00:00", [0.5, 0.0, 3.0, 1.0])
+
+    update_aggregates(snapshot_stats(first), path)
+    update_aggregates(snapshot_stats(second), path)
+    first_day = os.path.join(path, "2026-01-11.csv")
+    modified = os.path.getmtime(first_day)
+    # re-processing a snapshot replaces its statistics instead of counting it twice, and leaves other days alone
+    assert update_aggregates(snapshot_stats(second), path) == 1
+    assert sorted(os.listdir(path)) == ["2026-01-11.csv", "2026-01-12.csv"]
+    assert os.path.getmtime(first_day) == modified
+
+    stats = load_aggregates(path)
+    assert len(stats) == 4
+
+    history = pd.concat([first, second])
+    regions = summary(load_aggregates(path), "Region").set_index("Region")
+    expected = history.groupby("Region")["Precipitation"].agg(["sum", "mean", "max"])
+    assert regions["Precipitation_sum"].tolist() == expected["sum"].tolist()
+    assert regions["Precipitation_mean"].tolist() == expected["mean"].tolist()
+    assert regions["Precipitation_max"].tolist() == expected["max"].tolist()
+    assert regions["High_Temp_min"].tolist() == [-2.0, 5.0]
+
+    latest = rollup(window(stats, snapshots=1), "City").set_index("City")
+    assert latest["Precipitation_sum"].tolist() == [4.0, 0.5]
+    assert len(window(stats, days=0.5)) == 2
+
+
+# Testing that the bar and pie charts are drawn from the aggregates they are given
+def test_weekly_tasks_use_stored_aggregates(tmpdir):
+    df = weekly_snapshot("2026-01-12 09:00:00", [0.5, 0.0, 3.0, 1.0]).assign(
+        Latitude=40.0, Longitude=44.0, Forecast="Sunny"
+    )
+    aggregates = pd.concat([
+        snapshot_stats(weekly_snapshot("2026-01-11 09:00:00", [9.0, 9.0, 9.0, 9.0])),
+        snapshot_stats(df),
+    ])
+
+    tasks = {os.path.basename(task[2]): task for task in weekly_figure_tasks(df, str(tmpdir), aggregates=aggregates)}
+
+    totals = tasks["precipitation_snow_by_city.html"][1]
+    assert totals.to_dict("list") == {"City": ["Gyumri", "Yerevan"], "Precipitation": [4.0, 0.5], "Snow": [3.5, 0.0]}
+
+
+# Testing that a store kept in a single file is moved over to one file per day
+def test_update_aggregates_migrates_single_file_store(tmpdir):
+    path = str(tmpdir.join("weekly-aggregates.csv"))
+    snapshot_stats(weekly_snapshot("2026-01-11 09:00:00", [0.0, 1.2, 0.4, 0.0])).to_csv(path, index=False)
+
+    update_aggregates(snapshot_stats(weekly_snapshot("2026-01-12 09:00:00", [0.5, 0.0, 3.0, 1.0])), path)
+
+    assert sorted(os.listdir(path)) == ["2026-01-11.csv", "2026-01-12.csv"]
+    assert load_aggregates(path)["Scraped Date"].dt.day.tolist() == [11, 11, 12, 12]
@@ -0,0 +1,43 @@
+from benchmarks.run import STARTUP_UNUSED, compare, startup_imports
+from benchmarks.synthetic import make_locations, make_raw_daily, make_raw_weekly
+from daily_processor import clean_daily_frame
+from weekly_processor import clean_weekly_frame
+
+
+# Testing that the synthetic raw tables go through the cleaners like scraped ones
+def test_synthetic_tables_clean_without_gaps(tmpdir, monkeypatch):
+    locations = make_locations(20)
+    path = tmpdir.join("locations.csv")
+    locations.to_csv(str(path), index=False)
+    monkeypatch.setenv("WEATHER_LOCATIONS", str(path))
+
+    daily = clean_daily_frame(make_raw_daily(500, locations))
+    weekly = clean_weekly_frame(make_raw_weekly(700, locations))
+
+    assert len(daily) == 500 and len(weekly) == 700
+    assert daily[["Temperature", "Humidity", "Visibility (km)", "Latitude"]].notnull().all().all()
+    assert weekly[["High_Temp", "Precipitation", "Snow", "Longitude"]].notnull().all().all()
+    assert weekly["Date"].nunique() == 7
+
+
+# Testing that only results beyond the tolerance (and above the noise floor) count as regressions
+def test_compare_flags_regressions():
+    baseline = {
+        "clean_daily@1000": {"seconds": 1.0, "peak_mb": 10.0},
+        "plot_daily@1000": {"seconds": 0.001, "peak_mb": 0.1},
+    }
+    results = {
+        "clean_daily@1000": {"seconds": 1.6, "peak_mb": 12.0},
+        "plot_daily@1000": {"seconds": 0.01, "peak_mb": 0.5},
+        "clean_weekly@1000": {"seconds": 9.0, "peak_mb": 90.0},
+    }
+
+    assert compare(results, baseline, tolerance=1.5) == [("clean_daily@1000", "seconds", 1.0, 1.6)]
+
+
+# Testing that a partial run does not import the libraries only other stages need
+def test_process_startup_skips_unused_imports():
+    loaded = startup_imports("process")
+
+    assert "pandas" in loaded
+    assert not set(loaded) & set(STARTUP_UNUSED["process"])
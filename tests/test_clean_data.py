@@ -1,8 +1,10 @@
 import pytest
 import os
+import re
+import numpy as np
 import pandas as pd
-from daily_processor import clean_daily_weather_data
-from weekly_processor import clean_weekly_weather_data
+from daily_processor import clean_daily_frame, clean_daily_weather_data, parse_numeric
+from weekly_processor import clean_weekly_frame, clean_weekly_weather_data
 
 # Fixture for daily weather data
 @pytest.fixture
@@ -96,4 +98,90 @@ def test_clean_weekly_weather_data(raw_and_clean_weekly_data_file):
     # Check processed data
     assert df_clean['High_Temp'].iloc[0] == 5.0
     assert df_clean['Low_Temp'].iloc[0] == 1.0
-    assert df_clean['Avg_Temp'].iloc[0] == 3.0
\ No newline at end of file
+    assert df_clean['Avg_Temp'].iloc[0] == 3.0
+
+# Testing that the vectorized numeric parser matches the original per-row parsing
+def test_parse_numeric_matches_row_wise_parsing():
+    values = pd.Series(["22C", "+3°C", "-4.5°C", "65%", "5 km/h", "1020 mb", "10.5 km", "abc", "N/A", "1,020 mb"])
+
+    def legacy_parse(x):
+        return float(re.sub(r'[^\d\.-]', '', x)) if re.search(r'[-+]?\d*\.?\d+', x) else np.nan
+
+    expected = values.astype(str).apply(legacy_parse)
+    parsed = parse_numeric(values)
+
+    pd.testing.assert_series_equal(parsed, expected, check_names=False)
+
+
+# Testing that missing readings are filled with the column mean
+def test_clean_daily_weather_data_fills_missing_with_mean(raw_and_clean_daily_data_file):
+    raw_data_file_path, clean_data_file_path = raw_and_clean_daily_data_file
+    with open(raw_data_file_path, "a") as f:
+        f.write("Gavar,N/A,75%,3 km/h,1010 mb,1300 m,10C,9 km,06:40,18:20,11:40,06:55,18:10,11:15\n")
+
+    clean_daily_weather_data(raw_data_file_path, clean_data_file_path)
+    cleaned_df = pd.read_csv(clean_data_file_path)
+
+    assert cleaned_df['Temperature'].tolist() == [22.0, 18.0, 20.0]
+
+
+# Testing that chunked cleaning gives the same result as the in-memory path
+def test_clean_daily_weather_data_chunked_matches_in_memory(raw_and_clean_daily_data_file, tmpdir):
+    raw_data_file_path, clean_data_file_path = raw_and_clean_daily_data_file
+    with open(raw_data_file_path, "a") as f:
+        f.write("Gavar,N/A,75%,3 km/h,1010 mb,,10C,9 km,06:40,18:20,11:40,06:55,18:10,\n")
+        f.write("Kapan,25C,,7 km/h,1012 mb,1200 m,14C,,06:20,18:40,12:20,07:10,19:30,12:20\n")
+    chunked_path = tmpdir.join("cleaned_chunked.csv")
+
+    clean_daily_weather_data(raw_data_file_path, clean_data_file_path)
+    clean_daily_weather_data(raw_data_file_path, chunked_path, chunksize=1)
+
+    expected = pd.read_csv(clean_data_file_path).drop(columns=['Scraped Date'])
+    chunked = pd.read_csv(chunked_path).drop(columns=['Scraped Date'])
+    pd.testing.assert_frame_equal(chunked, expected)
+
+
+def test_clean_weekly_weather_data_chunked_matches_in_memory(raw_and_clean_weekly_data_file, tmpdir):
+    raw_data_path, clean_data_path = raw_and_clean_weekly_data_file
+    chunked_path = tmpdir.join("clean_weekly_chunked.csv")
+
+    clean_weekly_weather_data(raw_data_path, clean_data_path)
+    clean_weekly_weather_data(raw_data_path, chunked_path, chunksize=2)
+
+    expected = pd.read_csv(clean_data_path)
+    pd.testing.assert_frame_equal(pd.read_csv(chunked_path), expected)
+    assert expected['Precipitation'].notnull().all()
+
+
+# Testing that forecast years follow each row's scrape time across New Year
+def test_clean_weekly_frame_infers_year_across_new_year():
+    raw = pd.DataFrame({
+        'City': ['Yerevan'] * 4,
+        'Date': ['Tue 30.12', 'Thu 01.01', 'Wed 31.12', 'Fri 02.01'],
+        'Hi/Lo': ['5°/-1°', '-2°/-8°', '3°/0°', '+1°/-3°'],
+        'Precipitation': ['0.4', None, '0', '1.2 mm'],
+        'Snow': [0.0, 2.5, None, 0.0],
+        'Scraped Date': ['2025-12-29 09:00:00', '2025-12-29 09:00:00', '2026-01-02 09:00:00', '2026-01-02 09:00:00'],
+    })
+
+    df_clean = clean_weekly_frame(raw)
+
+    assert df_clean['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2025-12-30', '2026-01-01', '2025-12-31', '2026-01-02']
+    assert df_clean['High_Temp'].tolist() == [5.0, -2.0, 3.0, 1.0]
+    assert df_clean['Low_Temp'].tolist() == [-1.0, -8.0, 0.0, -3.0]
+    assert df_clean['Precipitation'].tolist()[-1] == pytest.approx(1.2)
+
+
+# Testing that the UV index is parsed like the other readings instead of being cast from text
+def test_clean_daily_frame_parses_uv_index():
+    raw = pd.DataFrame({
+        "City": ["Yerevan", "Ashtarak"], "Weather": ["22C", "18C"], "Humidity": "65%", "Wind": "5 km/h",
+        "Pressure": "1020 mb", "UV Index": ["3", "n/a"], "Ceiling": "1500 m", "Dew Point": "15C", "Visibility": "10 km",
+        "Sunrise": "06:30", "Sunset": "18:30", "Day Duration": "12:00", "Moonrise": "07:00", "Moonset": "19:00",
+        "Moon Duration": "12:00",
+    })
+
+    clean = clean_daily_frame(raw)
+
+    assert clean["UV Index"].dtype == "float32"
+    assert clean["UV Index"].iloc[0] == 3 and pd.isna(clean["UV Index"].iloc[1])
@@ -0,0 +1,69 @@
+import pytest
+from functools import partial
+from dag import run_dag, plan_levels, format_plan
+
+
+def touch(path):
+    with open(path, "w") as f:
+        f.write("done")
+
+
+def fail():
+    raise RuntimeError("weekly page layout changed")
+
+
+# Testing that a failing branch does not block the independent one
+def test_run_dag_isolates_failures(tmpdir):
+    graph = {
+        "scrape": (partial(touch, str(tmpdir.join("scrape"))), []),
+        "weekly_process": (fail, ["scrape"]),
+        "weekly_plot": (partial(touch, str(tmpdir.join("weekly_plot"))), ["weekly_process"]),
+        "daily_process": (partial(touch, str(tmpdir.join("daily_process"))), ["scrape"]),
+        "daily_plot": (partial(touch, str(tmpdir.join("daily_plot"))), ["daily_process"]),
+    }
+
+    results = run_dag(graph, max_workers=2)
+
+    assert {name: result["status"] for name, result in results.items()} == {
+        "scrape": "ok",
+        "weekly_process": "failed",
+        "weekly_plot": "skipped",
+        "daily_process": "ok",
+        "daily_plot": "ok",
+    }
+    assert "weekly page layout changed" in results["weekly_process"]["error"]
+    assert tmpdir.join("daily_plot").check()
+    assert not tmpdir.join("weekly_plot").check()
+
+
+def test_dry_run_prints_plan_without_running(tmpdir, capsys):
+    graph = {
+        "scrape": (partial(touch, str(tmpdir.join("scrape"))), []),
+        "daily_process": (partial(touch, str(tmpdir.join("daily"))), ["scrape"]),
+        "weekly_process": (partial(touch, str(tmpdir.join("weekly"))), ["scrape"]),
+    }
+
+    assert run_dag(graph, dry_run=True) == {}
+    assert capsys.readouterr().out.strip() == format_plan(graph)
+    assert plan_levels(graph) == [["scrape"], ["daily_process", "weekly_process"]]
+    assert not tmpdir.join("scrape").check()
+
+
+def test_plan_levels_rejects_cycles():
+    with pytest.raises(ValueError):
+        plan_levels({"a": (fail, ["b"]), "b": (fail, ["a"])})
+
+
+# Testing that every stage that ran reports its instrumentation metrics
+def test_run_dag_reports_stage_metrics(tmpdir):
+    graph = {
+        "scrape": (partial(touch, str(tmpdir.join("scrape"))), []),
+        "daily_process": (fail, ["scrape"]),
+        "daily_plot": (partial(touch, str(tmpdir.join("plot"))), ["daily_process"]),
+    }
+
+    results = run_dag(graph, max_workers=1)
+
+    assert results["scrape"]["metrics"]["wall_seconds"] >= 0
+    assert "cpu_seconds" in results["daily_process"]["metrics"]
+    assert results["daily_plot"]["metrics"] == {"stage": "daily_plot"}
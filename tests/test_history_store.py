@@ -0,0 +1,96 @@
+import os
+import pandas as pd
+from daily_processor import clean_daily_frame
+from history_store import HistoryStore, daily_history, weekly_history
+
+
+def make_snapshot(scraped_date, temperatures):
+    return pd.DataFrame({
+        "City": list(temperatures),
+        "Scraped Date": scraped_date,
+        "Temperature": list(temperatures.values()),
+        "Humidity": 50.0,
+    })
+
+
+# Testing that re-appending the same snapshot does not duplicate rows
+def test_append_deduplicates_on_key(tmpdir):
+    store = HistoryStore(str(tmpdir), time_col="Scraped Date", key_cols=["City", "Scraped Date"])
+    snapshot = make_snapshot("2026-01-12 10:00:00", {"Yerevan": 3.0, "Gyumri": -4.0})
+
+    assert store.append(snapshot) == 2
+    assert store.append(snapshot) == 0
+    assert store.append(make_snapshot("2026-01-12 11:00:00", {"Yerevan": 4.0})) == 1
+
+    # a fresh store instance reads the same index from disk
+    reopened = HistoryStore(str(tmpdir), time_col="Scraped Date", key_cols=["City", "Scraped Date"])
+    assert reopened.cities() == ["Gyumri", "Yerevan"]
+    assert len(reopened.query()) == 3
+
+
+# Testing city, time range and column selection
+def test_query_filters_cities_time_and_columns(tmpdir):
+    store = HistoryStore(str(tmpdir), time_col="Scraped Date", key_cols=["City", "Scraped Date"])
+    for hour, temperature in [(8, 1.0), (9, 2.0), (10, 3.0)]:
+        store.append(make_snapshot(f"2026-01-12 {hour:02d}:00:00", {"Yerevan": temperature, "Kapan": temperature + 5}))
+
+    df = store.query(cities=["Yerevan"], start="2026-01-12 09:00", end="2026-01-12 10:00", columns=["Temperature"])
+
+    assert list(df.columns) == ["Temperature"]
+    assert df["Temperature"].tolist() == [2.0, 3.0]
+    # nothing in range still returns the requested columns only
+    assert list(store.query(start="2027-01-01", columns=["Temperature"]).columns) == ["Temperature"]
+
+    # files outside the range are pruned by the per-city index
+    assert len(list(store._partitions("Yerevan", pd.Timestamp("2026-01-12 09:30"), None))) == 1
+    assert os.path.exists(os.path.join(str(tmpdir), "index.json"))
+
+
+# Testing that re-cleaned daily snapshots keep their own scrape times and all land in the history
+def test_append_cleaned_daily_history(tmpdir):
+    raw = pd.DataFrame({
+        "Region": "Yerevan",
+        "City": "Yerevan",
+        "Scraped Date": ["2026-01-10 09:00:00", "2026-01-11 09:00:00", "2026-01-12 09:00:00"],
+        "Weather": ["1C", "2C", "3C"],
+        "Humidity": "60%", "Wind": "5 km/h", "Pressure": "1020 mb", "Ceiling": "1500 m", "Dew Point": "-4C",
+        "Visibility": "10 km", "Sunrise": "07:40", "Sunset": "17:20", "Day Duration": "9:40",
+        "Moonrise": "10:00", "Moonset": "22:00", "Moon Duration": "12:00",
+    })
+    store = daily_history(str(tmpdir))
+
+    assert store.append(clean_daily_frame(raw)) == 3
+    assert store.query(columns=["Temperature"])["Temperature"].tolist() == [1.0, 2.0, 3.0]
+
+
+# Testing that a weekly append only reads the files of its own snapshot and earlier days are compacted
+def test_weekly_append_reads_only_its_snapshot(tmpdir, monkeypatch):
+    store = weekly_history(str(tmpdir))
+    for day in range(1, 6):
+        for hour in (9, 15):
+            scraped = pd.Timestamp(f"2026-01-{day:02d} {hour:02d}:00:00")
+            store.append(pd.DataFrame({
+                "City": "Yerevan",
+                "Scraped Date": scraped,
+                "Date": pd.date_range(scraped.normalize(), periods=7),
+                "High_Temp": float(day),
+            }))
+    # one file per earlier day, the current day keeps its two snapshots
+    assert len(store.index["Yerevan"]) == 6
+    assert len(store.query()) == 70
+
+    read = []
+    read_parquet = pd.read_parquet
+    monkeypatch.setattr(pd, "read_parquet", lambda path, **kwargs: read.append(path) or read_parquet(path, **kwargs))
+    scraped = pd.Timestamp("2026-01-05 21:00:00")
+    new = pd.DataFrame({"City": "Yerevan", "Scraped Date": scraped,
+                        "Date": pd.date_range(scraped.normalize(), periods=7), "High_Temp": 5.0})
+    assert store.append(new) == 7
+    # forecast weeks of every earlier snapshot overlap, yet none of their files is read
+    assert read == []
+    assert store.append(new) == 0
+    assert len(read) == 1
+
+    assert store.compact() == 2
+    assert len(store.index["Yerevan"]) == 5
+    assert len(store.query()) == 77
@@ -0,0 +1,102 @@
+import os
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+import instrumentation
+from http_fetcher import fetch_pages
+from daily_processor import run_daily_processor
+from storage import read_table, write_table
+from validation import run_validation
+
+
+# Testing that a stage counts the rows and bytes going through the storage layer
+def test_stage_counts_rows_and_bytes(tmpdir):
+    df = pd.DataFrame({"City": ["Yerevan", "Gyumri", "Kapan"], "Temperature": [22.0, 18.0, 25.0]})
+    path = str(tmpdir.join("table.csv"))
+
+    with instrumentation.stage("process") as metrics:
+        write_table(df, path)
+        read_table(path)
+    # outside a stage nothing is counted
+    read_table(path)
+
+    assert metrics["rows_in"] == 3
+    assert metrics["rows_out"] == 3
+    assert metrics["bytes_written"] == os.path.getsize(path)
+    assert metrics["wall_seconds"] >= 0 and metrics["cpu_seconds"] >= 0
+    assert metrics["peak_rss_mb"] > 0
+
+
+# Testing that a stage counts the rows of its snapshot, not those of the aggregates and history it also reads
+def test_stage_rows_in_is_the_snapshot(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    os.makedirs("outputs/raw")
+    header = "Region,City,Scraped Date,Weather,Humidity,Wind,Pressure,Ceiling,Dew Point,Visibility,Sunrise,Sunset,"
+    header += "Day Duration,Moonrise,Moonset,Moon Duration\n"
+    readings = "22C,65%,5 km/h,1020 mb,1500 m,15C,10 km,06:30,18:30,12:00,07:00,19:00,12:00\n"
+
+    for day in (11, 12):
+        with open("outputs/raw/daily-weather-data.csv", "w") as f:
+            f.write(header + "".join(
+                f"{region},{city},2026-01-{day} 09:00:00,{readings}"
+                for region, city in [("Yerevan", "Yerevan"), ("Lori", "Vanadzor"), ("Shirak", "Gyumri")]
+            ))
+        with instrumentation.stage("validate_daily") as validate:
+            run_validation("csv", report_path=None, kind="daily")
+        with instrumentation.stage("daily_process") as process:
+            run_daily_processor(storage_format="csv")
+
+        # the second snapshot is checked against, and added to, the stored statistics of the first
+        assert validate["rows_in"] == 3
+        assert process["rows_in"] == 3
+
+
+# Testing that the peak RSS of a stage is its own, not the high-water mark an earlier stage left
+@pytest.mark.skipif(not instrumentation._reset_peak_rss(), reason="needs /proc/self/clear_refs")
+def test_stage_peak_rss_is_per_stage():
+    with instrumentation.stage("load", reset_rss=True) as heavy:
+        np.ones(50_000_000)
+    with instrumentation.stage("plot", reset_rss=True) as light:
+        pass
+    # without reset_rss the process-wide high-water mark is left alone
+    with instrumentation.stage("plot") as untouched:
+        pass
+
+    assert heavy["rss_delta_mb"] > 300
+    assert light["rss_delta_mb"] < 50
+    assert light["peak_rss_mb"] < heavy["peak_rss_mb"] - 300
+    assert "rss_delta_mb" not in untouched
+
+
+def test_stage_records_scraped_urls(fixture_server):
+    urls = [f"{fixture_server.url}/weekly_yerevan.html", f"{fixture_server.url}/flaky/weekly_yerevan.html"]
+
+    with instrumentation.stage("scrape") as metrics:
+        fetch_pages(urls, backoff=0.01)
+
+    records = {record["url"]: record for record in metrics["urls"]}
+    assert records[urls[0]]["status"] == "fetched"
+    assert records[urls[0]]["bytes"] > 0
+    assert records[urls[1]]["attempts"] == 2
+
+
+# Testing the profiler hook and the JSON and Prometheus exports
+def test_report_exports_and_profile(tmpdir):
+    with instrumentation.stage("daily_plot", profiler="cprofile", profile_dir=str(tmpdir)) as metrics:
+        sum(range(1000))
+    metrics["status"] = "ok"
+    report = instrumentation.build_report([metrics], datetime.now())
+
+    assert os.path.exists(metrics["profile"])
+
+    report_path = str(tmpdir.join("run-report.json"))
+    instrumentation.write_report(report, report_path)
+    with open(report_path) as f:
+        assert json.load(f)["stages"][0]["stage"] == "daily_plot"
+
+    text = instrumentation.format_prometheus(report)
+    assert "weather_run_success 1" in text
+    assert 'weather_stage_success{stage="daily_plot"} 1' in text
+    assert f'weather_stage_wall_seconds{{stage="daily_plot"}} {metrics["wall_seconds"]}' in text
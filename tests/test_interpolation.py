@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from interpolation import grid_axes, idw_weights, interpolate, interpolate_field
+
+STATIONS = ((40.1872, 44.5152), (40.7929, 43.8465), (39.2076, 46.4058))
+
+
+# Testing that IDW stays within the readings, hits stations exactly and skips missing readings
+def test_idw_interpolation():
+    weights = idw_weights(STATIONS, resolution=0.1)
+    lats, lons = grid_axes(resolution=0.1)
+    assert weights.shape == (len(lats) * len(lons), 3)
+    # the matrix is cached for the next snapshot with the same stations
+    assert idw_weights(STATIONS, resolution=0.1) is weights
+
+    values = np.array([[10.0, 12.0], [-2.0, np.nan], [20.0, 16.0]])
+    grids = interpolate(values, weights)
+    assert np.nanmin(grids[:, 0]) >= -2.0 and np.nanmax(grids[:, 0]) <= 20.0
+    # with Gyumri missing the second timestamp only mixes the other two stations
+    assert np.nanmin(grids[:, 1]) >= 12.0 and np.nanmax(grids[:, 1]) <= 16.0
+
+    on_station = idw_weights(((40.2, 44.5), (41.0, 45.0)), resolution=0.1)
+    grid = interpolate([1.0, 3.0], on_station).reshape(len(lats), len(lons))
+    assert grid[np.argmin(abs(lats - 40.2)), np.argmin(abs(lons - 44.5))] == 1.0
+
+
+# Testing that nearest-k weights only use k stations and match full IDW when k covers them all
+def test_nearest_k_weights():
+    nearest = idw_weights(STATIONS, resolution=0.1, k=2)
+    assert ((nearest > 0).sum(axis=1) == 2).all()
+    np.testing.assert_allclose(idw_weights(STATIONS, resolution=0.1, k=3), idw_weights(STATIONS, resolution=0.1))
+
+
+# Testing that every forecast day is interpolated in one pass onto the same grid
+def test_interpolate_field_per_day():
+    dates = pd.to_datetime(["2026-01-12", "2026-01-13"])
+    df = pd.DataFrame({
+        "Latitude": [lat for lat, _ in STATIONS] * 2,
+        "Longitude": [lon for _, lon in STATIONS] * 2,
+        "Date": np.repeat(dates, 3),
+        "Avg_Temp": [1.0, 2.0, 3.0, 11.0, 12.0, 13.0],
+    })
+
+    lats, lons, times, grids = interpolate_field(df, "Avg_Temp", time_col="Date", resolution=0.1)
+
+    assert times == list(dates)
+    assert grids.shape == (2, len(lats), len(lons))
+    np.testing.assert_allclose(grids[1], grids[0] + 10.0)
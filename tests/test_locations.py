@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+import locations
+
+
+# Testing that the registry drives the same page URLs the scraper used to hard-code
+def test_registry_builds_page_urls():
+    registry = locations.load_locations()
+
+    weekly = dict(locations.weekly_items(registry))
+    daily = dict(locations.daily_items(registry))
+
+    assert len(registry) == 11
+    assert weekly["Gavar (Gegharkunik)"] == "https://exanak.am/en/7-days-weather-forecast/gegharkunik/gavar"
+    assert daily["Yeghegnadzor (Vayotsdzor)"] == "https://exanak.am/en/current-weather-forecast/vayotsdzor/yeghegnadzor"
+
+
+# Testing the coordinate join: row order and index are kept, unknown cities get NaN
+def test_add_coordinates_joins_on_city():
+    df = pd.DataFrame({"City": ["Gyumri", "Atlantis", "Yerevan"]}, index=[5, 3, 9])
+
+    result = locations.add_coordinates(df)
+
+    assert list(result.index) == [5, 3, 9]
+    assert result.loc[5, "Latitude"] == 40.7929
+    assert result.loc[9, "Longitude"] == 44.5152
+    assert np.isnan(result.loc[3, "Latitude"])
+
+
+def test_duplicate_cities_are_rejected(tmpdir):
+    path = tmpdir.join("locations.csv")
+    path.write("Region,City,Latitude,Longitude\nA,Town,1,2\nB,Town,3,4\n")
+
+    with pytest.raises(ValueError, match="Town"):
+        locations.load_locations(str(path))
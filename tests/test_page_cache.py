@@ -0,0 +1,70 @@
+import os
+import pandas as pd
+from http_fetcher import fetch_pages
+from page_cache import PageCache, is_up_to_date, mark_up_to_date
+from storage import write_table
+
+
+# Testing that stale pages are revalidated and unchanged pages are served from disk
+def test_page_cache_revalidates_with_conditional_requests(fixture_server, tmpdir):
+    url = f"{fixture_server.url}/daily_yerevan.html"
+    cache = PageCache(cache_dir=str(tmpdir.join("cache")), ttl=0)
+
+    first, = fetch_pages([url], cache=cache)
+    entry = cache.entry(url)
+    assert entry["last_modified"] is not None
+
+    # the TTL is 0, so the page is revalidated and the server answers 304
+    second, = fetch_pages([url], cache=PageCache(cache_dir=cache.cache_dir, ttl=0))
+    assert second == first
+    assert [code for _, code in fixture_server.requests_log] == [200, 304]
+
+    # within the TTL no request is made at all
+    third, = fetch_pages([url], cache=PageCache(cache_dir=cache.cache_dir, ttl=3600))
+    assert third == first
+    assert len(fixture_server.requests_log) == 2
+
+
+def test_page_cache_reuses_parsed_results(tmpdir):
+    cache = PageCache(cache_dir=str(tmpdir.join("cache")))
+    cache.store("http://example/a", "<html>same</html>")
+    cache.save_parsed("http://example/a", "daily", {"Weather": "+3°C"})
+
+    # a new body invalidates the parsed result, the old body brings it back
+    cache.store("http://example/a", "<html>changed</html>")
+    assert cache.load_parsed("http://example/a", "daily") is None
+    cache.store("http://example/a", "<html>same</html>")
+    assert cache.load_parsed("http://example/a", "daily") == {"Weather": "+3°C"}
+
+
+def test_is_up_to_date_tracks_input_changes(tmpdir):
+    read_path = str(tmpdir.join("raw.csv"))
+    write_path = str(tmpdir.join("processed", "clean.csv"))
+    os.makedirs(os.path.dirname(write_path))
+    with open(read_path, "w") as f:
+        f.write("a,b\n1,2\n")
+    with open(write_path, "w") as f:
+        f.write("a,b\n1,2\n")
+
+    assert not is_up_to_date(read_path, write_path)
+    mark_up_to_date(read_path, write_path)
+    assert is_up_to_date(read_path, write_path)
+
+    with open(read_path, "a") as f:
+        f.write("3,4\n")
+    assert not is_up_to_date(read_path, write_path)
+
+
+# Testing that rewriting a parquet dataset with the same rows keeps it up to date
+def test_is_up_to_date_for_rewritten_parquet_dataset(tmpdir):
+    read_path = str(tmpdir.join("raw.parquet"))
+    write_path = str(tmpdir.join("clean.csv"))
+    df = pd.DataFrame({"Region": ["Yerevan", "Lori"], "City": ["Yerevan", "Vanadzor"], "Temperature": [3.0, -1.0]})
+    write_table(df, read_path)
+    df.to_csv(write_path, index=False)
+    mark_up_to_date(read_path, write_path)
+
+    write_table(df, read_path)
+    assert is_up_to_date(read_path, write_path)
+    write_table(df.assign(Temperature=[4.0, -1.0]), read_path)
+    assert not is_up_to_date(read_path, write_path)
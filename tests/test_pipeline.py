@@ -0,0 +1,51 @@
+import os
+import pandas as pd
+import pytest
+import pipeline
+
+
+@pytest.fixture
+def raw_snapshot(tmpdir, monkeypatch):
+    raw_dir = tmpdir.mkdir("raw")
+    raw_dir.join("daily-weather-data.csv").write(
+        "Region,City,Weather,Humidity,Wind,Pressure,Ceiling,Dew Point,Visibility,Sunrise,Sunset,Day Duration,Moonrise,Moonset,Moon Duration\n"
+        "Yerevan,Yerevan,22C,65%,5 km/h,1020 mb,1500 m,15C,10 km,06:30,18:30,12:00,07:00,19:00,12:00\n"
+        "Aragatsotn,Ashtarak,18C,70%,10 km/h,1015 mb,1400 m,12C,8 km,06:45,18:15,11:30,06:50,18:05,11:15\n"
+    )
+    raw_dir.join("weekly-weather-data.csv").write(
+        "Region,City,Date,Precipitation,Snow,Forecast,Hi/Lo\n"
+        "Yerevan,Yerevan,Mon 12.01,0.0,0,Sunny,5°/-1°\n"
+        "Lori,Vanadzor,Mon 12.01,,0.5,Snow,1°/-4°\n"
+    )
+    monkeypatch.setattr(pipeline, "RAW_DIR", str(raw_dir))
+    monkeypatch.setattr(pipeline, "PROCESSED_DIR", str(tmpdir.join("processed")))
+    return tmpdir
+
+
+# Testing a processing-only run from a raw snapshot without writing anything
+def test_run_pipeline_processes_raw_snapshot_in_memory(raw_snapshot):
+    frames = pipeline.run_pipeline(stages=["process"], persist=False, storage_format="csv")
+
+    assert frames["daily_clean"]["Temperature"].tolist() == [22.0, 18.0]
+    assert frames["weekly_clean"]["High_Temp"].tolist() == [5.0, 1.0]
+    assert pd.api.types.is_datetime64_any_dtype(frames["weekly_clean"]["Date"])
+    assert not os.path.exists(raw_snapshot.join("processed"))
+
+
+# Testing that without validation an empty daily snapshot still lets the weekly one through
+def test_run_pipeline_processes_kinds_independently(raw_snapshot):
+    raw_snapshot.join("raw", "daily-weather-data.csv").write("Region,City,Weather\n")
+    metrics = []
+
+    with pytest.raises(RuntimeError, match="no daily page"):
+        pipeline.run_pipeline(stages=["process"], persist=False, storage_format="csv", metrics=metrics, validate=False)
+
+    assert [(stage["stage"], stage["status"]) for stage in metrics] == [
+        ("daily_process", "failed"), ("weekly_process", "ok")
+    ]
+    assert metrics[-1]["rows_out"] == 2
+
+
+def test_run_pipeline_rejects_unknown_stages():
+    with pytest.raises(ValueError):
+        pipeline.run_pipeline(stages=["scrape", "publish"])
@@ -0,0 +1,155 @@
+import os
+import pandas as pd
+import pytest
+import plotly.offline
+import daily_plotter
+import render_cache
+import weekly_plotter
+from html_output import build_dashboard, shared_html_options
+from daily_plotter import plot_daily_weather, daily_figure_tasks
+from weekly_plotter import plot_city_trends_grid, visualize_weekly_weather_by_city, weekly_figure_tasks
+
+BUNDLE_NAME = f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+
+
+@pytest.fixture
+def daily_clean():
+    return pd.DataFrame({
+        "Region": ["Yerevan", "Aragatsotn", "Lori"],
+        "City": ["Yerevan", "Ashtarak", "Vanadzor"],
+        "Temperature": [22.0, 18.0, 12.5],
+        "Humidity": [65.0, 70.0, 80.0],
+        "Wind Speed (km/h)": [5.0, 10.0, 3.0],
+        "Pressure (mb)": [1020.0, 1015.0, 1012.0],
+        "Visibility (km)": [10.0, 8.0, 9.0],
+        "Latitude": [40.1872, 40.2929, 40.8074],
+        "Longitude": [44.5152, 44.3505, 44.4970],
+    })
+
+
+@pytest.fixture
+def weekly_clean():
+    dates = pd.to_datetime(["2026-01-12", "2026-01-13"])
+    return pd.DataFrame({
+        "City": ["Yerevan", "Yerevan", "Gyumri", "Gyumri"],
+        "Date": list(dates) * 2,
+        "Latitude": [40.1872, 40.1872, 40.7929, 40.7929],
+        "Longitude": [44.5152, 44.5152, 43.8465, 43.8465],
+        "High_Temp": [5.0, 7.0, -2.0, 0.0],
+        "Low_Temp": [-1.0, 2.0, -6.0, -5.0],
+        "Avg_Temp": [2.0, 4.5, -4.0, -2.5],
+        "Precipitation": [0.0, 1.2, 0.4, 0.0],
+        "Snow": [0.0, 0.0, 2.5, 1.0],
+        "Forecast": ["Sunny", "Light rain", "Snow", "Cloudy"],
+    })
+
+
+# Testing that parallel rendering writes every figure and reports its timing
+def test_plot_daily_weather_renders_every_figure(daily_clean, tmpdir):
+    timings = plot_daily_weather(daily_clean, str(tmpdir), max_workers=2)
+
+    expected = [os.path.basename(task[2]) for task in daily_figure_tasks(daily_clean, str(tmpdir))]
+    assert list(timings) == expected
+    # the interactive charts share one plotly.js bundle next to them
+    assert sorted(os.listdir(str(tmpdir))) == sorted(expected + [BUNDLE_NAME])
+
+
+def test_visualize_weekly_weather_renders_every_figure(weekly_clean, tmpdir):
+    timings = visualize_weekly_weather_by_city(weekly_clean, str(tmpdir), max_workers=1)
+
+    expected = [os.path.basename(task[2]) for task in weekly_figure_tasks(weekly_clean, str(tmpdir))]
+    assert list(timings) == expected
+    # the interactive charts share one plotly.js bundle next to them
+    assert sorted(os.listdir(str(tmpdir))) == sorted(expected + [BUNDLE_NAME])
+
+
+# Testing that only figures whose input slice changed are rendered again
+def test_render_cache_skips_unchanged_figures(weekly_clean, tmpdir):
+    output_dir = str(tmpdir.join("weekly"))
+    manifest_path = str(tmpdir.join("render-manifest.json"))
+    visualize_weekly_weather_by_city(weekly_clean, output_dir, max_workers=1, manifest_path=manifest_path)
+
+    # a Gyumri-only change leaves the Yerevan trend chart untouched
+    changed = weekly_clean.copy()
+    changed.loc[changed["City"] == "Gyumri", "High_Temp"] += 1
+    timings = visualize_weekly_weather_by_city(changed, output_dir, max_workers=1, manifest_path=manifest_path)
+
+    assert timings["temperature_trends_yerevan.png"] is None
+    assert timings["precipitation_snow_by_city.html"] is None
+    assert timings["temperature_trends_all_cities.html"] is not None
+
+    # explicitly invalidated figures are rendered again
+    render_cache.invalidate([os.path.join(output_dir, "temperature_trends_yerevan.png")], manifest_path)
+    timings = visualize_weekly_weather_by_city(changed, output_dir, max_workers=1, manifest_path=manifest_path)
+    assert timings["temperature_trends_yerevan.png"] is not None
+    assert timings["interactive_temperature_map.html"] is None
+
+
+# Testing that the daily and weekly pages load one shared plotly.js bundle instead of embedding it
+def test_shared_plotly_bundle(daily_clean, weekly_clean, tmpdir):
+    tmpdir.mkdir("daily")
+    tmpdir.mkdir("weekly")
+    html_options = shared_html_options("shared", str(tmpdir))
+    plot_daily_weather(daily_clean, str(tmpdir.join("daily")), max_workers=1, html_options=html_options)
+    visualize_weekly_weather_by_city(weekly_clean, str(tmpdir.join("weekly")), max_workers=1, html_options=html_options)
+
+    assert tmpdir.join(BUNDLE_NAME).check()
+    assert not tmpdir.join("daily", BUNDLE_NAME).check()
+    page = tmpdir.join("daily", "interactive_map.html").read()
+    assert f'src="../{BUNDLE_NAME}"' in page
+    assert len(page) < 100_000
+
+    dashboard = open(build_dashboard(str(tmpdir))).read()
+    assert 'src="daily/interactive_map.html"' in dashboard
+    assert 'src="weekly/precipitation_proportion_pie_chart.html"' in dashboard
+
+
+# Testing that the bar and pie charts receive one precomputed row per city
+def test_weekly_tasks_precompute_city_totals(weekly_clean, tmpdir):
+    tasks = {os.path.basename(task[2]): task for task in weekly_figure_tasks(weekly_clean, str(tmpdir))}
+
+    totals = tasks["precipitation_snow_by_city.html"][1]
+    assert list(totals["City"]) == ["Gyumri", "Yerevan"]
+    assert list(totals["Snow"]) == [3.5, 0.0]
+    assert list(tasks["precipitation_proportion_pie_chart.html"][1]["Precipitation"]) == [0.4, 1.2]
+    assert len(tasks["temperature_trends_yerevan.png"][1]) == 2
+
+
+# Testing that every city gets its trend chart when they are drawn in batches over several workers
+def test_city_trend_charts_for_every_city(weekly_clean, tmpdir):
+    frames = []
+    for i in range(7):
+        frame = weekly_clean[weekly_clean["City"] == "Yerevan"].assign(City=f"City {i}")
+        frame["High_Temp"] += i
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+
+    timings = visualize_weekly_weather_by_city(df, str(tmpdir), max_workers=2)
+
+    trend_charts = sorted(name for name in timings if name.endswith(".png"))
+    assert trend_charts == [f"temperature_trends_city_{i}.png" for i in range(7)]
+    assert all(timings[name] is not None for name in trend_charts)
+    assert all(tmpdir.join(name).check() for name in trend_charts)
+
+
+# Testing that the all-cities trend grid still renders with many cities
+def test_trend_grid_with_many_cities(weekly_clean, tmpdir):
+    df = pd.concat([weekly_clean.assign(City=f"City {i}") for i in range(30)], ignore_index=True)
+    plot_city_trends_grid(df, str(tmpdir.join("grid.html")), html_mode="cdn")
+
+    assert tmpdir.join("grid.html").check()
+
+
+# Testing that the temperature fields keep Armenia's proportions instead of square degree cells
+def test_temperature_fields_scale_latitude(daily_clean, weekly_clean, tmpdir, monkeypatch):
+    figures = []
+    monkeypatch.setattr(daily_plotter, "write_html", lambda fig, *args: figures.append(fig))
+    monkeypatch.setattr(weekly_plotter, "write_html", lambda fig, *args: figures.append(fig))
+
+    daily_plotter.plot_temperature_field(daily_clean, str(tmpdir.join("field.html")))
+    weekly_plotter.plot_temperature_field_by_day(weekly_clean, str(tmpdir.join("field_by_day.html")))
+
+    for fig in figures:
+        assert fig.layout.yaxis.scaleanchor == "x"
+        # about 1.3 at 40°N
+        assert fig.layout.yaxis.scaleratio == pytest.approx(1.31, abs=0.01)
@@ -0,0 +1,54 @@
+import pandas as pd
+from benchmarks.synthetic import make_locations, make_raw_daily, make_raw_weekly
+from daily_processor import clean_daily_frame, iter_clean_daily_chunks
+from weekly_processor import clean_weekly_frame
+from schema import DAILY_SCHEMA, WEEKLY_SCHEMA, apply_schema, memory_report
+
+
+# Testing that both cleaning paths return frames in the schema, with times as minutes after midnight
+def test_cleaned_frames_follow_the_schema(tmpdir, monkeypatch):
+    locations = make_locations(5)
+    locations_path = tmpdir.join("locations.csv")
+    locations.to_csv(str(locations_path), index=False)
+    monkeypatch.setenv("WEATHER_LOCATIONS", str(locations_path))
+
+    raw_daily = make_raw_daily(50, locations)
+    daily = clean_daily_frame(raw_daily)
+    weekly = clean_weekly_frame(make_raw_weekly(70, locations))
+
+    for df, schema in ((daily, DAILY_SCHEMA), (weekly, WEEKLY_SCHEMA)):
+        assert {col: str(df[col].dtype) for col in schema} == {
+            col: str(pd.Series(dtype=dtype).dtype) for col, dtype in schema.items()
+        }
+    sunrise = raw_daily['Sunrise'].str.extract(r'(\d+):(\d+)').astype(int)
+    assert daily['Sunrise (min)'].tolist() == (sunrise[0] * 60 + sunrise[1]).tolist()
+    assert 'Sunrise' not in daily.columns
+
+    raw_path = tmpdir.join("daily.csv")
+    raw_daily.to_csv(str(raw_path), index=False)
+    chunks = list(iter_clean_daily_chunks(str(raw_path), chunksize=20, scraped_date=daily['Scraped Date'].iloc[0]))
+    assert all(chunk.dtypes.equals(chunks[0].dtypes) for chunk in chunks)
+    assert chunks[0]['Temperature'].dtype == 'float32'
+
+
+# Testing that text in numeric columns is parsed and that the report totals the savings
+def test_apply_schema_and_memory_report():
+    untyped = pd.DataFrame({
+        'City': ['Yerevan', 'Gyumri'] * 50,
+        'UV Index': ['3', 'n/a'] * 50,
+        'Temperature': [21.5, -3.0] * 50,
+        'Note': ['kept'] * 100,
+    })
+
+    typed = apply_schema(untyped, DAILY_SCHEMA)
+
+    assert typed['City'].dtype == 'category'
+    assert typed['UV Index'].dtype == 'float32'
+    assert typed['UV Index'].iloc[0] == 3 and pd.isna(typed['UV Index'].iloc[1])
+    assert typed['Temperature'].dtype == 'float32'
+    assert typed['Note'].dtype == untyped['Note'].dtype
+
+    report = memory_report(untyped, typed)
+    assert report.loc['Temperature', 'ratio'] == 0.5
+    assert report.loc['Total', 'bytes after'] < report.loc['Total', 'bytes before']
+    assert report.loc['Total', 'bytes before'] == untyped.memory_usage(index=False, deep=True).sum()
@@ -0,0 +1,204 @@
+import pytest
+import time
+import scraper
+import validation
+from http_fetcher import fetch_pages, FetchError
+from selenium.common.exceptions import NoSuchElementException
+
+
+class FakeDriver:
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+# Testing that the driver pool keeps results in work-item order and quits every driver
+def test_scrape_in_pool_keeps_order(monkeypatch):
+    drivers = []
+
+    def fake_init_driver(timeout):
+        driver = FakeDriver(timeout)
+        drivers.append(driver)
+        return driver
+
+    def fake_scrape(driver, region_name, region_url):
+        # later items finish first to make ordering bugs visible
+        time.sleep(0.01 * (5 - int(region_url)))
+        return region_name
+
+    monkeypatch.setattr(scraper, "init_driver", fake_init_driver)
+    work_items = [(f"City {i}", str(i)) for i in range(5)]
+
+    with scraper.driver_pool(3, timeout=12) as pool:
+        results = scraper.scrape_in_pool(pool, fake_scrape, work_items)
+
+    assert results == [name for name, _ in work_items]
+    assert len(drivers) == 3
+    # every browser gets the configured page load timeout
+    assert all(driver.timeout == 12 for driver in drivers)
+    assert all(driver.quit_called for driver in drivers)
+
+
+def test_get_num_workers_reads_env(monkeypatch):
+    monkeypatch.setenv("SCRAPER_WORKERS", "6")
+    assert scraper.get_num_workers() == 6
+    assert scraper.get_num_workers(2) == 2
+
+
+class ScriptDriver(FakeDriver):
+    def __init__(self, script_result):
+        super().__init__()
+        self.script_result = script_result
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(("get", url))
+
+    def execute_script(self, script, *args):
+        self.calls.append(("execute_script",))
+        return self.script_result
+
+
+# Testing that script extraction reads the whole weekly table in one call
+def test_scrape_weekly_weather_script_mode():
+    rows = [
+        {"Date": "Mon 01.01", "Precipitation": "0.0", "Snow": "0", "Forecast": "Sunny", "Hi/Lo": "5/1"},
+        {"Date": "Tue 02.01", "Precipitation": "0.1", "Snow": "0", "Forecast": "Cloudy", "Hi/Lo": "6/2"},
+    ]
+    driver = ScriptDriver(rows)
+
+    weather_df = scraper.scrape_weekly_weather(driver, "Yerevan (Yerevan)", "http://example")
+
+    assert list(weather_df.columns) == ["Date", "Precipitation", "Snow", "Forecast", "Hi/Lo"]
+    assert weather_df["Hi/Lo"].tolist() == ["5/1", "6/2"]
+    assert driver.calls.count(("execute_script",)) == 1
+
+
+# Testing that script extraction returns the same daily dict and fails on missing elements
+def test_scrape_daily_info_script_mode():
+    panel = {field: f"{field} value" for field in scraper.DAILY_INFO_XPATHS}
+    driver = ScriptDriver(panel)
+
+    daily_info = scraper.scrape_daily_info(driver, "Gavar (Gegharkunik)", "http://example")
+
+    assert list(daily_info)[:2] == ["Region", "City"]
+    assert daily_info["Region"] == "Gegharkunik"
+    assert daily_info["City"] == "Gavar"
+    assert daily_info["Moon Duration"] == "Moon Duration value"
+
+    panel["Humidity"] = None
+    with pytest.raises(NoSuchElementException):
+        scraper.scrape_daily_info(ScriptDriver(panel), "Gavar (Gegharkunik)", "http://example")
+
+
+# Testing the HTTP backend end to end against the saved pages
+def test_http_backend_parses_fixture_pages(fixture_server):
+    weekly_html, daily_html = fetch_pages(
+        [f"{fixture_server.url}/flaky/weekly_yerevan.html", f"{fixture_server.url}/daily_yerevan.html"],
+        concurrency=2,
+        backoff=0.01,
+    )
+
+    weekly_df = scraper.parse_weekly_weather(weekly_html)
+    assert list(weekly_df.columns) == ["Date", "Precipitation", "Snow", "Forecast", "Hi/Lo"]
+    assert weekly_df["Date"].tolist() == ["Mon 12.01", "Tue 13.01", "Wed 14.01"]
+    assert weekly_df["Forecast"].iloc[1] == "Light rain"
+    assert weekly_df["Hi/Lo"].iloc[2] == "1°/-4°"
+
+    daily_info = scraper.parse_daily_info(daily_html, "Yerevan (Yerevan)")
+    assert daily_info["City"] == "Yerevan"
+    assert daily_info["Weather"] == "+3°C"
+    assert daily_info["Wind"] == "5 km/h"
+    assert daily_info["Humidity"] == "65%"
+    assert daily_info["Visibility"] == "10 km"
+    assert daily_info["Sunrise"] == "Sunrise 08:01"
+    assert daily_info["Moon Duration"] == "Moon duration 10:34"
+
+
+def test_fetch_pages_gives_up_on_client_errors(fixture_server):
+    with pytest.raises(FetchError):
+        fetch_pages([f"{fixture_server.url}/missing.html"], backoff=0.01)
+
+
+# Testing that failing pages are retried and, when they keep failing, reported instead of raised
+def test_scrape_in_pool_retries_and_reports_failures(monkeypatch):
+    attempts = {}
+
+    def flaky_scrape(driver, region_name, region_url):
+        attempts[region_url] = attempts.get(region_url, 0) + 1
+        if region_url == "broken" or attempts[region_url] == 1 and region_url == "flaky":
+            raise RuntimeError(f"{region_url} did not render")
+        return region_name
+
+    monkeypatch.setattr(scraper, "init_driver", FakeDriver)
+    work_items = [("A (R)", "ok"), ("B (R)", "flaky"), ("C (R)", "broken")]
+    failures = []
+
+    with scraper.driver_pool(2) as pool:
+        results = scraper.scrape_in_pool(
+            pool, flaky_scrape, work_items, retries=2, backoff=0.001, failures=failures, kind="daily"
+        )
+
+    assert results == ["A (R)", "B (R)", None]
+    assert attempts == {"ok": 1, "flaky": 2, "broken": 3}
+    assert failures == [{"kind": "daily", "location": "C (R)", "url": "broken", "error": "broken did not render"}]
+
+
+# Testing that a partly failed scrape keeps its results and a rerun only fetches the failed page
+def test_scrape_weather_resumes_from_checkpoint(fixture_server, tmpdir, monkeypatch):
+    locations_path = tmpdir.join("locations.csv")
+    locations_path.write("Region,City,Latitude,Longitude\nYerevan,Yerevan,40.18,44.51\nShirak,Gyumri,40.79,43.85\n")
+    pages = {
+        "weekly": {"Yerevan": "weekly_yerevan.html", "Gyumri": "missing.html"},
+        "daily": {"Yerevan": "daily_yerevan.html", "Gyumri": "daily_yerevan.html"},
+    }
+    for kind in pages:
+        monkeypatch.setattr(scraper, f"{kind}_items", lambda locations, kind=kind: [
+            (f"{city} ({region})", f"{fixture_server.url}/{pages[kind][city]}?city={city}")
+            for region, city in zip(locations["Region"], locations["City"])
+        ])
+    monkeypatch.setattr(scraper, "DEFAULT_CHECKPOINT_PATH", str(tmpdir.join("checkpoint.jsonl")))
+    options = dict(backend="http", use_cache=False, locations_path=str(locations_path), retries=0)
+
+    failures = []
+    weekly_df, daily_df = scraper.scrape_weather(failures=failures, **options)
+
+    assert weekly_df["City"].unique().tolist() == ["Yerevan"]
+    assert daily_df["City"].tolist() == ["Yerevan", "Gyumri"]
+    assert [(failure["kind"], failure["location"]) for failure in failures] == [("weekly", "Gyumri (Shirak)")]
+    assert tmpdir.join("checkpoint.jsonl").exists()
+
+    fixture_server.requests_log.clear()
+    pages["weekly"]["Gyumri"] = "weekly_yerevan.html"
+    weekly_df, daily_df = scraper.scrape_weather(**options)
+
+    assert fixture_server.requests_log == [("/weekly_yerevan.html?city=Gyumri", 200)]
+    assert weekly_df["City"].unique().tolist() == ["Yerevan", "Gyumri"]
+    assert len(daily_df) == 2
+    assert not tmpdir.join("checkpoint.jsonl").exists()
+
+
+# Testing that a kind whose every page failed comes back empty but typed, is saved and is reported as empty
+def test_scrape_weather_returns_empty_kind(fixture_server, tmpdir, monkeypatch):
+    locations_path = tmpdir.join("locations.csv")
+    locations_path.write("Region,City,Latitude,Longitude\nYerevan,Yerevan,40.18,44.51\n")
+    for kind, page in (("weekly", "missing.html"), ("daily", "daily_yerevan.html")):
+        monkeypatch.setattr(
+            scraper, f"{kind}_items", lambda locations, page=page: [("Yerevan (Yerevan)", f"{fixture_server.url}/{page}")]
+        )
+    monkeypatch.setattr(scraper, "DEFAULT_CHECKPOINT_PATH", str(tmpdir.join("checkpoint.jsonl")))
+
+    weekly_df, daily_df = scraper.scrape_weather(
+        backend="http", use_cache=False, locations_path=str(locations_path), retries=0
+    )
+    assert weekly_df.empty and list(weekly_df.columns) == ["Region", "City"] + list(scraper.WEEKLY_CELL_XPATHS)
+    assert len(daily_df) == 1
+
+    raw_dir = tmpdir.join("raw")
+    scraper.save_raw_tables(weekly_df, daily_df, "csv", str(raw_dir))
+    monkeypatch.setattr(validation, "RAW_DIR", str(raw_dir))
+    report = validation.run_validation("csv", report_path=None, fail=False)
+    assert [(issue["table"], issue["detail"]) for issue in report["issues"]] == [("weekly", "the snapshot has no rows")]
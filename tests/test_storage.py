@@ -0,0 +1,61 @@
+import os
+import pandas as pd
+import pytest
+from daily_processor import clean_daily_weather_data
+from storage import read_table, write_table, table_path
+
+
+@pytest.fixture
+def weekly_frame():
+    return pd.DataFrame({
+        "Region": ["Yerevan", "Lori", "Lori"],
+        "City": ["Yerevan", "Vanadzor", "Vanadzor"],
+        "Date": pd.to_datetime(["2026-01-12", "2026-01-12", "2026-01-13"]),
+        "Avg_Temp": [3.0, -1.5, 0.5],
+    })
+
+
+# Testing that every format round-trips the frame with its dtypes
+@pytest.mark.parametrize("storage_format", ["csv", "parquet", "feather"])
+def test_write_and_read_table_round_trip(weekly_frame, tmpdir, storage_format):
+    path = table_path(str(tmpdir), "weekly", storage_format)
+
+    write_table(weekly_frame, path)
+    df = read_table(path, parse_dates=["Date"])
+
+    pd.testing.assert_frame_equal(df, weekly_frame, check_dtype=False)
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+
+
+def test_parquet_tables_are_partitioned_and_projected(weekly_frame, tmpdir):
+    path = table_path(str(tmpdir), "weekly", "parquet")
+
+    write_table(weekly_frame, path)
+    day_dirs = os.listdir(path)
+    assert len(day_dirs) == 1 and day_dirs[0].startswith("Scrape Day=")
+    assert sorted(os.listdir(os.path.join(path, day_dirs[0]))) == ["Region=Lori", "Region=Yerevan"]
+
+    df = read_table(path, columns=["City", "Avg_Temp"])
+    assert list(df.columns) == ["City", "Avg_Temp"]
+    assert sorted(df["Avg_Temp"].tolist()) == [-1.5, 0.5, 3.0]
+
+    # a partial re-run the same day replaces the day, regions it lacks do not linger
+    write_table(weekly_frame[weekly_frame["Region"] == "Yerevan"], path)
+    assert read_table(path)["City"].tolist() == ["Yerevan"]
+
+
+# Testing that the processor can write the cleaned data as Parquet
+def test_clean_daily_weather_data_to_parquet(tmpdir):
+    raw_path = tmpdir.join("daily.csv")
+    raw_path.write(
+        "Region,City,Weather,Humidity,Wind,Pressure,Ceiling,Dew Point,Visibility,Sunrise,Sunset,Day Duration,Moonrise,Moonset,Moon Duration\n"
+        "Yerevan,Yerevan,22C,65%,5 km/h,1020 mb,1500 m,15C,10 km,06:30,18:30,12:00,07:00,19:00,12:00\n"
+    )
+    clean_path = table_path(str(tmpdir), "daily-clean", "parquet")
+
+    clean_daily_weather_data(str(raw_path), clean_path)
+    df = read_table(clean_path)
+
+    assert df["Region"].iloc[0] == "Yerevan"
+    assert df["Temperature"].iloc[0] == 22.0
+    assert df["Moon Duration (min)"].iloc[0] == 720.0
@@ -0,0 +1,100 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+import pytest
+import pipeline
+from aggregates import DAILY_AGGREGATE_COLUMNS, snapshot_stats, update_aggregates
+from daily_processor import clean_daily_frame
+from validation import ValidationError, load_baseline, validate_frames, validate_snapshot
+
+DAILY_HEADER = "Region,City,Weather,Humidity,Wind,Pressure,Ceiling,Dew Point,Visibility,Sunrise,Sunset,Day Duration,Moonrise,Moonset,Moon Duration\n"
+WEEKLY_RAW = pd.DataFrame({
+    "Region": ["Yerevan", "Lori"],
+    "City": ["Yerevan", "Vanadzor"],
+    "Date": ["Mon 12.01", "Mon 12.01"],
+    "Hi/Lo": ["5°/-1°", "1°/-4°"],
+    "Precipitation": [0.0, 1.5],
+    "Snow": [0.0, 0.5],
+})
+
+
+def daily_raw(*rows):
+    return pd.read_csv(io.StringIO(DAILY_HEADER + "".join(rows)))
+
+
+def daily_snapshot(scraped_date, temperatures):
+    return pd.DataFrame({
+        "Scraped Date": scraped_date,
+        "Region": ["Yerevan", "Lori"],
+        "City": ["Yerevan", "Vanadzor"],
+        "Temperature": temperatures,
+        "Humidity": [60.0, 70.0],
+    })
+
+
+# Testing that an emptied column and an impossible reading fail the snapshot that mean-filling would hide
+def test_validate_frames_fails_on_missing_column_and_range(tmpdir):
+    raw = daily_raw(
+        "Yerevan,Yerevan,,150%,5 km/h,1020 mb,1500 m,15C,10 km,06:30,18:30,12:00,07:00,19:00,12:00\n",
+        "Lori,Vanadzor,,70%,10 km/h,1015 mb,,12C,8 km,06:45,18:15,11:30,06:50,18:05,11:15\n",
+    )
+    # cleaning leaves no temperature at all and keeps the impossible humidity, without a word
+    assert clean_daily_frame(raw)["Temperature"].isna().all()
+
+    report_path = str(tmpdir.join("validation-report.json"))
+    with pytest.raises(ValidationError) as error:
+        validate_frames(raw, WEEKLY_RAW, "csv", report_path)
+
+    report = json.load(open(report_path))
+    assert report == error.value.report
+    assert report["status"] == "failed"
+    assert report["rows"] == {"daily": 2, "weekly": 2}
+    found = {(issue["check"], issue["column"], issue["severity"]) for issue in report["issues"]}
+    assert found == {("missing", "Temperature", "error"), ("range", "Humidity", "error")}
+    assert "Yerevan 150" in str(error.value)
+
+
+# Testing that readings are compared with the recent history of their own city
+def test_zscores_against_city_history(tmpdir):
+    path = str(tmpdir.join("daily-aggregates.csv"))
+    history = [
+        daily_snapshot(f"2026-01-{day:02d} 09:00:00", [10.0 + day % 2, -2.0 - day % 3])
+        for day in range(1, 8)
+    ]
+    update_aggregates(pd.concat([snapshot_stats(df, DAILY_AGGREGATE_COLUMNS) for df in history]), path)
+    baseline = load_baseline(path, ["Temperature", "Humidity"]).set_index("City")
+    temperatures = pd.concat(history).groupby("City")["Temperature"]
+    np.testing.assert_allclose(baseline["Temperature_std"], temperatures.std(ddof=0))
+
+    baseline = load_baseline(path, ["Temperature", "Humidity"])
+    calm = validate_snapshot(daily_snapshot("2026-01-08 09:00:00", [11.0, -3.0]), daily_baseline=baseline)
+    assert calm["status"] == "ok" and calm["issues"] == []
+
+    # one city off its history is weather worth a warning, every city at once is the scraper
+    heat = validate_snapshot(daily_snapshot("2026-01-08 09:00:00", [25.0, -3.0]), daily_baseline=baseline)
+    assert heat["status"] == "warning"
+    assert [(issue["column"], issue["rows"]) for issue in heat["issues"]] == [("Temperature", 1)]
+    assert "Yerevan 25" in heat["issues"][0]["detail"]
+    broken = validate_snapshot(daily_snapshot("2026-01-08 09:00:00", [25.0, 15.0]), daily_baseline=baseline)
+    assert broken["status"] == "failed"
+
+
+# Testing that the in-memory pipeline stops only the branch that fails validation
+def test_pipeline_stops_failed_branch_before_processing(tmpdir, monkeypatch):
+    raw_dir = tmpdir.mkdir("raw")
+    raw_dir.join("daily-weather-data.csv").write(
+        DAILY_HEADER + "Yerevan,Yerevan,22C,65%,5 km/h,1020 mb,1500 m,15C,10 km,06:30,18:30,12:00,07:00,19:00,12:00\n"
+    )
+    WEEKLY_RAW.assign(**{"Hi/Lo": ""}).to_csv(str(raw_dir.join("weekly-weather-data.csv")), index=False)
+    monkeypatch.setattr(pipeline, "RAW_DIR", str(raw_dir))
+    metrics = []
+
+    with pytest.raises(ValidationError, match="High_Temp"):
+        pipeline.run_pipeline(stages=["process"], persist=False, storage_format="csv", metrics=metrics)
+
+    assert [(stage["stage"], stage["status"]) for stage in metrics] == [
+        ("validate_daily", "ok"), ("validate_weekly", "failed"), ("daily_process", "ok")
+    ]
+    # the daily snapshot was still cleaned, the weekly one was not
+    assert metrics[-1]["rows_out"] == 1
@@ -0,0 +1,247 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DAILY_AGGREGATES_NAME, aggregates_path, load_aggregates, summary, window
+from daily_processor import clean_daily_frame
+from storage import atomic_write, is_empty_table, read_table, table_path
+from weekly_processor import clean_weekly_frame
+
+# plausible range of every reading in Armenia; anything outside is a parsing or scraping error.
+# negative moon durations are a known quirk of the site, fixed while cleaning, so they are not checked
+DAILY_RANGES = {
+    'Temperature': (-45, 50),
+    'Humidity': (0, 100),
+    'Wind Speed (km/h)': (0, 200),
+    'Pressure (mb)': (900, 1080),
+    'Ceiling (m)': (0, 20000),
+    'Dew Point': (-60, 40),
+    'Visibility (km)': (0, 100),
+    'Day Duration (min)': (0, 1440),
+}
+WEEKLY_RANGES = {
+    'High_Temp': (-45, 50),
+    'Low_Temp': (-45, 50),
+    'Precipitation': (0, 300),
+    'Snow': (0, 300),
+}
+# columns that can be empty in a healthy snapshot, e.g. no cloud ceiling on a clear day
+OPTIONAL_COLUMNS = {'Ceiling (m)'}
+# a column with more than this share of missing values is reported even when it is not empty
+MISSING_WARNING = 0.5
+
+# readings compared with the recent history of their city
+ZSCORE_COLUMNS = {
+    'daily': ['Temperature', 'Humidity', 'Pressure (mb)', 'Dew Point'],
+    'weekly': ['High_Temp', 'Low_Temp'],
+}
+ZSCORE_LIMIT = 4.0
+ZSCORE_DAYS = 30  # the rolling window of snapshots the z-scores are computed against
+MIN_HISTORY = 5  # readings a city needs in the window before its z-scores count
+
+RAW_DIR = "outputs/raw"
+REPORT_PATH = "outputs/validation-report.json"
+KINDS = ("daily", "weekly")
+
+
+class ValidationError(Exception):
+    """
+    Raised when a snapshot fails validation; the report is kept on the exception.
+    """
+
+    def __init__(self, report):
+        errors = [issue for issue in report["issues"] if issue["severity"] == "error"]
+        super().__init__("; ".join(_describe(issue) for issue in errors))
+        self.report = report
+
+
+def _issue(table, check, column, severity, rows, detail):
+    return {"table": table, "check": check, "column": column, "severity": severity, "rows": int(rows),
+            "detail": detail}
+
+def _describe(issue):
+    return f"{issue['table']} {issue['column']}: {issue['detail']}"
+
+def _values(df, columns):
+    # one float matrix for all the checked columns, missing values as NaN
+    return df[columns].astype(float).to_numpy()
+
+def _example(df, row, value):
+    # the offending reading, to make the report actionable
+    city = df['City'].iloc[row] if 'City' in df.columns else row
+    return f"{city} {value:g}"
+
+def check_missing(df, columns, table, baseline=None):
+    """
+    Reports the columns whose every value is missing, the usual sign of a page
+    layout change, and those with more than MISSING_WARNING of them missing.
+    baseline, the per-city summary of earlier snapshots, tells whether the
+    column used to have readings.
+    """
+    if df.empty:
+        return [_issue(table, "missing", None, "error", 0, "the snapshot has no rows")]
+    columns = [col for col in columns if col in df.columns]
+    missing = np.isnan(_values(df, columns)).sum(axis=0)
+    issues = []
+    for col, rows in zip(columns, missing):
+        share = rows / len(df)
+        if share <= MISSING_WARNING:
+            continue
+        if share < 1:
+            issues.append(_issue(table, "missing", col, "warning", rows, f"{share:.0%} of the values are missing"))
+            continue
+        detail = "every value is missing"
+        if baseline is not None and f"{col}_count" in baseline.columns and baseline[f"{col}_count"].sum() > 0:
+            detail += ", earlier snapshots had readings"
+        severity = "warning" if col in OPTIONAL_COLUMNS else "error"
+        issues.append(_issue(table, "missing", col, severity, rows, detail))
+    return issues
+
+def check_ranges(df, ranges, table):
+    """
+    Reports the readings outside their plausible range, all columns in one comparison.
+    """
+    columns = [col for col in ranges if col in df.columns]
+    if df.empty or not columns:
+        return []
+    values = _values(df, columns)
+    low, high = np.array([ranges[col] for col in columns], dtype=float).T
+    with np.errstate(invalid='ignore'):
+        outside = (values < low) | (values > high)
+    issues = []
+    for j in np.flatnonzero(outside.any(axis=0)):
+        col, rows = columns[j], outside[:, j].sum()
+        first = outside[:, j].argmax()
+        detail = f"{rows} values outside [{low[j]:g}, {high[j]:g}], e.g. {_example(df, first, values[first, j])}"
+        issues.append(_issue(table, "range", col, "error", rows, detail))
+    return issues
+
+def check_zscores(df, baseline, columns, table, limit=ZSCORE_LIMIT):
+    """
+    Compares every reading with the mean and standard deviation of its city in
+    baseline (see load_baseline). Single outliers are warnings, the weather can
+    be unusual; most cities jumping at once points at the scraper and is an error.
+    """
+    if baseline is None or baseline.empty or df.empty:
+        return []
+    columns = [col for col in columns if col in df.columns and f"{col}_std" in baseline.columns]
+    if not columns:
+        return []
+    # the baseline row of every reading's city, NaN for cities without history
+    position = pd.Index(baseline['City'].astype(str)).get_indexer(df['City'].astype(str))
+    stats = baseline[[f"{col}_{stat}" for stat in ('mean', 'std', 'count') for col in columns]].to_numpy(dtype=float)
+    stats = np.vstack([stats, np.full(stats.shape[1], np.nan)])[position]
+    mean, std, count = np.split(stats, 3, axis=1)
+    values = _values(df, columns)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = np.abs(values - mean) / std
+    scores[~((count >= MIN_HISTORY) & (std > 0))] = np.nan
+    with np.errstate(invalid='ignore'):
+        outliers = scores > limit
+    checked = (~np.isnan(scores)).sum(axis=0)
+    issues = []
+    for j in np.flatnonzero(outliers.any(axis=0)):
+        col, rows = columns[j], outliers[:, j].sum()
+        worst = np.nanargmax(scores[:, j])
+        severity = "error" if rows >= 2 and rows * 2 >= checked[j] else "warning"
+        detail = (f"{rows} of {checked[j]} readings over {limit:g} standard deviations from the last {ZSCORE_DAYS} "
+                  f"days, e.g. {_example(df, worst, values[worst, j])} (z={scores[worst, j]:.1f})")
+        issues.append(_issue(table, "zscore", col, severity, rows, detail))
+    return issues
+
+def validate_snapshot(daily=None, weekly=None, daily_baseline=None, weekly_baseline=None):
+    """
+    Runs every check on the parsed, not yet filled, daily and weekly frames of one
+    snapshot and returns the report: its status ('ok', 'warning' or 'failed'), the
+    rows checked, how long it took and the issues found.
+    """
+    started = time.perf_counter()
+    issues = []
+    rows = {}
+    for table, df, ranges, baseline in (
+        ("daily", daily, DAILY_RANGES, daily_baseline),
+        ("weekly", weekly, WEEKLY_RANGES, weekly_baseline),
+    ):
+        if df is None:
+            continue
+        rows[table] = len(df)
+        issues += check_missing(df, ranges, table, baseline)
+        issues += check_ranges(df, ranges, table)
+        issues += check_zscores(df, baseline, ZSCORE_COLUMNS[table], table)
+
+    severities = {issue["severity"] for issue in issues}
+    status = "failed" if "error" in severities else "warning" if severities else "ok"
+    return {
+        "checked_at": datetime.now().isoformat(timespec="seconds"),
+        "status": status,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - started, 4),
+        "issues": issues,
+    }
+
+def load_baseline(path, columns, days=ZSCORE_DAYS):
+    """
+    Per-city mean, standard deviation and count of the given columns in the
+    stored aggregates at path over the last `days` days, or None without
+    aggregates. Only the statistics these need are read.
+    """
+    stats = load_aggregates(
+        path, ['Scraped Date', 'City'] + [f"{col}_{stat}" for col in columns for stat in ('sum', 'count', 'sumsq')]
+    )
+    if stats is None or stats.empty:
+        return None
+    return summary(window(stats, days=days), 'City')
+
+def kind_report_path(kind, output_path=REPORT_PATH):
+    # the report of a daily or weekly only validation, next to the full one
+    root, ext = os.path.splitext(output_path)
+    return f"{root}-{kind}{ext}"
+
+def write_report(report, output_path=REPORT_PATH):
+    atomic_write(output_path, json.dumps(report, indent=2))
+
+def _parsed(raw, clean):
+    # an empty snapshot is reported as it is, there is nothing to parse
+    if raw is None or raw.empty:
+        return raw
+    return clean(raw, schema=None, fill=False)
+
+def validate_frames(daily_raw=None, weekly_raw=None, storage_format=None, report_path=REPORT_PATH, fail=True):
+    """
+    Parses the raw frames of a snapshot without filling them, validates them against
+    the stored aggregates, writes the report to report_path and prints its issues.
+    Raises ValidationError when a check failed, unless fail is False.
+    """
+    report = validate_snapshot(
+        _parsed(daily_raw, clean_daily_frame),
+        _parsed(weekly_raw, clean_weekly_frame),
+        load_baseline(aggregates_path(storage_format, name=DAILY_AGGREGATES_NAME), ZSCORE_COLUMNS['daily']),
+        load_baseline(aggregates_path(storage_format), ZSCORE_COLUMNS['weekly']),
+    )
+    if report_path:
+        write_report(report, report_path)
+    for issue in report["issues"]:
+        print(f"{issue['severity']}: {_describe(issue)}")
+    print(f"Validation {report['status']} in {report['seconds'] * 1000:.1f} ms")
+    if fail and report["status"] == "failed":
+        raise ValidationError(report)
+    return report
+
+def _read_raw(path):
+    if not os.path.exists(path):
+        return None
+    return pd.DataFrame() if is_empty_table(path) else read_table(path)
+
+def run_validation(storage_format=None, report_path=REPORT_PATH, fail=True, kind=None):
+    """
+    Validates the raw snapshot on disk, only its daily or weekly table when kind is given.
+    """
+    raw = {
+        f"{table}_raw": _read_raw(table_path(RAW_DIR, f"{table}-weather-data", storage_format))
+        for table in KINDS if kind in (None, table)
+    }
+    return validate_frames(storage_format=storage_format, report_path=report_path, fail=fail, **raw)
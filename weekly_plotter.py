@@ -1,20 +1,37 @@
 import os
+import re
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import plotly.express as px
 import pandas as pd
 
-def visualize_weekly_weather_by_city(df, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    
+from aggregates import aggregates_path, load_aggregates, rollup, snapshot_stats, window
+from interpolation import interpolate_field, latitude_scale
+from html_output import shared_html_options, write_html
+from render_cache import MANIFEST_PATH
+from render_pool import render_figures
+from storage import read_table, table_path
+
+# the only columns the weekly plots read
+PLOT_COLUMNS = [
+    'City', 'Date', 'Latitude', 'Longitude', 'High_Temp', 'Low_Temp', 'Avg_Temp',
+    'Precipitation', 'Snow', 'Forecast'
+]
+
+# cities per row of the trend grid
+GRID_COLUMNS = 4
+
+def plot_temperature_map(df, output_path, html_mode=None, bundle_dir=None):
     # Plot 1: Interactive Map: Average Temperature Distribution by City
     fig_map = px.scatter_mapbox(
-        df.sort_values('Date'),
+        df.sort_values('Date').assign(Marker_Size=5),
         lat='Latitude',
         lon='Longitude',
         color='Avg_Temp',
-        size=[5] * len(df),
+        size='Marker_Size',
         hover_name='City',
-        hover_data=['Avg_Temp', 'Precipitation', 'Snow', 'Forecast'],
+        hover_data={'Avg_Temp': True, 'Precipitation': True, 'Snow': True, 'Forecast': True, 'Marker_Size': False},
         color_continuous_scale=px.colors.diverging.RdYlBu,
         range_color=[df['Avg_Temp'].min(), df['Avg_Temp'].max()],
         mapbox_style='carto-positron',
@@ -22,25 +39,48 @@ def visualize_weekly_weather_by_city(df, output_dir):
         animation_frame=df['Date'].dt.strftime('%a %d.%m'),
         title='Weekly Average Temperature Distribution Across Cities in Armenia'
     )
-    fig_map.write_html(os.path.join(output_dir, 'interactive_temperature_map.html'))
-
-    # Plot 2: Temperature Trends for Yerevan
-    plt.figure(figsize=(10, 6))
-    city_data = df[df['City'] == 'Yerevan']
-    plt.plot(city_data['Date'], city_data['High_Temp'], label='High Temp (°C)', color='red', marker='o')
-    plt.plot(city_data['Date'], city_data['Low_Temp'], label='Low Temp (°C)', color='blue', marker='o')
-    plt.title("Temperature Trends for Yerevan")
-    plt.xlabel("Date")
-    plt.ylabel("Temperature (°C)")
-    plt.legend()
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    temp_trends_path = os.path.join(output_dir, 'temperature_trends_yerevan.png')
-    plt.savefig(temp_trends_path)
-    plt.close()
+    write_html(fig_map, output_path, html_mode, bundle_dir)
+
+def _draw_city_trends(ax, city_data, city):
+    ax.plot(city_data['Date'], city_data['High_Temp'], label='High Temp (°C)', color='red', marker='o')
+    ax.plot(city_data['Date'], city_data['Low_Temp'], label='Low Temp (°C)', color='blue', marker='o')
+    ax.set_title(f"Temperature Trends for {city}")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Temperature (°C)")
+    ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.tick_params(axis='x', labelrotation=45)
+
+def plot_city_trends(city_data, output_path, city):
+    # Plot 2: Temperature Trends for one city
+    for _ in plot_city_trends_batch([(city_data, output_path, {'city': city})]):
+        pass
+
+def plot_city_trends_batch(items):
+    """
+    Draws (city_data, output_path, {'city': city}) items one after another on a
+    single figure that is cleared between cities, yielding after each file is written.
+    """
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        for city_data, output_path, params in items:
+            ax.clear()
+            _draw_city_trends(ax, city_data, params['city'])
+            fig.tight_layout()
+            fig.savefig(output_path)
+            yield output_path
+    finally:
+        plt.close(fig)
 
+def city_trends_filename(city):
+    slug = re.sub(r'[^a-z0-9]+', '_', city.lower()).strip('_')
+    return f"temperature_trends_{slug}.png"
+
+def plot_city_trends_grid(df, output_path, html_mode=None, bundle_dir=None):
     # Plot 3: Temperature Trends Over the Week (Line Chart by City)
+    # plotly rejects row spacing above 1 / (rows - 1), so it shrinks as cities are added
+    facet_rows = -(-df['City'].nunique() // GRID_COLUMNS)
+    row_spacing = min(0.07, 0.5 / max(facet_rows - 1, 1))
     df_melted = df.melt(
         id_vars=['City', 'Date'],
         value_vars=['High_Temp', 'Low_Temp', 'Avg_Temp'],
@@ -53,7 +93,9 @@ def visualize_weekly_weather_by_city(df, output_dir):
         y='Temperature',
         color='Temperature_Type',
         facet_col='City',
-        facet_col_wrap=4,
+        facet_col_wrap=GRID_COLUMNS,
+        facet_row_spacing=row_spacing,
+        height=max(450, 250 * facet_rows),
         title='Temperature Trends Over the Week for Each City in Armenia',
         labels={
             'Date': 'Date',
@@ -62,11 +104,11 @@ def visualize_weekly_weather_by_city(df, output_dir):
         },
         markers=True
     )
-    fig_line.write_html(os.path.join(output_dir, 'temperature_trends_all_cities.html'))
-    
-    # Plot 4: Precipitation and Snow by City (Bar Chart)
-    df_agg = df.groupby('City').agg({'Precipitation': 'sum', 'Snow': 'sum'}).reset_index()
-    df_melted_bar = df_agg.melt(
+    write_html(fig_line, output_path, html_mode, bundle_dir)
+
+def plot_precipitation_snow(city_totals, output_path, html_mode=None, bundle_dir=None):
+    # Plot 4: Precipitation and Snow by City (Bar Chart), from the per-city totals
+    df_melted_bar = city_totals.melt(
         id_vars='City',
         value_vars=['Precipitation', 'Snow'],
         var_name='Precipitation_Type',
@@ -81,12 +123,12 @@ def visualize_weekly_weather_by_city(df, output_dir):
         title='Total Precipitation and Snow per City Over the Week',
         labels={'Amount': 'Amount (mm for Precipitation, cm for Snow)'}
     )
-    fig_bar.write_html(os.path.join(output_dir, 'precipitation_snow_by_city.html'))
-   
-    # Plot 5: Precipitation Proportion by City (Pie Chart)
-    precip_data = df.groupby('City')['Precipitation'].sum().reset_index()
+    write_html(fig_bar, output_path, html_mode, bundle_dir)
+
+def plot_precipitation_share(city_totals, output_path, html_mode=None, bundle_dir=None):
+    # Plot 5: Precipitation Proportion by City (Pie Chart), from the per-city totals
     fig_pie = px.pie(
-        precip_data,
+        city_totals,
         names='City',
         values='Precipitation',
         title='Proportion of Total Precipitation by City',
@@ -94,23 +136,125 @@ def visualize_weekly_weather_by_city(df, output_dir):
         color='City',
         color_discrete_sequence=px.colors.qualitative.Set3
     )
-    fig_pie.write_html(os.path.join(output_dir, 'precipitation_proportion_pie_chart.html'))
+    write_html(fig_pie, output_path, html_mode, bundle_dir)
 
-def run_weekly_plotter():
+def latest_city_totals(aggregates):
+    """
+    Precipitation and snow totals per city over the latest snapshot.
+    """
+    totals = rollup(window(aggregates, snapshots=1), 'City')
+    return totals[['City', 'Precipitation_sum', 'Snow_sum']].rename(
+        columns={'Precipitation_sum': 'Precipitation', 'Snow_sum': 'Snow'}
+    )
+
+def plot_temperature_field_by_day(df, output_path, html_mode=None, bundle_dir=None):
+    # Plot 6: Average Temperature Interpolated Between the Cities, One Frame per Forecast Day
+    lats, lons, dates, grids = interpolate_field(df, 'Avg_Temp', time_col='Date')
+    # one color scale for every day, so the frames compare
+    values = pd.Series(grids.ravel())
+    fig_field = px.imshow(
+        grids,
+        animation_frame=0,
+        x=lons,
+        y=lats,
+        origin='lower',
+        range_color=(values.min(), values.max()),
+        color_continuous_scale='RdYlBu_r',
+        labels={'x': 'Longitude', 'y': 'Latitude', 'color': 'Average Temperature (℃)', 'animation_frame': 'Day'},
+        title='Forecast Average Temperature Across Armenia'
+    )
+    for step, date in zip(fig_field.layout.sliders[0].steps, dates):
+        step.label = f"{date:%a %d.%m}"
+    # a degree of longitude is shorter than one of latitude this far north, square cells would stretch the country
+    fig_field.update_yaxes(scaleanchor='x', scaleratio=latitude_scale(lats))
+    write_html(fig_field, output_path, html_mode, bundle_dir)
+
+def weekly_figure_tasks(df, output_dir, html_options=None, aggregates=None):
+    """
+    One render task per weekly figure: (render_func, input slice, output path, params).
+    Each figure only gets the rows and columns it draws, so its cache key only changes with them;
+    html_options (html_mode, bundle_dir) go to the interactive charts.
+    The bar and pie charts are drawn from the per-snapshot aggregates, computed from df when not given.
+    """
+    html_options = html_options or {}
+    city_totals = latest_city_totals(snapshot_stats(df) if aggregates is None else aggregates)
+    by_city = df.groupby('City')
+    city_trends = [
+        (
+            plot_city_trends,
+            city_data[['Date', 'High_Temp', 'Low_Temp']],
+            os.path.join(output_dir, city_trends_filename(city)),
+            {'city': city}
+        )
+        for city, city_data in by_city
+    ]
+    return [
+        (
+            plot_temperature_map,
+            df[['Date', 'Latitude', 'Longitude', 'Avg_Temp', 'City', 'Precipitation', 'Snow', 'Forecast']],
+            os.path.join(output_dir, 'interactive_temperature_map.html'),
+            html_options
+        ),
+        *city_trends,
+        (
+            plot_city_trends_grid,
+            df[['City', 'Date', 'High_Temp', 'Low_Temp', 'Avg_Temp']],
+            os.path.join(output_dir, 'temperature_trends_all_cities.html'),
+            html_options
+        ),
+        (
+            plot_precipitation_snow,
+            city_totals,
+            os.path.join(output_dir, 'precipitation_snow_by_city.html'),
+            html_options
+        ),
+        (
+            plot_precipitation_share,
+            city_totals[['City', 'Precipitation']],
+            os.path.join(output_dir, 'precipitation_proportion_pie_chart.html'),
+            html_options
+        ),
+        (
+            plot_temperature_field_by_day,
+            df[['Date', 'Latitude', 'Longitude', 'Avg_Temp']],
+            os.path.join(output_dir, 'temperature_field_by_day.html'),
+            html_options
+        ),
+    ]
+
+def visualize_weekly_weather_by_city(df, output_dir, max_workers=None, manifest_path=None, html_options=None,
+                                     aggregates=None):
+    """
+    Renders every weekly figure into output_dir on a process pool and returns
+    the per-figure timings. With a manifest_path unchanged figures are skipped.
+    The per-city trend charts are drawn in batches, one reused figure per worker.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    return render_figures(
+        weekly_figure_tasks(df, output_dir, html_options, aggregates), max_workers, manifest_path,
+        batches={plot_city_trends: plot_city_trends_batch}
+    )
+
+def run_weekly_plotter(storage_format=None, max_workers=None, use_render_cache=True, html_mode=None):
     """
     Loads the cleaned weekly weather data from outputs/processed
     and generates visualizations saved in outputs/visualizations/weekly.
     """
     # Input cleaned weekly data
-    cleaned_csv = "outputs/processed/weekly-weather-data-clean.csv"
+    cleaned_csv = table_path("outputs/processed", "weekly-weather-data-clean", storage_format)
     # Output directory for weekly visualizations
     output_dir = "outputs/visualizations/weekly"
 
     # Ensure the directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    # Load the DataFrame, parse 'Date' as datetime
-    df = pd.read_csv(cleaned_csv, parse_dates=['Date'])
+    # Load only the plotted columns, parse 'Date' as datetime when reading CSV
+    df = read_table(cleaned_csv, columns=PLOT_COLUMNS, parse_dates=['Date'])
+
+    # the stored aggregates hold the precipitation totals, so they are not recomputed here
+    aggregates = load_aggregates(aggregates_path(storage_format))
 
     # Call the weekly visualization function
-    visualize_weekly_weather_by_city(df, output_dir)
+    manifest_path = MANIFEST_PATH if use_render_cache else None
+    html_options = shared_html_options(html_mode)
+    visualize_weekly_weather_by_city(df, output_dir, max_workers, manifest_path, html_options, aggregates)
@@ -1,55 +1,161 @@
+import re
 import os
 import pandas as pd
-import numpy as np
+from datetime import datetime
 
-def clean_weekly_weather_data(raw_csv, clean_csv):
+from aggregates import SNAPSHOT_KEYS, aggregates_path, rollup, snapshot_stats, update_aggregates
+from chunking import column_stats, merge_stats, stats_means, write_chunks
+from page_cache import is_up_to_date, mark_up_to_date
+from history_store import weekly_history
+from locations import add_coordinates
+from schema import WEEKLY_SCHEMA, apply_schema
+from storage import format_of, is_empty_table, iter_table, read_table, table_path, write_table
+
+# numeric columns whose missing values are filled with the column mean
+NUMERIC_COLUMNS = ['Precipitation', 'Snow', 'High_Temp', 'Low_Temp', 'Avg_Temp', 'Latitude', 'Longitude']
+
+# 'Mon 12.01' -> day and month of the forecast, the page shows no year
+DATE_PATTERN = re.compile(r'(?P<day>\d{1,2})\.(?P<month>\d{1,2})')
+# '5°/-1°' -> high and low temperature
+HI_LO_PATTERN = re.compile(r'(?P<High_Temp>[-+]?\d+(?:\.\d+)?)°?\s*/\s*(?P<Low_Temp>[-+]?\d+(?:\.\d+)?)')
+NUMBER_PATTERN = re.compile(r'([-+]?\d*\.?\d+)')
+
+def _extract(series, pattern):
     """
-    Cleans the raw weekly weather data and saves the cleaned data to a new CSV file.
+    The regex groups of pattern in every cell of series, as floats.
+    A week of forecasts repeats the same few dates and temperatures, so the
+    regex only runs over the distinct cells and the result is spread back out.
     """
-    
-    df = pd.read_csv(raw_csv)
-    df[['High_Temp', 'Low_Temp']] = df['Hi/Lo'].str.replace('°','').str.split('/', expand=True).astype(float)
+    codes, uniques = pd.factorize(series)
+    parsed = pd.Series(uniques, dtype=str).str.extract(pattern).astype(float)
+    # missing cells get code -1, which reindexes to a row of NaN
+    return parsed.reindex(codes).set_axis(series.index)
+
+def _extract_number(series):
+    # CSV readers already infer numbers, raw tables stored as Parquet/Feather keep the scraped text
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    return _extract(series, NUMBER_PATTERN)[0]
+
+def forecast_dates(dates, scraped_at):
+    """
+    Turns 'Mon 12.01'-style forecast days into dates, taking the year from the
+    scrape time of each row: a forecast month more than half a year before the
+    scrape month belongs to the next year (scraped in December, forecast for
+    January), one more than half a year after it to the previous year.
+    """
+    parts = _extract(dates, DATE_PATTERN)
+    scraped_at = pd.to_datetime(scraped_at)
+    month_gap = parts['month'] - scraped_at.dt.month
+    year = scraped_at.dt.year + (month_gap < -6).astype(int) - (month_gap > 6).astype(int)
+    return pd.to_datetime(
+        pd.DataFrame({'year': year, 'month': parts['month'], 'day': parts['day']}), errors='coerce'
+    )
+
+def _parse_weekly_frame(df, scraped_date):
+    """
+    Parses one frame of raw weekly rows, leaving missing values in place.
+    Rows that already carry a 'Scraped Date', such as accumulated snapshots, keep it.
+    """
+    # adding 'Scraped Date' with the timestamp of the run
+    if 'Scraped Date' not in df.columns:
+        df['Scraped Date'] = scraped_date
+
+    # one extraction for both temperatures instead of strip, split and cast
+    df[['High_Temp', 'Low_Temp']] = _extract(df['Hi/Lo'], HI_LO_PATTERN)
     df['Avg_Temp'] = (df['High_Temp'] + df['Low_Temp']) / 2  # calculating average temperature
 
-    # converting 'Date' to Datetime Format (Assuming Year 2025)
-    df['Date'] = pd.to_datetime(df['Date'] + '.2025', format='%a %d.%m.%Y')
-
-    city_coords = {
-        'Yerevan': {'Latitude': 40.1872, 'Longitude': 44.5152},
-        'Ashtarak': {'Latitude': 40.2929, 'Longitude': 44.3505},
-        'Artashat': {'Latitude': 39.9535, 'Longitude': 44.5520},
-        'Armavir': {'Latitude': 40.1554, 'Longitude': 44.0387},
-        'Gavar': {'Latitude': 40.3513, 'Longitude': 45.1273},
-        'Hrazdan': {'Latitude': 40.5353, 'Longitude': 44.7693},
-        'Vanadzor': {'Latitude': 40.8074, 'Longitude': 44.4970},
-        'Gyumri': {'Latitude': 40.7929, 'Longitude': 43.8465},
-        'Kapan': {'Latitude': 39.2077, 'Longitude': 46.4068},
-        'Ijevan': {'Latitude': 40.8791, 'Longitude': 45.1471},
-        'Yeghegnadzor': {'Latitude': 39.7633, 'Longitude': 45.3308}
-    }
-
-    def get_coordinates(city):
-        return pd.Series(city_coords.get(city, {'Latitude': np.nan, 'Longitude': np.nan}))
-    
-    # adding 'Latitude' and 'Longitude' columns
-    df[['Latitude', 'Longitude']] = df['City'].apply(get_coordinates)
+    for col in ['Precipitation', 'Snow']:
+        df[col] = _extract_number(df[col])
+
+    # converting 'Date' to a datetime in the year of the scrape, or the next one across New Year
+    df['Date'] = forecast_dates(df['Date'], df['Scraped Date'])
+
+    # adding 'Latitude' and 'Longitude' columns from the location registry
+    return add_coordinates(df)
 
+def _fill_weekly_missing(df, means):
     # handling missing values
-    numeric_cols = ['Precipitation', 'Snow', 'High_Temp', 'Low_Temp', 'Avg_Temp', 'Latitude', 'Longitude']
-    
-    for col in numeric_cols:
+    for col in NUMERIC_COLUMNS:
         if df[col].isnull().any():
-            mean_value = df[col].mean()
-            df[col].fillna(mean_value, inplace=True)
+            df[col] = df[col].fillna(means[col])
 
     # dropping unnecessary columns
     columns_to_drop = ['Hi/Lo']
     df_clean = df.drop(columns=columns_to_drop)
+    return df_clean
+
+def iter_clean_weekly_chunks(raw_csv, chunksize, scraped_date=None):
+    """
+    Yields cleaned chunks of the raw weekly data with bounded memory.
+    The file is read twice: once for the column means and once to clean it.
+    """
+    if scraped_date is None:
+        scraped_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # first pass: running sums and counts for the mean-based fill
+    stats = None
+    for chunk in pd.read_csv(raw_csv, chunksize=chunksize):
+        stats = merge_stats(stats, column_stats(_parse_weekly_frame(chunk, scraped_date), NUMERIC_COLUMNS))
+    if stats is None:
+        return
+    means = stats_means(stats)
+
+    # second pass: cleaning and filling chunk by chunk
+    for chunk in pd.read_csv(raw_csv, chunksize=chunksize):
+        yield apply_schema(_fill_weekly_missing(_parse_weekly_frame(chunk, scraped_date), means), WEEKLY_SCHEMA)
+
+def clean_weekly_frame(df, scraped_date=None, schema=WEEKLY_SCHEMA, fill=True):
+    """
+    Cleans a raw weekly frame in memory and returns the cleaned frame,
+    cast to schema unless it is None. Without fill missing values stay NaN.
+    """
+    if scraped_date is None:
+        scraped_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df = _parse_weekly_frame(df.copy(), scraped_date)
+    if fill:
+        df_clean = _fill_weekly_missing(df, stats_means(column_stats(df, NUMERIC_COLUMNS)))
+    else:
+        df_clean = df.drop(columns=['Hi/Lo'])
+    return df_clean if schema is None else apply_schema(df_clean, schema)
+
+def clean_weekly_weather_data(raw_csv, clean_csv, chunksize=None):
+    """
+    Cleans the raw weekly weather data and saves the cleaned data to a new file
+    (CSV, Parquet or Feather, by extension).
+    With a chunksize the CSV file is streamed in chunks instead of loaded at once.
+    """
+    if chunksize is not None:
+        if format_of(raw_csv) != "csv" or format_of(clean_csv) != "csv":
+            raise ValueError("Chunked cleaning reads and writes CSV files only")
+        write_chunks(iter_clean_weekly_chunks(raw_csv, chunksize), clean_csv)
+        return
+
+    df_clean = clean_weekly_frame(read_table(raw_csv))
     
-    df_clean.to_csv(clean_csv, index=False)
+    write_table(df_clean, clean_csv)
 
-def run_weekly_processor():
-    raw_csv = "outputs/raw/weekly-weather-data.csv"
-    clean_csv = "outputs/processed/weekly-weather-data-clean.csv"
+def run_weekly_processor(force=False, chunksize=None, storage_format=None):
+    raw_csv = table_path("outputs/raw", "weekly-weather-data", storage_format)
+    clean_csv = table_path("outputs/processed", "weekly-weather-data-clean", storage_format)
     os.makedirs("outputs/processed", exist_ok=True)
-    clean_weekly_weather_data(raw_csv, clean_csv)
+    if is_empty_table(raw_csv):
+        raise RuntimeError(f"{raw_csv} has no rows, no weekly page was scraped")
+    if not force and is_up_to_date(raw_csv, clean_csv):
+        print(f"{raw_csv} is unchanged, skipping cleaning")
+        return
+    clean_weekly_weather_data(raw_csv, clean_csv, chunksize=chunksize)
+    mark_up_to_date(raw_csv, clean_csv)
+
+    # keeping every cleaned snapshot in the history store, and its per-city statistics in the aggregates
+    history = weekly_history()
+    added = 0
+    stats = []
+    # the table written just above, not counted as input a second time
+    for chunk in iter_table(clean_csv, chunksize, count=False):
+        added += history.append(chunk)
+        stats.append(snapshot_stats(chunk))
+    print(f"Added {added} weekly rows to {history.root}")
+    # a snapshot can span several chunks
+    keys = [key for key in SNAPSHOT_KEYS if key in stats[0].columns]
+    update_aggregates(rollup(pd.concat(stats, ignore_index=True), keys), aggregates_path(storage_format))